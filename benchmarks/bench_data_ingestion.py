@@ -0,0 +1,69 @@
+"""Fit time and peak memory when the training data is passed to the C library
+as columns of values against formatting it as text for the C library to parse
+(the fallback used for data that can't be passed as columns).
+
+Each measurement runs in a fresh process so that peak RSS isn't shared. Run
+from the repository root after building the extension::
+
+    python benchmarks/bench_data_ingestion.py [n_rows] [n_features]
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_regression
+
+
+def _fit(mode, n_rows, n_features):
+    import cubist.cubist
+    from cubist import Cubist
+
+    if mode == "text":
+        cubist.cubist._make_data_columns = lambda *args, **kwargs: None
+
+    X, y = make_regression(
+        n_samples=n_rows, n_features=n_features, noise=1.0, random_state=0
+    )
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(n_features)])
+    # a discrete column so that codes are passed as well as values
+    X["cat"] = np.random.default_rng(0).choice(list("abcde"), n_rows).astype(object)
+    # peak RSS is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    start = time.perf_counter()
+    Cubist(n_rules=50).fit(X, y)
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    print(f"{elapsed} {base_rss} {peak_rss}")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    print(f"{n_rows} rows x {n_features + 1} columns")
+
+    for mode in ["text", "columns"]:
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", mode, str(n_rows), str(n_features)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        elapsed, base_rss, peak_rss = map(float, result.stdout.split())
+        print(
+            f"{mode:>8}: fit {elapsed:8.2f} s  peak RSS {peak_rss / 2**20:8.0f} MiB  "
+            f"(+{(peak_rss - base_rss) / 2**20:.0f} MiB over the input data)"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _fit(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,53 @@
+"""Overhead of finding the rules that apply to each case with
+`Cubist.decision_path` over `Cubist.predict`, checking that the committee
+predictions it returns average to the predictions.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_decision_path.py [n_rows]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_friedman1
+
+from cubist import Cubist
+
+
+def _time(func, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = func()
+        times.append(time.perf_counter() - start)
+    return np.median(times), out
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    X, y = make_friedman1(n_rows, n_features=10, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+
+    for params in [{"n_committees": 1}, {"n_committees": 5}]:
+        model = Cubist(**params).fit(X.iloc[:5_000], y[:5_000])
+        predict, y_hat = _time(lambda m=model: m.predict(X))
+        path, (indicator, committees) = _time(
+            lambda m=model: m.decision_path(X, return_committee_predictions=True)
+        )
+        total = np.zeros(n_rows)
+        for committee in committees.T:
+            total += committee
+        assert np.array_equal((total / committees.shape[1]).astype(np.float32), y_hat)
+        print(
+            f"{params} {indicator.shape[1]} rules, {indicator.nnz / n_rows:.1f} "
+            f"rules per case\n  predict       {predict:6.2f} s\n"
+            f"  decision_path {path:6.2f} s  ({path / predict - 1:+.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Time to fit a model with many committees against fitting it with
+`early_stopping`, which stops adding committee members once they no longer
+reduce the error on held out cases, and the error of each on a test set.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_early_stopping.py [n_rows] [n_committees]
+"""
+
+import sys
+import time
+
+import pandas as pd
+from sklearn.datasets import make_friedman1
+from sklearn.metrics import mean_absolute_error
+
+from cubist import Cubist
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_committees = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    X, y = make_friedman1(2 * n_rows, n_features=10, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    X_train, X_test, y_train, y_test = X[:n_rows], X[n_rows:], y[:n_rows], y[n_rows:]
+
+    print(f"{n_rows} rows, n_committees={n_committees}")
+    for early_stopping in (False, True):
+        start = time.perf_counter()
+        model = Cubist(
+            n_committees=n_committees, early_stopping=early_stopping, random_state=0
+        ).fit(X_train, y_train)
+        elapsed = time.perf_counter() - start
+        error = mean_absolute_error(y_test, model.predict(X_test))
+        print(
+            f"  early_stopping={early_stopping!s:5s} {elapsed:7.2f} s  "
+            f"{model.n_committees_used_:3d} committees  test MAE {error:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Fit time and peak memory on narrow and on wide data, for comparing how the C
+library lays out the cases while it grows the trees. Run it on the commits to
+compare, rebuilding the extension for each.
+
+Each measurement runs in a fresh process so that peak RSS isn't shared. Run
+from the repository root after building the extension::
+
+    python benchmarks/bench_fit_layout.py [n_rows]
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+from sklearn.datasets import make_friedman1
+
+
+def _fit(n_rows, n_features):
+    from cubist import Cubist
+
+    X, y = make_friedman1(n_rows, n_features=n_features, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(n_features)])
+    # peak RSS is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    start = time.perf_counter()
+    Cubist().fit(X, y)
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    print(f"{elapsed} {base_rss} {peak_rss}")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+
+    # the wide data has fewer rows so that both take about as long
+    for rows, n_features in [(n_rows, 10), (n_rows // 15, 100)]:
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", str(rows), str(n_features)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        elapsed, base_rss, peak_rss = map(float, result.stdout.split())
+        print(
+            f"{rows:>8} rows x {n_features:3d} features: fit {elapsed:8.2f} s  "
+            f"peak RSS {peak_rss / 2**20:6.0f} MiB  "
+            f"(+{(peak_rss - base_rss) / 2**20:.0f} MiB over the input data)"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _fit(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,40 @@
+"""Time to fit a model on wide data as the number of threads that evaluate
+the attributes at each node grows, checking each model is the same as the
+model built by one thread.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_fit_n_jobs.py [n_rows] [n_features]
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+from sklearn.datasets import make_friedman1
+
+from cubist import Cubist
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    X, y = make_friedman1(n_rows, n_features=n_features, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+
+    print(f"{n_rows} rows, {n_features} features, {os.cpu_count()} processors")
+    serial = None
+    for n_jobs in (1, 2, 4, 8):
+        start = time.perf_counter()
+        model = Cubist(n_jobs=n_jobs).fit(X, y)
+        elapsed = time.perf_counter() - start
+        if serial is None:
+            serial = elapsed, model.model_
+        assert model.model_ == serial[1]
+        print(f"  n_jobs={n_jobs}  {elapsed:7.2f} s  speedup {serial[0] / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
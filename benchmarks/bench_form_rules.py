@@ -0,0 +1,36 @@
+"""Time to fit a model on large data with deep trees, where forming the rules
+from the model tree takes a large share of the fit, and the number of rules.
+Run it on the commits to compare, rebuilding the extension for each.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_form_rules.py [n_rows ...]
+"""
+
+import sys
+import time
+
+import pandas as pd
+from sklearn.datasets import make_friedman1
+
+from cubist import Cubist
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [100_000, 300_000, 1_000_000]
+
+    for n_rows in sizes:
+        X, y = make_friedman1(n_rows, noise=1.0, random_state=0)
+        X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+
+        start = time.perf_counter()
+        model = Cubist().fit(X, y)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{n_rows:>8} rows: fit {elapsed:8.2f} s  "
+            f"{model.model_.count('conds='):4d} rules"
+        )
+
+
+if __name__ == "__main__":
+    main()
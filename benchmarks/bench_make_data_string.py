@@ -0,0 +1,79 @@
+"""Time to convert a dataset to the Cubist data string with the column-wise
+encoder in `cubist._make_data_string` against the previous cell-by-cell
+implementation, which is kept below for reference. Both must produce the same
+string.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_make_data_string.py [n_rows] [n_features]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_string_dtype
+
+from cubist._make_data_string import _make_data_string
+from cubist._make_names_string import _escapes
+from cubist._utils import _format
+
+
+def _previous_make_data_string(x, y=None, w=None):
+    """`_make_data_string` as it was before the column-wise encoder."""
+    for col in x:
+        if is_string_dtype(x[col]):
+            x[col] = _escapes(x[col].astype(str))
+    if y is None:
+        y = pd.Series([np.nan] * x.shape[0])
+    else:
+        y = y.copy(deep=True)
+    y = pd.Series(_escapes(y.astype(str)))
+    x.insert(0, "y", y)
+    if w is not None:
+        column_names = list(x.columns) + ["w"]
+        x = x.assign(w=w)
+        x.columns = column_names
+    for col in x:
+        if is_numeric_dtype(x[col]):
+            x[col] = x[col].apply(_format)
+        else:
+            x[col] = x[col].astype(str)
+    x = x.map(lambda a: a.lstrip())
+    x = x.fillna("?")
+    x = x.replace("nan", "?")
+    x = x.to_numpy().tolist()
+    x = [",".join(row) for row in x]
+    return "\n".join(x)
+
+
+def _time(func, x, y):
+    start = time.perf_counter()
+    out = func(x.copy(), y)
+    return time.perf_counter() - start, out
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        rng.normal(size=(n_rows, n_features)),
+        columns=[f"x{i}" for i in range(n_features)],
+    )
+    X.iloc[::10, 0] = np.nan
+    X["cat"] = rng.choice(["a", "b", "c d", "e:f"], n_rows)
+    y = pd.Series(rng.normal(size=n_rows))
+
+    print(f"{n_rows} rows x {X.shape[1]} columns")
+    previous, expected = _time(_previous_make_data_string, X, y)
+    print(f"previous:   {previous:8.2f} s")
+    current, out = _time(_make_data_string, X, y)
+    print(f"column-wise: {current:7.2f} s  ({previous / current:.1f}x)")
+    assert out == expected, "column-wise encoder output differs"
+
+
+if __name__ == "__main__":
+    main()
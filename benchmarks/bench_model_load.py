@@ -0,0 +1,51 @@
+"""Time to load a composite model into the C library, as an unpickled model
+does, when its instances and kd-tree are restored from the pickle against
+rebuilding them from the training data (the previous behavior).
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_model_load.py [n_rows] [n_features]
+"""
+
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_regression
+
+from cubist import Cubist
+
+
+def _time(func, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    X, y = make_regression(
+        n_samples=n_rows, n_features=n_features, noise=10.0, random_state=0
+    )
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(n_features)])
+    model = Cubist(n_rules=20, neighbors=5).fit(X, y)
+    index = model.__getstate__()["_instance_index"]
+
+    print(f"composite model on {n_rows} rows x {n_features} features")
+    print(f"pickle size: {len(pickle.dumps(model)) / 2**20:.1f} MiB")
+    rebuild = _time(lambda: model._load_model())
+    print(f"rebuild instances and index: {rebuild * 1000:8.1f} ms")
+    restore = _time(lambda: model._load_model(index))
+    print(f"restore instances and index: {restore * 1000:8.1f} ms")
+    print(f"speedup: {rebuild / restore:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
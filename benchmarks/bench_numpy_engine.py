@@ -0,0 +1,60 @@
+"""Prediction time of rules-only models with the C library and with the
+rules evaluated over whole columns by NumPy (``engine="numpy"``).
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_numpy_engine.py [n_rows]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cubist import Cubist
+
+
+def _data(n_rows, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.uniform(size=(n_rows, 10)), columns=[f"x{i}" for i in range(10)]
+    )
+    X["cat"] = rng.choice(["a", "b", "c", "d"], n_rows)
+    y = (
+        np.sin(25 * X.x0) * np.cos(25 * X.x1)
+        + np.sin(30 * X.x2 * X.x3)
+        + X.cat.map({"a": 0, "b": 1, "c": 2, "d": 3}) * X.x4
+        + 0.01 * rng.normal(size=n_rows)
+    )
+    return X, y
+
+
+def _time(model, X, engine, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        y_hat = model.predict(X, engine=engine)
+        times.append(time.perf_counter() - start)
+    return np.median(times), y_hat
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    X, y = _data(20_000, 0)
+    X_test, _ = _data(n_rows, 1)
+
+    for params in [{"n_rules": 20}, {}, {"n_committees": 5}]:
+        model = Cubist(**params).fit(X, y)
+        n_rules = model.model_.count("conds=")
+        c_time, c_pred = _time(model, X_test, "c")
+        np_time, np_pred = _time(model, X_test, "numpy")
+        print(
+            f"{n_rules:4d} rules, {n_rows} cases: C {c_time:6.2f} s, "
+            f"NumPy {np_time:6.2f} s ({c_time / np_time:.1f}x), "
+            f"largest difference {np.abs(c_pred - np_pred).max():.3g}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Peak memory and time to predict a large CSV file by reading it whole and
+calling `Cubist.predict` against streaming it with `Cubist.predict_csv`. Each
+run is in a process of its own so that its peak resident memory is measured
+alone.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_predict_csv.py [n_rows]
+"""
+
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_friedman1
+
+from cubist import Cubist
+
+
+def _run(mode, model_path, csv_path, out_path):
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    start = time.perf_counter()
+    if mode == "predict":
+        X = pd.read_csv(csv_path)
+        pd.Series(model.predict(X), name="prediction").to_csv(out_path, index=False)
+    else:
+        model.predict_csv(csv_path, out_path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f} {peak:.0f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("predict", "predict_csv"):
+        _run(*sys.argv[1:])
+        return
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    X, y = make_friedman1(20_000, n_features=10, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    X["cat"] = np.where(X.x0 > 0.5, "a", "b")
+    model = Cubist(n_committees=5).fit(X, y)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.pkl")
+        csv_path = os.path.join(tmp, "cases.csv")
+        with open(model_path, "wb") as f:
+            pickle.dump(model, f)
+        rng = np.random.default_rng(0)
+        for start in range(0, n_rows, 500_000):
+            n = min(500_000, n_rows - start)
+            cases = pd.DataFrame(rng.uniform(size=(n, 10)), columns=X.columns[:10])
+            cases["cat"] = rng.choice(["a", "b"], n)
+            cases.to_csv(csv_path, mode="a", header=start == 0, index=False)
+        size = os.path.getsize(csv_path) / 2**20
+        print(f"{n_rows} rows, {size:.0f} MiB of CSV")
+
+        outputs = {}
+        for mode in ("predict", "predict_csv"):
+            out_path = os.path.join(tmp, f"{mode}.csv")
+            result = subprocess.run(
+                [sys.executable, __file__, mode, model_path, csv_path, out_path],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            elapsed, peak = result.stdout.split()
+            print(f"  {mode:12s} {float(elapsed):7.2f} s  peak RSS {peak:>6s} MiB")
+            outputs[mode] = pd.read_csv(out_path, float_precision="round_trip")
+        assert outputs["predict"].equals(outputs["predict_csv"])
+
+
+if __name__ == "__main__":
+    main()
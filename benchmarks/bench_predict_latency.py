@@ -0,0 +1,80 @@
+"""Per-call prediction latency of the loaded model against re-loading it from
+the model text on every call (the previous behavior of `Cubist.predict`).
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_predict_latency.py
+"""
+
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_regression
+
+from _cubist import _predictions  # noqa E0611
+from cubist import Cubist
+from cubist._make_data_string import _make_data_string
+
+
+def _time(func, repeats, *args):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def _reload_predict(model, train_string, data_string, n_rows):
+    # _predictions is only kept in the extension as this baseline
+    return _predictions(
+        data_string,
+        zlib.decompress(model._names_string),
+        train_string,
+        model.model_.encode(),
+        np.zeros(n_rows),
+        b"1",
+    )
+
+
+def main():
+    X, y = make_regression(n_samples=100_000, n_features=10, noise=10.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+
+    for label, params in [
+        ("rules", {"n_committees": 5}),
+        ("composite", {"n_committees": 5, "neighbors": 5}),
+    ]:
+        model = Cubist(**params).fit(X.iloc[:2_000], y[:2_000])
+        # composite models read the training data, which the estimator keeps
+        # as compressed columns rather than as the text of a data file
+        if "neighbors" in params:
+            train_string = _make_data_string(X.iloc[:2_000].copy(), y[:2_000])
+            train_string = train_string.encode()
+        else:
+            train_string = b"1"
+        print(f"\n{label} model")
+        print(f"{'rows':>8} {'reload (ms)':>12} {'loaded (ms)':>12} {'speedup':>8}")
+        for n_rows in [1, 100, 100_000]:
+            repeats = 1 if n_rows == 100_000 else 20
+            data_string = _make_data_string(X.iloc[:n_rows].copy()).encode()
+            args = (model, train_string, data_string, n_rows)
+            reload = _time(_reload_predict, repeats, *args)
+            loaded = _time(
+                model._cubist_model.predict, repeats, data_string, np.zeros(n_rows)
+            )
+            np.testing.assert_allclose(
+                _reload_predict(*args)[0],
+                model._cubist_model.predict(data_string, np.zeros(n_rows))[0],
+                rtol=1e-6,
+            )
+            print(
+                f"{n_rows:>8} {reload * 1e3:>12.3f} {loaded * 1e3:>12.3f} "
+                f"{reload / loaded:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Scaling of `Cubist.predict` with the number of threads, or worker processes
+with `backend="process"`, given by `n_jobs`, checking that every number of
+threads and processes gives the same predictions. Processes are timed after
+they have been started by a first prediction.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_predict_n_jobs.py [n_rows] [max_threads]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_regression
+
+from cubist import Cubist
+
+
+def _time(model, X, backend="thread", repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        y_hat = model.predict(X, backend=backend)
+        times.append(time.perf_counter() - start)
+    return np.median(times), y_hat
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    X, y = make_regression(n_samples=n_rows, n_features=10, noise=10.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    print(f"{n_rows} rows, {os.cpu_count()} processors")
+
+    for label, params in [
+        ("rules", {"n_committees": 5}),
+        ("composite", {"n_committees": 5, "neighbors": 5}),
+    ]:
+        model = Cubist(**params).fit(X.iloc[:5_000], y[:5_000])
+        print(f"\n{label} model")
+        serial, expected = _time(model, X)
+        print(f"n_jobs=1:          {serial:7.2f} s")
+        n_jobs = 2
+        while n_jobs <= max_threads:
+            model.set_params(n_jobs=n_jobs)
+            for backend in ("thread", "process"):
+                model.predict(X.iloc[: n_jobs * 1000], backend=backend)
+                elapsed, y_hat = _time(model, X, backend)
+                assert np.array_equal(y_hat, expected), f"{backend} predictions differ"
+                print(
+                    f"n_jobs={n_jobs} {backend:7s}: {elapsed:7.2f} s  "
+                    f"({serial / elapsed:.1f}x)"
+                )
+            n_jobs *= 2
+        model.set_params(n_jobs=None)
+        model.clear_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Latency of scoring one case at a time with `Cubist.predict` on a one-row
+DataFrame and with `Cubist.predict_one` on a dict and on a list of values.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_predict_one.py [n_calls]
+"""
+
+import sys
+import time
+
+import numpy as np
+from sklearn.datasets import load_diabetes
+
+from cubist import Cubist
+
+
+def _latencies(func, cases):
+    times = np.empty(len(cases))
+    for i, case in enumerate(cases):
+        start = time.perf_counter()
+        func(case)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def main():
+    n_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    X, y = load_diabetes(return_X_y=True, as_frame=True)
+    X["cat"] = np.where(X.bmi > 0, "a", "b")
+    cases = X.sample(n_calls, replace=True, random_state=0)
+    rows = [cases.iloc[[i]] for i in range(n_calls)]
+    records = cases.to_dict("records")
+    lists = cases.to_numpy(dtype=object).tolist()
+
+    for params in [{"n_committees": 5}, {"neighbors": 5}]:
+        model = Cubist(**params).fit(X, y)
+        print(params)
+        for label, func, inputs in [
+            ("predict(1-row DataFrame)", model.predict, rows),
+            ("predict_one(dict)", model.predict_one, records),
+            ("predict_one(list)", model.predict_one, lists),
+        ]:
+            times = _latencies(func, inputs) * 1e6
+            print(
+                f"  {label:26s} p50 {np.percentile(times, 50):8.1f} us  "
+                f"p99 {np.percentile(times, 99):8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Prediction time of rule-based models with about 100, 500 and 2000 rules.
+
+Each committee member's rules are indexed by their conditions when the model
+is loaded, so that a case is only matched against the rules it can satisfy.
+To measure the gain, run this once with the current build and once with a
+build of the commit before the index was added, e.g.::
+
+    python benchmarks/bench_rule_index.py
+    PYTHONPATH=/path/to/previous/build python benchmarks/bench_rule_index.py
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cubist import Cubist
+
+
+def _data(n_rows, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.uniform(size=(n_rows, 10)), columns=[f"x{i}" for i in range(10)]
+    )
+    y = (
+        np.sin(25 * X.x0) * np.cos(25 * X.x1)
+        + np.sin(30 * X.x2 * X.x3)
+        + (X.x4 * 40).astype(int) % 3
+        + 0.01 * rng.normal(size=n_rows)
+    )
+    return X, y
+
+
+def _time(model, X, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    X, y = _data(60_000, 0)
+    X_test, _ = _data(n_rows, 1)
+
+    # a single ruleset is limited by the data, so committees make up the rest
+    for params in [{"n_rules": 100}, {"n_committees": 2}, {"n_committees": 8}]:
+        model = Cubist(**params).fit(X, y)
+        n_rules = model.model_.count("conds=")
+        elapsed = _time(model, X_test)
+        print(
+            f"{n_rules:5d} rules in {model.n_committees_used_} committees: "
+            f"{elapsed:6.3f} s for {n_rows} cases "
+            f"({elapsed / n_rows * 1e6:.2f} us per case)"
+        )
+
+
+if __name__ == "__main__":
+    main()
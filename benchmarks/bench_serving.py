@@ -0,0 +1,78 @@
+"""Throughput and latency of scoring single cases from concurrent coroutines,
+driven by a local load generator at several levels of concurrency.
+
+Each coroutine scores cases one after another, so the concurrency is the
+number of requests in flight. The cases are scored with `Cubist.predict`
+on one-row DataFrames, with `Cubist.predict_one`, both run in the default
+executor for each request, and with `cubist.serving.MicroBatcher`.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_serving.py [n_requests]
+"""
+
+import asyncio
+import sys
+import time
+
+import numpy as np
+from sklearn.datasets import load_diabetes
+
+from cubist import Cubist
+from cubist.serving import MicroBatcher
+
+
+async def _load(score, rows, concurrency):
+    """Score every row from `concurrency` coroutines and return the total time
+    and the latency of each request."""
+    latencies = []
+    queue = iter(rows)
+
+    async def worker():
+        for row in queue:
+            start = time.perf_counter()
+            await score(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, np.array(latencies)
+
+
+def _report(label, elapsed, latencies):
+    latencies = latencies * 1e3
+    print(
+        f"  {label:24s} {len(latencies) / elapsed:9.0f} rows/s  "
+        f"p50 {np.percentile(latencies, 50):7.2f} ms  "
+        f"p99 {np.percentile(latencies, 99):7.2f} ms"
+    )
+
+
+async def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    X, y = load_diabetes(return_X_y=True, as_frame=True)
+    X["cat"] = np.where(X.bmi > 0, "a", "b")
+    model = Cubist(n_committees=5).fit(X, y)
+    cases = X.sample(n_requests, replace=True, random_state=0)
+    records = cases.to_dict("records")
+    frames = [cases.iloc[[i]] for i in range(n_requests)]
+    loop = asyncio.get_running_loop()
+
+    async def predict_frame(frame):
+        return await loop.run_in_executor(None, model.predict, frame)
+
+    async def predict_one(record):
+        return await loop.run_in_executor(None, model.predict_one, record)
+
+    for concurrency in [1, 8, 64, 256]:
+        print(f"concurrency {concurrency}")
+        _report("predict per request", *await _load(predict_frame, frames, concurrency))
+        _report(
+            "predict_one per request", *await _load(predict_one, records, concurrency)
+        )
+        async with MicroBatcher(model, max_batch_size=64, max_wait_ms=2) as scorer:
+            _report("MicroBatcher", *await _load(scorer.predict, records, concurrency))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""Time to fit a model whose linear models use many features, solving their
+normal equations by Cubist's own elimination against `solver="lapack"`,
+which uses SciPy's LAPACK routines, and the error of each model on a test
+set.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_solver.py [n_features ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_regression
+from sklearn.metrics import mean_absolute_error
+
+from cubist import Cubist
+
+
+def main():
+    sizes = [int(p) for p in sys.argv[1:]] or [50, 200, 800]
+
+    for n_features in sizes:
+        # every feature is informative, with a kink in the first so that
+        # the trees have a few rules whose models use most of the features
+        n_rows = 20 * n_features
+        X, y = make_regression(n_rows + 1000, n_features, noise=1.0, random_state=0)
+        y += 50 * np.abs(X[:, 0])
+        X = pd.DataFrame(X, columns=[f"x{i}" for i in range(n_features)])
+        X_train, X_test = X[:n_rows], X[n_rows:]
+        y_train, y_test = y[:n_rows], y[n_rows:]
+
+        print(f"{n_features} features, {n_rows} rows")
+        for solver in ("elimination", "lapack"):
+            start = time.perf_counter()
+            model = Cubist(solver=solver).fit(X_train, y_train)
+            elapsed = time.perf_counter() - start
+            error = mean_absolute_error(y_test, model.predict(X_test))
+            print(
+                f"  solver={solver!r:13s} {elapsed:8.2f} s  "
+                f"{model.model_.count('conds='):4d} rules  test MAE {error:.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
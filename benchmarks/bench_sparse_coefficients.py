@@ -0,0 +1,64 @@
+"""Prediction time of a rule-based model on wide data, where each rule's
+linear model only uses a few of the attributes.
+
+The nonzero coefficients of each rule are listed when the model is loaded, so
+that a rule's linear model is evaluated without visiting every attribute. To
+measure the gain, run this once with the current build and once with a build
+of the commit before the list was added, e.g.::
+
+    python benchmarks/bench_sparse_coefficients.py
+    PYTHONPATH=/path/to/previous/build python benchmarks/bench_sparse_coefficients.py
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cubist import Cubist
+
+
+def _data(n_rows, n_features, seed):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.uniform(size=(n_rows, n_features)),
+        columns=[f"x{i}" for i in range(n_features)],
+    )
+    y = (
+        np.sin(25 * X.x0) * np.cos(25 * X.x1)
+        + 3 * X.x2
+        - 2 * X.x3
+        + 0.01 * rng.normal(size=n_rows)
+    )
+    return X, y
+
+
+def _time(model, X, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    X, y = _data(5_000, n_features, 0)
+    X_test, _ = _data(n_rows, n_features, 1)
+
+    model = Cubist(n_committees=5).fit(X, y)
+    n_rules = model.model_.count("conds=")
+    n_coeffs = model.model_.count("coeff=")
+    elapsed = _time(model, X_test)
+    print(
+        f"{n_rules} rules averaging {n_coeffs / n_rules:.1f} coefficients "
+        f"over {n_features} attributes: {elapsed:6.3f} s for {n_rows} cases "
+        f"({elapsed / n_rows * 1e6:.2f} us per case)"
+    )
+
+
+if __name__ == "__main__":
+    main()
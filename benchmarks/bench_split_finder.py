@@ -0,0 +1,44 @@
+"""Time to fit a model with the exact split finder, which sorts the values of
+the cases at each node, against `split_finder="presort"`, which sorts them
+once for each tree, and `split_finder="hist"`, which tries cuts between bins
+of the values found once before the trees are grown, and the size and error
+on a test set of each model.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_split_finder.py [n_rows ...]
+"""
+
+import sys
+import time
+
+import pandas as pd
+from sklearn.datasets import make_friedman1
+from sklearn.metrics import mean_absolute_error
+
+from cubist import Cubist
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [100_000, 1_000_000]
+
+    for n_rows in sizes:
+        X, y = make_friedman1(n_rows + 100_000, noise=1.0, random_state=0)
+        X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+        X_train, X_test = X[:n_rows], X[n_rows:]
+        y_train, y_test = y[:n_rows], y[n_rows:]
+
+        print(f"{n_rows} rows")
+        for split_finder in ("exact", "presort", "hist"):
+            start = time.perf_counter()
+            model = Cubist(split_finder=split_finder).fit(X_train, y_train)
+            elapsed = time.perf_counter() - start
+            error = mean_absolute_error(y_test, model.predict(X_test))
+            print(
+                f"  split_finder={split_finder!r:9s} {elapsed:8.2f} s  "
+                f"{model.model_.count('conds='):4d} rules  test MAE {error:.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
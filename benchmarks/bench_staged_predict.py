@@ -0,0 +1,54 @@
+"""Time to choose `n_committees` by refitting and predicting a model for
+each number of committees against fitting once with the most committees and
+using `Cubist.staged_predict`, checking that both give the same predictions.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_staged_predict.py [n_rows] [max_committees]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_friedman1
+from sklearn.metrics import mean_squared_error
+
+from cubist import Cubist
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    max_committees = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    X, y = make_friedman1(2 * n_rows, n_features=10, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    X_train, X_test, y_train, y_test = X[:n_rows], X[n_rows:], y[:n_rows], y[n_rows:]
+
+    start = time.perf_counter()
+    refit = [
+        Cubist(n_committees=k).fit(X_train, y_train).predict(X_test)
+        for k in range(1, max_committees + 1)
+    ]
+    refit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = Cubist(n_committees=max_committees).fit(X_train, y_train)
+    staged = list(model.staged_predict(X_test))
+    staged_time = time.perf_counter() - start
+
+    assert len(staged) == len(refit)
+    for a, b in zip(refit, staged):
+        assert np.array_equal(a, b), "staged predictions differ"
+    errors = [mean_squared_error(y_test, y_hat) for y_hat in staged]
+    print(
+        f"{n_rows} rows, 1..{max_committees} committees "
+        f"(best {np.argmin(errors) + 1})\n"
+        f"  refit each:     {refit_time:7.2f} s\n"
+        f"  staged_predict: {staged_time:7.2f} s  ({refit_time / staged_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
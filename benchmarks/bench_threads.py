@@ -0,0 +1,82 @@
+"""Throughput of fitting and predicting from a thread pool against doing the
+same work serially. The C engine releases the GIL, so threads should scale
+with the number of cores.
+
+Also times a composite model on a single thread, where the search for
+neighbors reads the engine's thread-local state for every instance it
+compares; run it on the commits to compare, rebuilding the extension for
+each.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_threads.py
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sklearn.datasets import make_friedman1, make_regression
+
+from cubist import Cubist
+
+
+def _time(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def _run_serial(task, n_tasks, _):
+    return [task(i) for i in range(n_tasks)]
+
+
+def _run_threaded(task, n_tasks, n_workers):
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(task, range(n_tasks)))
+
+
+def _time_composite(n_repeats=3):
+    X, y = make_friedman1(6000, n_features=20, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    fit_times, predict_times = [], []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        model = Cubist(neighbors=2).fit(X, y)
+        fit_times.append(time.perf_counter() - start)
+        predict_times.append(_time(model.predict, X))
+    print(
+        f"composite, 1 thread: fit {min(fit_times):8.3f} s  "
+        f"predict {min(predict_times):8.3f} s"
+    )
+
+
+def main():
+    X, y = make_regression(n_samples=20_000, n_features=10, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    X_train, y_train = X.iloc[:2000], y[:2000]
+    n_tasks = 8
+    n_workers = min(n_tasks, os.cpu_count() or 1)
+
+    def fit(_):
+        return Cubist(n_committees=3).fit(X_train, y_train)
+
+    model = fit(None)
+
+    def predict(_):
+        return model.predict(X)
+
+    print(f"{n_tasks} tasks, {n_workers} threads")
+    for name, task in [("fit", fit), ("predict", predict)]:
+        serial = _time(_run_serial, task, n_tasks, n_workers)
+        threaded = _time(_run_threaded, task, n_tasks, n_workers)
+        print(
+            f"{name:>8}: serial {serial:8.3f} s  threaded {threaded:8.3f} s  "
+            f"speedup {serial / threaded:5.1f}x"
+        )
+    _time_composite()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Time to grow a model from `n_committees` to twice as many committees by
+refitting it against continuing the fit with `warm_start`, and how far apart
+their predictions are.
+
+Run from the repository root after building the extension::
+
+    python benchmarks/bench_warm_start.py [n_rows] [n_committees]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_friedman1
+
+from cubist import Cubist
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_committees = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    X, y = make_friedman1(2 * n_rows, n_features=10, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    X_train, X_test, y_train = X[:n_rows], X[n_rows:], y[:n_rows]
+
+    model = Cubist(n_committees=n_committees, warm_start=True, random_state=0)
+    model.fit(X_train, y_train)
+    model.set_params(n_committees=2 * n_committees)
+
+    start = time.perf_counter()
+    refit = Cubist(n_committees=2 * n_committees, random_state=0)
+    refit.fit(X_train, y_train)
+    refit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    warm_time = time.perf_counter() - start
+
+    difference = np.abs(model.predict(X_test) - refit.predict(X_test)).max()
+    print(
+        f"{n_rows} rows, {n_committees} -> {2 * n_committees} committees\n"
+        f"  refit:      {refit_time:7.2f} s\n"
+        f"  warm_start: {warm_time:7.2f} s  ({refit_time / warm_time:.1f}x)\n"
+        f"  largest difference in test predictions {difference:.2g}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,175 @@
 cimport numpy as np
+from cpython.mem cimport PyMem_Calloc, PyMem_Free, PyMem_Malloc, PyMem_RawFree
+from cpython.unicode cimport PyUnicode_DecodeASCII
+from libc.stdint cimport int64_t
+from libc.stdio cimport snprintf
+from libc.stdlib cimport free
+from libc.string cimport memcpy
+from scipy.linalg.cython_lapack cimport dpotrf, dpotri, dpotrs
+
+import numpy
 
 np.import_array()
 
-# external declarations for cubist and predictions function from the top.c file
-cdef extern from "src/top.c":
-    void cubist(char **namesv, char **datav, int *unbiased,
+cdef extern from "src/datacols.h":
+    ctypedef struct DataColumns:
+        long NRows
+        int NCols
+        double **Values
+        int **Codes
+        char ***Levels
+        int *NLevels
+
+cdef extern from "src/lapackfuncs.h":
+    ctypedef void (*potrf_func)(char *uplo, int *n, double *a, int *lda,
+                                int *info) noexcept nogil
+    ctypedef void (*potrs_func)(char *uplo, int *n, int *nrhs, double *a,
+                                int *lda, double *b, int *ldb,
+                                int *info) noexcept nogil
+    ctypedef void (*potri_func)(char *uplo, int *n, double *a, int *lda,
+                                int *info) noexcept nogil
+    ctypedef struct LapackFunctions:
+        potrf_func potrf
+        potrs_func potrs
+        potri_func potri
+
+# external declarations for cubist and predictions function from the top.c file,
+# the engine state is thread local so these can all run without the GIL
+cdef extern from "src/top.c" nogil:
+    void cubist(char **namesv, char **datav, DataColumns *datac, int *unbiased,
                 char **compositev, int *neighbors, int *committees,
                 double *sample, int *seed, int *rules, double *extrapolation,
-                int *cv, char **modelv, char **outputv)
-    void predictions(char **casev, char **namesv, char **datav, char **modelv,
+                int *cv, double *holdout, int *nochange, int *threads,
+                int *bins, int *presort, LapackFunctions *lapack,
+                char **warmv, char **modelv, char **outputv)
+    void predictions(char **casev, DataColumns *casec, char **namesv,
+                     char **datav, DataColumns *datac, char **modelv,
                      double *predv, char **outputv)
+    ctypedef void *ModelHandle
+    ModelHandle loadmodel(char **namesv, char **datav, DataColumns *datac,
+                          char **modelv, char **indexv, unsigned int *indexn,
+                          char **outputv)
+    void predictmodel(ModelHandle H, char **casev, DataColumns *casec,
+                      double *predv, char **outputv)
+    void decisionpath(ModelHandle H, char **casev, DataColumns *casec,
+                      double *predv, double *memberv, int64_t *indptr,
+                      int **indicesv, char **outputv)
+    void saveindex(ModelHandle H, char **indexv, unsigned int *indexn,
+                   char **outputv)
+    void freemodel(ModelHandle H)
+
+
+cdef class _DataColumns:
+    """
+    Cases passed to the C library as columns of values rather than as the
+    text of a data file, so that they don't have to be formatted and parsed.
+    Continuous columns are float64 arrays with NaN for missing values and
+    discrete columns are int32 arrays of codes into a list of value names
+    with -1 for missing values.
+    """
+    cdef DataColumns cols
+    cdef readonly list columns
+    cdef readonly list levels
+
+    def __cinit__(self, columns, levels):
+        cdef const double[::1] values
+        cdef const int[::1] codes
+        cdef Py_ssize_t i, j, n_cols = len(columns)
+
+        self.columns = [
+            numpy.ascontiguousarray(
+                col, dtype=numpy.float64 if lev is None else numpy.intc
+            )
+            for col, lev in zip(columns, levels)
+        ]
+        self.levels = [None if lev is None else list(lev) for lev in levels]
+
+        self.cols.NCols = n_cols
+        self.cols.NRows = len(self.columns[0]) if n_cols else 0
+        self.cols.Values = <double **> PyMem_Calloc(n_cols, sizeof(double *))
+        self.cols.Codes = <int **> PyMem_Calloc(n_cols, sizeof(int *))
+        self.cols.Levels = <char ***> PyMem_Calloc(n_cols, sizeof(char **))
+        self.cols.NLevels = <int *> PyMem_Calloc(n_cols, sizeof(int))
+        if (self.cols.Values == NULL or self.cols.Codes == NULL
+                or self.cols.Levels == NULL or self.cols.NLevels == NULL):
+            raise MemoryError()
+
+        for i in range(n_cols):
+            if len(self.columns[i]) != self.cols.NRows:
+                raise ValueError("All columns must have the same length")
+            if self.levels[i] is None:
+                values = self.columns[i]
+                if self.cols.NRows:
+                    self.cols.Values[i] = <double *> &values[0]
+            else:
+                codes = self.columns[i]
+                if self.cols.NRows:
+                    self.cols.Codes[i] = <int *> &codes[0]
+                self.cols.NLevels[i] = len(self.levels[i])
+                self.cols.Levels[i] = <char **> PyMem_Malloc(
+                    max(self.cols.NLevels[i], 1) * sizeof(char *)
+                )
+                if self.cols.Levels[i] == NULL:
+                    raise MemoryError()
+                for j in range(self.cols.NLevels[i]):
+                    self.cols.Levels[i][j] = self.levels[i][j]
+                if self.cols.NRows and (
+                    self.columns[i].max() >= self.cols.NLevels[i]
+                ):
+                    raise ValueError("Codes must index the list of levels")
+
+    def __dealloc__(self):
+        cdef Py_ssize_t i
+        if self.cols.Levels != NULL:
+            for i in range(self.cols.NCols):
+                PyMem_Free(self.cols.Levels[i])
+        PyMem_Free(self.cols.Values)
+        PyMem_Free(self.cols.Codes)
+        PyMem_Free(self.cols.Levels)
+        PyMem_Free(self.cols.NLevels)
+
+    def __reduce__(self):
+        return (_DataColumns, (self.columns, self.levels))
+
+
+cdef DataColumns *_data_columns(data):
+    """Return the columns of `data` if it isn't the text of a data file"""
+    if isinstance(data, _DataColumns):
+        return &(<_DataColumns> data).cols
+    return NULL
+
+
+def _format_numbers(const double[::1] x):
+    """
+    Format each number to 15 significant digits as C's %.15g does, which is
+    much quicker than formatting the numbers one at a time in Python
+    """
+    cdef char buf[32]
+    cdef int n
+    cdef Py_ssize_t i
+    cdef list out = [None] * x.shape[0]
+    for i in range(x.shape[0]):
+        n = snprintf(buf, sizeof(buf), "%.15g", x[i])
+        out[i] = PyUnicode_DecodeASCII(buf, n, NULL)
+    return out
+
 
 # define the Python functions that interface with the C functions
 def _cubist(namesv_, datav_, unbiased_, compositev_, neighbors_, committees_,
-            sample_, seed_, rules_, extrapolation_, cv_, modelv_, outputv_):
+            sample_, seed_, rules_, extrapolation_, cv_, holdout_, nochange_,
+            threads_, bins_, presort_, lapack_, warmv_, modelv_, outputv_):
     """
-    Train and return Cubist model and output from C code
+    Train and return Cubist model and output from C code. The data may be
+    either text or _DataColumns. If warmv_ isn't empty, it's a model whose
+    committee members are kept and only the members after them are built.
+    The attributes at each node of the trees are evaluated by threads_
+    threads, with cuts between bins_ bins of the continuous attributes'
+    values unless bins_ is 0, and sorted once for each tree if presort_.
+    The linear models are solved with SciPy's LAPACK routines if lapack_.
     """
     cdef char *namesv = namesv_;
-    cdef char *datav = datav_;
+    cdef char *datav = NULL;
+    cdef DataColumns *datac = _data_columns(datav_)
     cdef int unbiased = unbiased_;
     cdef char *compositev = compositev_;
     cdef int neighbors = neighbors_;
@@ -28,24 +179,178 @@ def _cubist(namesv_, datav_, unbiased_, compositev_, neighbors_, committees_,
     cdef int rules = rules_;
     cdef double extrapolation = extrapolation_;
     cdef int cv = cv_;
+    cdef double holdout = holdout_;
+    cdef int nochange = nochange_;
+    cdef int threads = threads_;
+    cdef int bins = bins_;
+    cdef int presort = presort_;
+    cdef LapackFunctions lapack
+    cdef LapackFunctions *lapackp = NULL
+    cdef char *warmv = warmv_;
     cdef char *modelv = modelv_;
     cdef char *outputv = outputv_;
-    cubist(&namesv, &datav, &unbiased, &compositev, &neighbors, &committees,
-           &sample, &seed, &rules, &extrapolation, &cv, &modelv, &outputv);
-    return (modelv, outputv)
+    if datac == NULL:
+        datav = datav_
+    if lapack_:
+        lapack.potrf = dpotrf
+        lapack.potrs = dpotrs
+        lapack.potri = dpotri
+        lapackp = &lapack
+    with nogil:
+        cubist(&namesv, &datav, datac, &unbiased, &compositev, &neighbors,
+               &committees, &sample, &seed, &rules, &extrapolation, &cv,
+               &holdout, &nochange, &threads, &bins, &presort, lapackp,
+               &warmv, &modelv, &outputv)
+    model = <bytes> modelv
+    output = <bytes> outputv
+    # the model is only replaced when not cross-validating
+    if modelv != <char *> modelv_:
+        PyMem_RawFree(modelv)
+    PyMem_RawFree(outputv)
+    return (model, output)
 
 
 def _predictions(casev_, namesv_, datav_, modelv_,
                  np.ndarray[double, ndim=1, mode="c"] predv_, outputv_):
     """
-    Obtain predictions using existing Cubist model and return output if raised
+    Obtain predictions using existing Cubist model and return output if raised.
+    The cases and data may be either text or _DataColumns. The library
+    predicts with _CubistModel; this re-reads the names, model and instances
+    on every call and is only kept as the baseline of
+    benchmarks/bench_predict_latency.py.
     Reference: https://scipy-lectures.org/advanced/interfacing_with_c/interfacing_with_c.html#id13
     """
-    cdef char *casev = casev_;
+    cdef char *casev = NULL;
+    cdef DataColumns *casec = _data_columns(casev_)
     cdef char *namesv = namesv_;
-    cdef char *datav = datav_;
+    cdef char *datav = NULL;
+    cdef DataColumns *datac = _data_columns(datav_)
     cdef char *modelv = modelv_;
     cdef char *outputv = outputv_;
-    predictions(&casev, &namesv, &datav, &modelv,
-                <double*> np.PyArray_DATA(predv_), &outputv);
-    return (predv_, outputv)
+    cdef double *predv = <double*> np.PyArray_DATA(predv_)
+    if casec == NULL:
+        casev = casev_
+    if datac == NULL:
+        datav = datav_
+    with nogil:
+        predictions(&casev, casec, &namesv, &datav, datac, &modelv, predv,
+                    &outputv)
+    output = <bytes> outputv
+    PyMem_RawFree(outputv)
+    return (predv_, output)
+
+
+cdef class _CubistModel:
+    """
+    Cubist model loaded once into the C library and kept there so that
+    predictions don't re-read the names, model and instances on every call
+    """
+    cdef ModelHandle handle
+    cdef readonly bytes output
+
+    def __cinit__(self, namesv_, datav_, modelv_, indexv_=None):
+        cdef char *namesv = namesv_;
+        cdef char *datav = NULL;
+        cdef DataColumns *datac = _data_columns(datav_)
+        cdef char *modelv = modelv_;
+        cdef char *indexv = NULL;
+        cdef unsigned int indexn = 0;
+        cdef char *outputv = NULL;
+        if datac == NULL:
+            datav = datav_
+        # instances and their index from save_index, if any, are restored
+        # rather than rebuilt from the data
+        if indexv_ is not None:
+            indexv = indexv_
+            indexn = len(indexv_)
+        with nogil:
+            self.handle = loadmodel(&namesv, &datav, datac, &modelv, &indexv,
+                                    &indexn, &outputv)
+        self.output = outputv
+        PyMem_RawFree(outputv)
+
+    def __dealloc__(self):
+        if self.handle != NULL:
+            with nogil:
+                freemodel(self.handle)
+            self.handle = NULL
+
+    def save_index(self):
+        """
+        Return the instances of a composite model and their kd-tree index
+        for loading the model again, or None if it has no instances.
+        """
+        cdef char *indexv = NULL;
+        cdef unsigned int indexn = 0;
+        cdef char *outputv = NULL;
+        if self.handle == NULL:
+            return None
+        with nogil:
+            saveindex(self.handle, &indexv, &indexn, &outputv)
+        output = <bytes> outputv
+        PyMem_RawFree(outputv)
+        if indexv == NULL:
+            return None
+        index = indexv[:indexn]
+        PyMem_RawFree(indexv)
+        return index
+
+    def predict(self, casev_, np.ndarray[double, ndim=1, mode="c"] predv_):
+        """
+        Obtain predictions from the loaded model and return output if raised.
+        The cases may be either text or _DataColumns.
+        """
+        cdef char *casev = NULL;
+        cdef DataColumns *casec = _data_columns(casev_)
+        cdef char *outputv = NULL;
+        cdef double *predv = <double*> np.PyArray_DATA(predv_)
+        if self.handle == NULL:
+            return (predv_, self.output)
+        if casec == NULL:
+            casev = casev_
+        with nogil:
+            predictmodel(self.handle, &casev, casec, predv, &outputv)
+        output = <bytes> outputv
+        PyMem_RawFree(outputv)
+        return (predv_, output)
+
+    def decision_path(self, casev_, np.ndarray[double, ndim=1, mode="c"] predv_,
+                      np.ndarray[double, ndim=2, mode="c"] memberv_,
+                      np.ndarray[np.int64_t, ndim=1, mode="c"] indptr_=None):
+        """
+        Obtain predictions from the loaded model as predict does, along with
+        each committee member's predictions in memberv_ and the rules that
+        apply to each case as a compressed sparse row matrix whose row
+        pointers are written to indptr_, which must be zeros. Returns the
+        matrix's column indices, which are empty if indptr_ is None, and
+        output if raised. The cases may be either text or _DataColumns.
+        """
+        cdef char *casev = NULL;
+        cdef DataColumns *casec = _data_columns(casev_)
+        cdef char *outputv = NULL;
+        cdef int *indicesv = NULL;
+        cdef double *predv = <double*> np.PyArray_DATA(predv_)
+        cdef double *memberv = <double*> np.PyArray_DATA(memberv_)
+        cdef int64_t *indptr = NULL
+        cdef int **indicesp = NULL
+        cdef np.ndarray[int, ndim=1, mode="c"] indices
+        if self.handle == NULL:
+            return (numpy.zeros(0, dtype=numpy.intc), self.output)
+        if casec == NULL:
+            casev = casev_
+        if indptr_ is not None:
+            indptr = <int64_t*> np.PyArray_DATA(indptr_)
+            indicesp = &indicesv
+        with nogil:
+            decisionpath(self.handle, &casev, casec, predv, memberv, indptr,
+                         indicesp, &outputv)
+        output = <bytes> outputv
+        PyMem_RawFree(outputv)
+        # after an error the row pointers are only filled in so far, so
+        # indptr_ must start as zeros
+        indices = numpy.empty(indptr_[-1] if indicesv != NULL else 0,
+                              dtype=numpy.intc)
+        if indices.shape[0]:
+            memcpy(&indices[0], indicesv, indices.shape[0] * sizeof(int))
+        free(indicesv)
+        return (indices, output)
@@ -0,0 +1,79 @@
+"""Function to create the Cubist datav_ input as columns of values"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_complex_dtype, is_numeric_dtype, is_string_dtype
+
+from _cubist import _DataColumns  # noqa E0611
+
+from ._quinlan_attributes import _is_all_float_dtype, _is_all_int_dtype
+
+
+def _make_data_columns(x, y=None, w=None):
+    """
+    Converts input dataset X into columns of values that the C code reads
+    directly instead of parsing the string from `_make_data_string`.
+
+    Parameters
+    ----------
+    x : {pd.DataFrame} of shape (n_samples, n_features)
+        The input samples.
+
+    y : pd.Series
+        The predicted values.
+
+    w : ndarray of shape (n_samples,)
+        Instance weights.
+
+    Returns
+    -------
+    columns : _DataColumns or None
+        Input dataset converted to columns in the order of the names string,
+        or None if a column can only be passed as text (e.g. datetimes).
+    """
+    # the outcome comes first and is unknown for model predictions
+    if y is None:
+        y = np.full(x.shape[0], np.nan)
+    columns = [np.asarray(y, dtype=np.float64)]
+    levels = [None]
+
+    for col in x:
+        column = _column_values(x[col])
+        if column is None:
+            return None
+        columns.append(column[0])
+        levels.append(column[1])
+
+    # case weights come last
+    if w is not None:
+        columns.append(np.asarray(w, dtype=np.float64))
+        levels.append(None)
+
+    return _DataColumns(columns, levels)
+
+
+def _column_values(x: pd.Series):
+    """
+    Return a column's values and, for a discrete column, the names of the
+    values that its codes index. This follows `_get_data_format` in deciding
+    which columns are continuous and which are discrete.
+    """
+    non_na = x.dropna()
+    if is_complex_dtype(non_na):
+        raise ValueError("Complex data not supported")
+    if (
+        is_numeric_dtype(non_na)
+        or _is_all_float_dtype(non_na)
+        or _is_all_int_dtype(non_na)
+    ):
+        return x.to_numpy(dtype=np.float64, na_value=np.nan), None
+    if is_string_dtype(non_na):
+        codes, uniques = pd.factorize(x, use_na_sentinel=True)
+        # values are stripped of surrounding whitespace when they are read and
+        # "nan" is treated as missing just as in `_make_data_string`
+        names = [str(u).strip() for u in uniques]
+        codes = codes.astype(np.intc)
+        if "nan" in names:
+            codes[codes == names.index("nan")] = -1
+        return codes, [name.encode() for name in names]
+    return None
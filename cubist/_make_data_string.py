@@ -2,7 +2,9 @@
 
 import numpy as np
 import pandas as pd
-from pandas.api.types import is_numeric_dtype, is_string_dtype
+from pandas.api.types import is_complex_dtype, is_numeric_dtype, is_string_dtype
+
+from _cubist import _format_numbers  # noqa E0611
 
 from ._make_names_string import _escapes
 from ._utils import _format
@@ -29,52 +31,61 @@ def _make_data_string(x, y=None, w=None):
         Input dataset converted to a string and formatted per Cubist's
         requirements.
     """
-    # apply the escapes function to all string columns
-    for col in x:
-        if is_string_dtype(x[col]):
-            x[col] = _escapes(x[col].astype(str))
-
-    # if y is None for model predictions, set y as a column of NaN values,
-    # # which will become ?'s later
+    # if y is None for model predictions, the y column is all missing values
     if y is None:
-        y = [np.nan] * x.shape[0]
-        y = pd.Series(y)
+        columns = [["?"] * x.shape[0]]
     else:
-        y = y.copy(deep=True)
+        columns = [_encode_strings(pd.Series(y), escape=True)]
 
-    # format the y column for special charactesrs
-    y = pd.Series(_escapes(y.astype(str)))
-
-    # insert the y column as the first column of x
-    x.insert(0, "y", y)
+    # each column is converted to strings as a whole rather than cell by cell
+    for col in x:
+        columns.append(_encode_column(x[col]))
 
     # handle weights matrix (?) TODO: validate
     if w is not None:
-        # [f"w{i}" for i in range(x.shape[1])]
-        column_names = list(x.columns) + ["w"]
-        x = x.assign(w=w)
-        x.columns = column_names
-
-    # convert all columns to strings
-    for col in x:
-        if is_numeric_dtype(x[col]):
-            x[col] = x[col].apply(_format)
-        else:
-            x[col] = x[col].astype(str)
+        columns.append(_encode_numbers(np.asarray(w, dtype=np.float64)))
 
-    # remove leading whitespace from all elements
-    x = x.map(lambda a: a.lstrip())
+    # merge each row into a single string with entries separated by commas and
+    # join all row strings into a single string separated by \n's
+    return "\n".join(map(",".join, zip(*columns)))
 
-    # replace missing values with ?
-    x = x.fillna("?")
-    x = x.replace("nan", "?")
 
-    # convert dataframe to list of lists
-    x = x.to_numpy().tolist()
+def _encode_column(x: pd.Series):
+    """Convert a column of the input samples to a list of strings."""
+    if is_numeric_dtype(x):
+        if is_complex_dtype(x):
+            raise ValueError("Complex numbers not supported")
+        return _encode_numbers(x.to_numpy(dtype=np.float64, na_value=np.nan))
+    # apply the escapes function to all string columns
+    return _encode_strings(x, escape=is_string_dtype(x))
 
-    # merge each sublist into single strings with entries separated by commas
-    x = [",".join(row) for row in x]
 
-    # join all row strings into a single string separated by \n's
-    x = "\n".join(x)
-    return x
+def _encode_numbers(x: np.ndarray):
+    """
+    Format an array of numbers to the same strings as `_format`, with missing
+    values as ?.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    out = np.array(_format_numbers(x), dtype=object)
+    # %g only differs from `_format` where it switches to exponent notation
+    magnitude = np.abs(x)
+    for i in np.flatnonzero(
+        (magnitude >= 999999999999999.0) | ((magnitude < 1e-4) & (magnitude > 0))
+    ):
+        out[i] = _format(x[i])
+    out[np.isnan(x)] = "?"
+    return out.tolist()
+
+
+def _encode_strings(x: pd.Series, escape: bool):
+    """
+    Convert a column to strings with leading whitespace removed and missing
+    values as ?. Each distinct value is only escaped and cleaned once.
+    """
+    codes, uniques = pd.factorize(x.astype(str))
+    uniques = list(uniques)
+    if escape:
+        uniques = _escapes(uniques)
+    uniques = [u.lstrip() for u in uniques]
+    uniques = np.array(["?" if u == "nan" else u for u in uniques], dtype=object)
+    return uniques[codes].tolist()
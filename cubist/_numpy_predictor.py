@@ -0,0 +1,289 @@
+"""Rules-only Cubist predictions computed with NumPy from the model text
+rather than by the C library"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .exceptions import CubistError
+
+# most rule outputs held in memory at once when predicting
+_MAX_CHUNK_SIZE = 1 << 22
+
+# a property of a model line and its quoted value(s)
+_PROPERTY = re.compile(r'(\w+)=((?:"(?:[^"\\]|\\.)*",?)+)')
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+def _properties(line: str):
+    """Return the properties of a model file line as a list of name and
+    value pairs, where a value is the list of its unescaped strings."""
+    return [
+        (name, [re.sub(r"\\(.)", r"\1", v) for v in _QUOTED.findall(value)])
+        for name, value in _PROPERTY.findall(line)
+    ]
+
+
+def _names_values(names: str, n_features: int):
+    """Return the list of value names of each feature in the names string,
+    or None for continuous features."""
+    lines = [line for line in names.split("\n") if line and not line.startswith("|")]
+    # the first two lines are the target label and its type
+    values: list[list[str] | None] = []
+    for line in lines[2 : 2 + n_features]:
+        description = re.split(r"(?<!\\): ", line, maxsplit=1)[-1].strip()
+        if description == "continuous.":
+            values.append(None)
+        else:
+            values.append([v.strip() for v in description[:-1].split(",")])
+    return values
+
+
+class _NumpyPredictor:
+    """
+    A rules-only Cubist model that predicts whole columns of cases at once.
+    The rules each case satisfies are found from an index of the conditions
+    on each feature and only their linear models are evaluated. Otherwise
+    this follows what the C library does for each case: missing values are
+    replaced by the feature's mean or mode, each rule's output is clamped to
+    its limits, the outputs of the rules a case satisfies are averaged
+    within each committee and the committees' predictions are averaged.
+
+    Parameters
+    ----------
+    model : str
+        The model text from the C library.
+
+    names : str
+        The names string the model was trained with.
+
+    feature_names : list
+        The names of the features in the order of the names string.
+    """
+
+    def __init__(self, model: str, names: str, feature_names: list):
+        self.feature_names = list(feature_names)
+        self.levels = _names_values(names, len(self.feature_names))
+        column = {name: i for i, name in enumerate(self.feature_names)}
+
+        # the rules' conditions, linear models and limits
+        cond_rule, cond_col, cond_cut, cond_le = [], [], [], []
+        cond_elts: list[list[str] | None] = []
+        intercepts, lo_lims, hi_lims, members = [], [], [], []
+        coeffs: list[dict[int, float]] = []
+        never = []
+        self.means = np.zeros(len(self.feature_names), dtype=np.float32)
+        self.modes = [None] * len(self.feature_names)
+        self.n_members = 0
+        member = -1
+
+        def feature(name):
+            if name not in column:
+                raise ValueError(f"The model uses unknown feature `{name}`")
+            return column[name]
+
+        lines = model.split("\n")
+        header = {k: v[0] for k, v in _properties(lines[1])}
+        if header.get("insts", "0") != "0":
+            raise ValueError(
+                "engine='numpy' only supports rules-only models but this model "
+                "uses nearest neighbors"
+            )
+        self.global_mean = np.float32(float(header["globalmean"]))
+        extrap = np.float32(float(header["extrap"]))
+
+        for line in lines[2:]:
+            props = _properties(line)
+            if not props:
+                continue
+            key = props[0][0]
+            values = dict(props)
+
+            if key == "att" and "entries" not in values:
+                # feature statistics, the first of which is for the target
+                name = values["att"][0]
+                if name in column:
+                    if "mean" in values:
+                        self.means[column[name]] = float(values["mean"][0])
+                    if "mode" in values:
+                        self.modes[column[name]] = values["mode"][0]
+            elif "entries" in values:
+                self.n_members = int(values["entries"][0])
+            elif key == "rules":
+                # the start of the next committee member's rules
+                member += 1
+            elif key == "conds":
+                lo = np.float32(float(values["loval"][0]))
+                hi = np.float32(float(values["hival"][0]))
+                spread = np.float32(hi - lo)
+                lo_lim = np.float32(lo - extrap * spread)
+                hi_lim = np.float32(hi + extrap * spread)
+                lo_lims.append(0 if lo_lim < 0 and lo >= 0 else lo_lim)
+                hi_lims.append(0 if hi_lim > 0 and hi <= 0 else hi_lim)
+                members.append(member)
+                never.append(False)
+                intercepts.append(0.0)
+                coeffs.append({})
+            elif key == "type":
+                rule = len(members) - 1
+                node_type = values["type"][0]
+                col = feature(values["att"][0])
+                if node_type == "2" and "cut" in values:
+                    cond_rule.append(rule)
+                    cond_col.append(col)
+                    cond_cut.append(float(values["cut"][0]))
+                    cond_le.append(values["result"][0].startswith("<"))
+                    cond_elts.append(None)
+                elif node_type == "2":
+                    # a test for N/A values, which numeric columns don't have
+                    never[rule] = True
+                else:
+                    cond_rule.append(rule)
+                    cond_col.append(col)
+                    cond_cut.append(0.0)
+                    cond_le.append(False)
+                    cond_elts.append(
+                        values["val"] if node_type == "1" else values["elts"]
+                    )
+            elif key == "coeff":
+                rule = len(members) - 1
+                intercepts[rule] = float(props[0][1][0])
+                for (_, att), (_, coeff) in zip(props[1::2], props[2::2]):
+                    coeffs[rule][feature(att[0])] = float(coeff[0])
+
+        n_rules = len(members)
+        self.n_rules = n_rules
+        self.intercepts = np.array(intercepts, dtype=np.float64)
+        self.lo_lims = np.array(lo_lims, dtype=np.float32).astype(np.float64)
+        self.hi_lims = np.array(hi_lims, dtype=np.float32).astype(np.float64)
+        self.members = np.array(members, dtype=np.intp)
+
+        # the coefficients of the features used by any linear model, in the
+        # order of the features so that the outputs are summed as in C
+        self.coeff_cols = sorted({col for c in coeffs for col in c})
+        self.coeffs = np.array(
+            [[c.get(col, 0.0) for c in coeffs] for col in self.coeff_cols]
+        ).reshape(len(self.coeff_cols), n_rules)
+
+        # index the conditions by feature: each interval between a continuous
+        # feature's cuts, or each value of a discrete feature, has the set of
+        # rules whose conditions on the feature it satisfies, packed as bits
+        self.index = []
+        for col in sorted(set(cond_col)):
+            conds = [c for c in range(len(cond_col)) if cond_col[c] == col]
+            if self.levels[col] is None:
+                cuts = np.unique(np.array([cond_cut[c] for c in conds], np.float32))
+                # interval i holds the values above cuts[i - 1] up to cuts[i]
+                intervals = np.arange(len(cuts) + 1)
+                satisfies = np.ones((len(cuts) + 1, n_rules), dtype=bool)
+                for c in conds:
+                    j = np.searchsorted(cuts, np.float32(cond_cut[c]))
+                    met = intervals <= j if cond_le[c] else intervals > j
+                    satisfies[:, cond_rule[c]] &= met
+            else:
+                # the last value is for missing values that have no mode
+                cuts = None
+                known = self._known_values(col)
+                satisfies = np.ones((len(known) + 1, n_rules), dtype=bool)
+                for c in conds:
+                    # only conditions on continuous features have no values
+                    elts = cond_elts[c]
+                    assert elts is not None
+                    met = np.zeros(len(known) + 1, dtype=bool)
+                    met[[known.index(e) for e in elts if e in known]] = True
+                    satisfies[:, cond_rule[c]] &= met
+            self.index.append(
+                (col, cuts, np.packbits(satisfies, axis=1, bitorder="little"))
+            )
+        self.all_rules = np.packbits(~np.array(never, dtype=bool), bitorder="little")
+
+    def _known_values(self, col):
+        """Value names of a discrete feature, numbered as in the C library
+        where N/A is always the first value"""
+        return ["N/A"] + self.levels[col]
+
+    def _case_values(self, X: pd.DataFrame):
+        """Return the continuous features as float32 values and the discrete
+        features as value numbers, with missing values replaced. Each row of
+        the values is a feature."""
+        values = np.zeros((len(self.feature_names), X.shape[0]), dtype=np.float32)
+        codes = {}
+        for col, name in enumerate(self.feature_names):
+            x = X.iloc[:, col]
+            if self.levels[col] is None:
+                v = x.to_numpy(dtype=np.float64, na_value=np.nan).astype(np.float32)
+                v[np.isnan(v)] = self.means[col]
+                values[col] = v
+                continue
+
+            known = self._known_values(col)
+            mode = known.index(self.modes[col]) if self.modes[col] in known else -1
+            x_codes, uniques = pd.factorize(x, use_na_sentinel=True)
+            numbers = np.empty(len(uniques) + 1, dtype=np.intp)
+            numbers[-1] = mode
+            for i, u in enumerate(uniques):
+                u = str(u).strip()
+                if u in ("nan", "?"):
+                    numbers[i] = mode
+                elif u in known:
+                    numbers[i] = known.index(u)
+                else:
+                    raise CubistError(f"bad value of `{u}' for attribute `{name}'")
+            codes[col] = numbers[x_codes]
+        return values, codes
+
+    def _satisfied(self, values, codes):
+        """Return the pairs of cases and rules such that the case satisfies
+        every condition of the rule, ordered by case and then by rule"""
+        n_cases = values.shape[1]
+        rules = np.tile(self.all_rules, (n_cases, 1))
+        for col, cuts, satisfies in self.index:
+            if cuts is None:
+                rules &= satisfies[codes[col]]
+            else:
+                rules &= satisfies[np.searchsorted(cuts, values[col])]
+        # only the bytes with a rule set need to be unpacked into rules
+        case, byte = np.nonzero(rules)
+        bits = np.unpackbits(rules[case, byte][:, None], axis=1, bitorder="little")
+        pair, bit = np.nonzero(bits)
+        return case[pair], byte[pair] * 8 + bit
+
+    def predict(self, X: pd.DataFrame):
+        """Predict the cases in X, which has a column for each feature."""
+        return self._predict_values(*self._case_values(X))
+
+    def _predict_values(self, values, codes):
+        """Predict cases from the values and codes of `_case_values`."""
+        n_total = values.shape[1]
+        predictions = np.empty(n_total)
+        chunk_size = max(_MAX_CHUNK_SIZE // max(self.n_rules, 1), 1)
+
+        for start in range(0, n_total, chunk_size):
+            stop = min(start + chunk_size, n_total)
+            n_cases = stop - start
+            chunk_codes = {col: c[start:stop] for col, c in codes.items()}
+            case, rule = self._satisfied(values[:, start:stop], chunk_codes)
+
+            # the clamped output of each rule a case satisfies
+            outputs = self.intercepts[rule]
+            for col, coeffs in zip(self.coeff_cols, self.coeffs):
+                outputs += values[col, start:stop][case] * coeffs[rule]
+            np.clip(outputs, self.lo_lims[rule], self.hi_lims[rule], out=outputs)
+
+            # average the outputs of each committee member's rules, which
+            # bincount adds in the order of the rules
+            member_case = self.members[rule] * n_cases + case
+            size = self.n_members * n_cases
+            sums = np.bincount(member_case, outputs, size).reshape(-1, n_cases)
+            counts = np.bincount(member_case, minlength=size).reshape(-1, n_cases)
+            member_predictions = np.where(
+                counts > 0, sums / np.maximum(counts, 1), self.global_mean
+            ).astype(np.float32)
+
+            total = np.zeros(n_cases)
+            for member_prediction in member_predictions:
+                total += member_prediction
+            predictions[start:stop] = (total / self.n_members).astype(np.float32)
+
+        return predictions
@@ -159,8 +159,11 @@ def _parse_model(
         [{k: v for d in feat for k, v in d.items()} for feat in feature_statistics]
     )
 
-    # get the number of committees
+    # get the number of committees, which follows the sampling information
+    # if the training data was sampled
     committee_meta = _parser(model_seq.popleft())
+    if "sample" in committee_meta[0]:
+        committee_meta = _parser(model_seq.popleft())
 
     # set default committee error reduction and number of committees
     committee_error_reduction = None
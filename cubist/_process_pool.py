@@ -0,0 +1,77 @@
+"""Worker processes that predict shards of cases with their own copy of a
+fitted model, which is sent to each of them once when it starts"""
+
+import pickle
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from itertools import pairwise
+from multiprocessing import get_context
+from typing import Any
+
+import numpy as np
+
+# the model unpickled by each worker process when it starts
+_worker_model: Any = None
+
+
+def _init_worker(payload: bytes):
+    """Unpickle the model from `payload`."""
+    global _worker_model
+    _worker_model = pickle.loads(payload)
+    # each worker predicts its shard in a single thread
+    _worker_model.n_jobs = 1
+
+
+def _predict_shard(X, engine: str):
+    return _worker_model._predict_frame(X, engine)
+
+
+def _shutdown(executor):
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _ProcessPool:
+    """
+    A pool of worker processes that each hold a copy of a fitted Cubist model.
+    The pickled model, which for composite models includes the instances and
+    their index, is passed to each worker once when it starts, rather than
+    with every shard of cases, and each worker unpickles its own private copy
+    of it. The workers are kept until the pool is closed or garbage collected.
+
+    Parameters
+    ----------
+    model : Cubist
+        The fitted model to predict with.
+
+    n_workers : int
+        The number of worker processes.
+    """
+
+    def __init__(self, model, n_workers: int):
+        payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        # workers are spawned rather than forked since the parent may have
+        # threads running in the C library
+        executor = ProcessPoolExecutor(
+            n_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(payload,),
+        )
+        self.n_workers = n_workers
+        self._executor = executor
+        self._finalizer = weakref.finalize(self, _shutdown, executor)
+
+    def predict(self, X, engine: str):
+        """Predict the cases of the dataframe X in shards of rows, one per
+        worker, and return the predictions in the order of the rows."""
+        bounds = np.linspace(0, X.shape[0], self.n_workers + 1).astype(int)
+        futures = [
+            self._executor.submit(_predict_shard, X.iloc[start:stop], engine)
+            for start, stop in pairwise(bounds)
+            if stop > start
+        ]
+        return np.concatenate([future.result() for future in futures])
+
+    def close(self):
+        """Stop the workers."""
+        self._finalizer()
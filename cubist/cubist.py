@@ -1,14 +1,20 @@
 """Main Cubist estimator class"""
 
+import pickle
 import zlib
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from itertools import pairwise
 from numbers import Integral
 from warnings import warn
 
 import numpy as np
 import pandas as pd
+from joblib import effective_n_jobs
+from scipy.sparse import csr_matrix
 from sklearn.base import BaseEstimator, RegressorMixin, _fit_context
 from sklearn.utils import RegressorTags
-from sklearn.utils._param_validation import Interval, RealNotInt
+from sklearn.utils._param_validation import Interval, RealNotInt, StrOptions
 from sklearn.utils.validation import (
     _check_sample_weight,
     check_is_fitted,
@@ -16,14 +22,63 @@ from sklearn.utils.validation import (
     validate_data,
 )
 
-from _cubist import _cubist, _predictions  # noqa E0611
+from _cubist import _cubist, _CubistModel, _DataColumns  # noqa E0611
 
 from ._attribute_usage import _attribute_usage
+from ._make_data_columns import _make_data_columns
 from ._make_data_string import _make_data_string
 from ._make_names_string import _make_names_string
+from ._numpy_predictor import _names_values, _NumpyPredictor
 from ._parse_model import _parse_model
+from ._process_pool import _ProcessPool
 from .exceptions import CubistError
 
+# fewest cases worth predicting in a thread of their own
+_MIN_THREAD_CASES = 1000
+
+# bins of the values of each continuous feature with split_finder="hist"
+_HIST_BINS = 255
+
+
+def _encode_cases(X):
+    """Make the data for predicting the cases in X, as text only if it can't
+    be columns."""
+    data = _make_data_columns(X)
+    if data is None:
+        data = _make_data_string(X).encode()
+    return data
+
+
+def _predict_cases(cubist_model, X):
+    """Predict the cases in X with a loaded model and return the predictions
+    and any output."""
+    return cubist_model.predict(_encode_cases(X), np.zeros(X.shape[0]))
+
+
+def _check_engine(engine):
+    if engine not in ("c", "numpy"):
+        raise ValueError(f"engine must be 'c' or 'numpy' but got {engine!r}")
+
+
+def _check_backend(backend):
+    if backend not in ("thread", "process"):
+        raise ValueError(f"backend must be 'thread' or 'process' but got {backend!r}")
+
+
+def _iter_chunks(X, chunk_size):
+    """Yield the cases of X in chunks of at most `chunk_size` rows, where X is
+    either an array-like of cases or an iterator of them, such as a generator
+    or the reader of :func:`pandas.read_csv`."""
+    chunks = X if isinstance(X, Iterator) else [X]
+    for chunk in chunks:
+        if not hasattr(chunk, "shape"):
+            chunk = np.asarray(chunk)
+        for start in range(0, chunk.shape[0], chunk_size):
+            if hasattr(chunk, "iloc"):
+                yield chunk.iloc[start : start + chunk_size]
+            else:
+                yield chunk[start : start + chunk_size]
+
 
 class Cubist(RegressorMixin, BaseEstimator):
     """
@@ -47,6 +102,36 @@ class Cubist(RegressorMixin, BaseEstimator):
         the prediction errors of the prior constructed model. Recommended value
         is 5.
 
+    early_stopping : bool, default=False
+        Whether to stop adding committee members once they no longer reduce the
+        prediction error on held out cases. A random `validation_fraction` of
+        the training dataset is held out while the committees are built and
+        they are built until `n_iter_no_change` in a row fail to reduce the
+        committee's average absolute error on these cases. The model keeps the
+        members up to the one with the least error, so `n_committees` is the
+        most that are built, and `n_committees_used_` gives how many are kept.
+        The held out cases are still used for the nearest-neighbor corrections
+        of composite models. Only used when `n_committees` is greater than 1.
+
+    validation_fraction : float, default=0.1
+        Proportion of the training dataset held out to decide when to stop
+        adding committee members. Only used if `early_stopping` is True.
+
+    n_iter_no_change : int, default=5
+        Number of committee members in a row that must fail to reduce the
+        error on the held out cases to stop adding them. Only used if
+        `early_stopping` is True.
+
+    warm_start : bool, default=False
+        When set to True, keep the committee members of the previous call to
+        fit and only build the members added by a larger `n_committees`,
+        rather than building the whole committee again. The kept members are
+        read back from `model_` to find the target values that the new
+        members are built for, so `X` and `y` should be the same training
+        dataset as before. Since the model rounds some values, the new
+        members may differ slightly from those of a full refit. Fits with
+        `cv` always start over.
+
     neighbors : int, default=None
         Number between 1 and 9 for how many instances should be used to correct
         the rule-based prediction. If this value is set, Cubist will create a
@@ -92,6 +177,44 @@ class Cubist(RegressorMixin, BaseEstimator):
         model only produces a report for the user and doesn't save a model so
         this is only used for assessing model performance.
 
+    split_finder : {"exact", "presort", "hist"}, default="exact"
+        How the cuts on continuous features are found when growing the trees.
+        ``"exact"`` sorts the values of the cases at each node and tries a cut
+        between every pair of distinct values. ``"hist"`` divides the values
+        of each feature into up to 255 bins of about the same number of cases
+        once before the trees are grown, and only tries cuts between bins,
+        which are found without sorting. This makes finding the cuts close to
+        linear in the number of cases, at the cost of cuts that may be
+        slightly off the best ones, and pays off for large training sets. The
+        rest of a fit, such as finding the linear models and forming the
+        rules, takes as long as before. Features with no more than 255
+        distinct values have a bin for each value, so every cut is tried on
+        them and the model is the same as with ``"exact"``. ``"presort"``
+        tries the same cuts as ``"exact"``, but sorts the cases on each
+        continuous feature once for each tree and keeps them sorted as they
+        are divided among the branches, rather than sorting them again at
+        each node. The model is the same as with ``"exact"`` apart from
+        rounding, at the cost of memory for a sorted copy of the cases for
+        each continuous feature.
+
+    solver : {"elimination", "lapack"}, default="elimination"
+        How the normal equations of the linear models are solved.
+        ``"elimination"`` uses Cubist's own Gaussian elimination.
+        ``"lapack"`` uses a Cholesky factorization by the LAPACK routines
+        that SciPy provides, which is much quicker for models of many
+        features. Equations that are near singular by Cubist's test are
+        still solved by elimination, so the same features are left out of
+        the models, which are otherwise the same apart from rounding.
+
+    n_jobs : int, default=None
+        The number of threads, or processes with ``backend="process"`` in
+        :meth:`predict`, used to predict, each predicting a share of the
+        cases. ``None`` means 1 and ``-1`` means using all processors.
+        Predictions are the same whatever the number of threads. In
+        :meth:`fit`, the number of threads that share the evaluation of
+        the candidate splits at each node of the trees with enough cases.
+        The model is the same whatever the number of threads.
+
     random_state : int, default=None
         An integer to set the random seed for Cubist to enable repeatable
         cross-validation and sampling.
@@ -154,7 +277,8 @@ class Cubist(RegressorMixin, BaseEstimator):
         .. versionadded:: 1.0.0
 
     n_committees_used_ : int
-        Number of committees actually used in the model.
+        Number of committees actually used in the model, which is less than
+        `n_committees` when `early_stopping` stopped adding them.
 
         .. versionadded:: 1.0.0
 
@@ -196,12 +320,19 @@ class Cubist(RegressorMixin, BaseEstimator):
     _parameter_constraints: dict = {
         "n_rules": [Interval(Integral, 1, 1000000, closed="both")],
         "n_committees": [Interval(Integral, 1, 100, closed="both")],
+        "early_stopping": ["boolean"],
+        "validation_fraction": [Interval(RealNotInt, 0.0, 1.0, closed="neither")],
+        "n_iter_no_change": [Interval(Integral, 1, None, closed="left")],
+        "warm_start": ["boolean"],
         "neighbors": [Interval(Integral, 1, 9, closed="both"), None],
         "unbiased": ["boolean"],
         "auto": ["boolean"],
         "extrapolation": [Interval(RealNotInt, 0.0, 1.0, closed="both")],
         "sample": [Interval(RealNotInt, 0.0, 1.0, closed="neither"), None],
         "cv": [Interval(Integral, 1, None, closed="neither"), None],
+        "split_finder": [StrOptions({"exact", "presort", "hist"})],
+        "solver": [StrOptions({"elimination", "lapack"})],
+        "n_jobs": [Integral, None],
         "random_state": ["random_state"],
         "target_label": [str],
         "verbose": ["verbose"],
@@ -221,12 +352,19 @@ class Cubist(RegressorMixin, BaseEstimator):
         n_rules: int = 500,
         *,
         n_committees: int = 1,
+        early_stopping: bool = False,
+        validation_fraction: float = 0.1,
+        n_iter_no_change: int = 5,
+        warm_start: bool = False,
         neighbors: int | None = None,
         unbiased: bool = False,
         auto: bool = False,
         extrapolation: float = 0.05,
         sample: float | None = None,
         cv: int | None = None,
+        split_finder: str = "exact",
+        solver: str = "elimination",
+        n_jobs: int | None = None,
         random_state: int | None = None,
         target_label: str = "outcome",
         verbose: int = 0,
@@ -235,12 +373,19 @@ class Cubist(RegressorMixin, BaseEstimator):
 
         self.n_rules = n_rules
         self.n_committees = n_committees
+        self.early_stopping = early_stopping
+        self.validation_fraction = validation_fraction
+        self.n_iter_no_change = n_iter_no_change
+        self.warm_start = warm_start
         self.neighbors = neighbors
         self.unbiased = unbiased
         self.auto = auto
         self.extrapolation = extrapolation
         self.sample = sample
         self.cv = cv
+        self.split_finder = split_finder
+        self.solver = solver
+        self.n_jobs = n_jobs
         self.random_state = random_state
         self.target_label = target_label
         self.verbose = verbose
@@ -285,6 +430,29 @@ class Cubist(RegressorMixin, BaseEstimator):
             )
         return self.sample
 
+    def _check_validation_fraction(self):
+        # default value must be 0 if not stopping early
+        if not self.early_stopping:
+            return 0
+        return self.validation_fraction
+
+    def _check_warm_start(self):
+        # the model whose committee members are kept, if warm starting from
+        # a fitted model that wasn't cross-validated
+        if (
+            not self.warm_start
+            or self.cv is not None
+            or getattr(self, "model_", "1") == "1"
+        ):
+            return b""
+        if self.n_committees < self.n_committees_used_:
+            raise ValueError(
+                f"n_committees={self.n_committees} must be at least "
+                f"n_committees_used_={self.n_committees_used_} when "
+                "warm_start=True."
+            )
+        return self.model_.encode()
+
     def _check_cv(self):
         # default value must be 0 if not used
         if self.cv is None:
@@ -313,6 +481,10 @@ class Cubist(RegressorMixin, BaseEstimator):
         self : object
             Fitted estimator.
         """
+        # the committee members kept from the fitted model when warm starting
+        warm_model = self._check_warm_start()
+        n_features_warm = self.n_features_in_ if warm_model else None
+
         # scikit-learn data validation
         X, y = validate_data(
             self,
@@ -325,6 +497,12 @@ class Cubist(RegressorMixin, BaseEstimator):
             reset=True,
         )
 
+        if warm_model and X.shape[1] != n_features_warm:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model being warm started "
+                f"was fitted with {n_features_warm} features."
+            )
+
         # set the feature names if it hasn't already been done
         if not hasattr(self, "feature_names_in_"):
             self.feature_names_in_ = [f"var{i}" for i in range(X.shape[1])]  # noqa W0201
@@ -347,7 +525,13 @@ class Cubist(RegressorMixin, BaseEstimator):
         composite = self._check_composite(neighbors)
         sample = self._check_sample(X.shape[0])
         cv = self._check_cv()
+        validation_fraction = self._check_validation_fraction()
         random_state = check_random_state(self.random_state)
+        seed = random_state.randint(0, 4095) % 4096
+        # a warm start samples and holds out the same cases as the fit it
+        # continues from
+        if warm_model:
+            seed = getattr(self, "_seed", seed)
 
         # number of input features
         self.n_features_in_ = X.shape[1]  # noqa W0201
@@ -358,23 +542,33 @@ class Cubist(RegressorMixin, BaseEstimator):
         X = pd.DataFrame(X, columns=self.feature_names_in_)
         y = pd.Series(y)
 
-        # create the names and data strings required for cubist
+        # create the names string and data required for cubist, passing the
+        # data as columns of values unless it can only be passed as text
         names_string = _make_names_string(X, w=sample_weight, label=self.target_label)
-        data_string = _make_data_string(X, y, w=sample_weight)
+        data = _make_data_columns(X, y, w=sample_weight)
+        if data is None:
+            data = _make_data_string(X, y, w=sample_weight).encode()
 
         # call the C implementation of cubist
         model, output = _cubist(
             namesv_=names_string.encode(),
-            datav_=data_string.encode(),
+            datav_=data,
             unbiased_=self.unbiased,
             compositev_=composite.encode(),
             neighbors_=neighbors,
             committees_=self.n_committees,
             sample_=sample,
-            seed_=random_state.randint(0, 4095) % 4096,
+            seed_=seed,
             rules_=self.n_rules,
             extrapolation_=self.extrapolation,
             cv_=cv,
+            holdout_=validation_fraction,
+            nochange_=self.n_iter_no_change,
+            threads_=effective_n_jobs(self.n_jobs),
+            bins_=_HIST_BINS if self.split_finder == "hist" else 0,
+            presort_=self.split_finder == "presort",
+            lapack_=self.solver == "lapack",
+            warmv_=warm_model,
             modelv_=b"1",
             outputv_=b"1",
         )
@@ -412,17 +606,27 @@ class Cubist(RegressorMixin, BaseEstimator):
                 + self.model_[self.model_.index("entries") :]
             )
 
-        # when a composite model has not been used, drop the data_string
+        # when a composite model has not been used, drop the data
         if not (
             (composite == "yes")
             or ("nearest neighbors" in self.output_)
             or (neighbors > 0)
         ):
-            data_string = "1"
+            data = b"1"
 
-        # compress and save descriptors/data
+        # keep the seed for continuing the fit with a warm start
+        self._seed = seed  # noqa W0201
+
+        # compress and save descriptors/data, pickling columns to compress them
         self._names_string = zlib.compress(names_string.encode())  # noqa W0201
-        self._data_string = zlib.compress(data_string.encode())  # noqa W0201
+        if isinstance(data, bytes):
+            self._data_string = zlib.compress(data)  # noqa W0201
+            self._data_columns = None  # noqa W0201
+        else:
+            self._data_string = zlib.compress(b"1")  # noqa W0201
+            self._data_columns = zlib.compress(  # noqa W0201
+                pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            )
 
         # parse model contents and store useful information
         (  # noqa W0201
@@ -442,9 +646,111 @@ class Cubist(RegressorMixin, BaseEstimator):
             self.output_, list(self.feature_names_in_)
         )
 
+        # load the model into the C library once for all later predictions
+        self._instance_index = None  # noqa W0201
+        self._cubist_model = self._load_model(data=data)  # noqa W0201
+        self._numpy_predictor = None  # noqa W0201
+        self._discrete = None  # noqa W0201
+        self._close_thread_pool()
+        self._close_process_pool()
+
         return self
 
-    def predict(self, X):
+    def _load_model(self, data=None):
+        """Load the fitted model into the C library so it can be reused
+        across predictions. The instances and kd-tree of a composite model
+        are restored from the index it was pickled with, if any, instead of
+        being rebuilt from the training data, which is decompressed unless
+        `data` is given."""
+        if data is None:
+            # models pickled before data was passed as columns only have text
+            if getattr(self, "_data_columns", None) is None:
+                data = zlib.decompress(self._data_string)
+            else:
+                data = pickle.loads(zlib.decompress(self._data_columns))
+
+        index = getattr(self, "_instance_index", None)
+        cubist_model = _CubistModel(
+            zlib.decompress(self._names_string), data, self.model_.encode(), index
+        )
+
+        # raise Cubist model loading errors
+        if output := cubist_model.output.decode():
+            if "***" in output or "Error" in output:
+                if index is not None and data == b"1":
+                    raise CubistError(
+                        "The instances of this composite model, which were "
+                        "pickled in place of its training data, can't be "
+                        "restored on this machine"
+                    )
+                raise CubistError(output)
+
+        return cubist_model
+
+    def clear_cache(self):
+        """Release the fitted model loaded in the C library.
+
+        The model, and for composite models the training instances and their
+        index, are kept loaded between predictions. Clearing them frees that
+        memory and the model is loaded again by the next prediction.
+
+        Returns
+        -------
+        self : object
+            The estimator with its loaded model released.
+        """
+        if hasattr(self, "_cubist_model"):
+            self._cubist_model = None  # noqa W0201
+        if hasattr(self, "_numpy_predictor"):
+            self._numpy_predictor = None  # noqa W0201
+        self._close_thread_pool()
+        self._close_process_pool()
+        return self
+
+    def _close_thread_pool(self):
+        """Stop the threads that predict shares of the cases."""
+        if getattr(self, "_thread_pool", None) is not None:
+            self._thread_pool[1].shutdown(wait=False)
+            self._thread_pool = None  # noqa W0201
+
+    def _close_process_pool(self):
+        """Stop the worker processes of the `backend="process"` pool."""
+        if getattr(self, "_process_pool", None) is not None:
+            self._process_pool.close()
+            self._process_pool = None  # noqa W0201
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # the loaded C model can't be pickled so it's rebuilt when unpickling,
+        # but the instances and kd-tree of a composite model are saved with it
+        # so that they don't have to be built again
+        if "_cubist_model" in state:
+            cubist_model = state["_cubist_model"]
+            state = {k: v for k, v in state.items() if k != "_cubist_model"}
+            if cubist_model is not None:
+                state["_instance_index"] = cubist_model.save_index()
+        # the saved instances stand in for the training data, which is left
+        # out rather than pickled a second time
+        if state.get("_instance_index") is not None:
+            state = {
+                **state,
+                "_data_string": zlib.compress(b"1"),
+                "_data_columns": None,
+            }
+        # the NumPy predictor is rebuilt from the model when it's next used
+        # and threads and worker processes aren't shared with copies of the
+        # model
+        state.pop("_numpy_predictor", None)
+        state.pop("_thread_pool", None)
+        state.pop("_process_pool", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if "_names_string" in state:
+            self._cubist_model = self._load_model()  # noqa W0201
+
+    def predict(self, X, engine="c", backend="thread"):
         """Predict Cubist regression target for X.
 
         Parameters
@@ -453,6 +759,21 @@ class Cubist(RegressorMixin, BaseEstimator):
             The input samples. Must have complete column names or none
             provided at all (NumPy arrays will be given names by column index).
 
+        engine : {"c", "numpy"}, default="c"
+            Whether the cases are predicted by the Cubist C library or, for
+            rules-only models, by evaluating the rules over whole columns
+            with NumPy. The NumPy engine skips passing the cases to the C
+            library and is quicker for large batches, its predictions
+            matching the C library's to float precision.
+
+        backend : {"thread", "process"}, default="thread"
+            Whether shares of the cases are predicted by ``n_jobs`` threads or
+            by ``n_jobs`` worker processes. The worker processes are started
+            by the first prediction with a copy of the model each and kept
+            for later predictions until :meth:`clear_cache` or :meth:`fit`.
+            The cases are validated here before either; the processes
+            share out encoding them for the C library and predicting.
+
         Returns
         -------
         y : ndarray of shape (n_samples,)
@@ -461,7 +782,73 @@ class Cubist(RegressorMixin, BaseEstimator):
         # make sure the model has been fitted
         check_is_fitted(self)
 
-        # validate input data
+        X = self._cases_frame(X)
+        _check_engine(engine)
+        _check_backend(backend)
+
+        n_jobs = min(
+            effective_n_jobs(self.n_jobs), max(X.shape[0] // _MIN_THREAD_CASES, 1)
+        )
+        if backend == "process" and n_jobs > 1:
+            return self._get_process_pool().predict(X, engine)
+        return self._predict_frame(X, engine, n_jobs)
+
+    def _get_thread_pool(self):
+        """Return the threads that predict shares of the cases, starting
+        them if they haven't been already. The same threads are used by later
+        predictions rather than new ones, each of which would set up the
+        C library's state for its thread again."""
+        n_workers = effective_n_jobs(self.n_jobs)
+        pool = getattr(self, "_thread_pool", None)
+        if pool is None or pool[0] != n_workers:
+            self._close_thread_pool()
+            pool = (n_workers, ThreadPoolExecutor(n_workers))
+            self._thread_pool = pool  # noqa W0201
+        return pool[1]
+
+    def _get_process_pool(self):
+        """Return the worker processes for `backend="process"`, starting
+        them if they haven't been already."""
+        n_workers = effective_n_jobs(self.n_jobs)
+        pool = getattr(self, "_process_pool", None)
+        if pool is None or pool.n_workers != n_workers:
+            self._close_process_pool()
+            pool = self._process_pool = _ProcessPool(self, n_workers)  # noqa W0201
+        return pool
+
+    def _predict_frame(self, X, engine, n_threads=1):
+        """Predict the cases in the dataframe from `_cases_frame`, in
+        `n_threads` shares of them."""
+        if engine == "numpy":
+            return self._numpy_model().predict(X)
+
+        # get cubist predictions from the loaded model
+        cubist_model = self._loaded_model()
+
+        # the C library releases the GIL and keeps its state per thread, so
+        # shares of the cases can be predicted by the loaded model at once
+        if n_threads > 1:
+            bounds = np.linspace(0, X.shape[0], n_threads + 1).astype(int)
+            results = list(
+                self._get_thread_pool().map(
+                    lambda b: _predict_cases(cubist_model, X.iloc[b[0] : b[1]]),
+                    pairwise(bounds),
+                )
+            )
+        else:
+            results = [_predict_cases(cubist_model, X)]
+
+        # decode output
+        for _, output in results:
+            self._check_predict_output(output)
+
+        y_hat = np.concatenate([y_hat for y_hat, _ in results])
+
+        return y_hat
+
+    def _cases_frame(self, X):
+        """Validate the cases in X and return them as a dataframe with the
+        columns the C library expects."""
         X = validate_data(
             self, X, dtype=None, ensure_all_finite="allow-nan", reset=False
         )
@@ -473,21 +860,238 @@ class Cubist(RegressorMixin, BaseEstimator):
         # a column of weights in the new data but the values will be ignored.
         if self.is_sample_weighted_:
             X["case_weight_pred"] = np.nan
+        return X
+
+    def _loaded_model(self):
+        """Return the model loaded in the C library, loading it again if the
+        cache has been cleared."""
+        if self._cubist_model is None:
+            self._cubist_model = self._load_model()  # noqa W0201
+        return self._cubist_model
+
+    def predict_iter(self, X, chunk_size=10_000, engine="c"):
+        """Predict the cases in X a chunk at a time.
+
+        Only a few chunks are held in memory at once, so this can predict
+        more cases than fit in memory, e.g. from the chunks of a large file.
+        While a chunk is predicted, the next one is read and converted for
+        the C library in another thread.
+
+        Parameters
+        ----------
+        X : {array-like} of shape (n_samples, n_features) or iterator
+            The input samples, either as one array-like, which is split into
+            chunks, or as an iterator of array-likes, such as a generator or
+            the reader of :func:`pandas.read_csv` with ``chunksize``. Each
+            array-like must have the same columns as for :meth:`predict`.
+
+        chunk_size : int, default=10_000
+            The most cases predicted at once. Larger array-likes from X are
+            split into chunks of this size.
+
+        engine : {"c", "numpy"}, default="c"
+            The engine used for the predictions, as for :meth:`predict`.
+
+        Yields
+        ------
+        y : ndarray of shape (n_chunk_samples,)
+            The predicted values of each chunk, in the order of the cases.
+        """
+        check_is_fitted(self)
+        _check_engine(engine)
+        if not isinstance(chunk_size, Integral) or chunk_size < 1:
+            raise ValueError(
+                f"chunk_size must be a positive integer but got {chunk_size!r}"
+            )
+
+        chunks = _iter_chunks(X, chunk_size)
+        # the C library releases the GIL so that the next chunk can be
+        # prepared in a thread while the current one is predicted
+        with ThreadPoolExecutor(1) as executor:
+            prepared = executor.submit(self._prepare_chunk, chunks, engine)
+            while (chunk := prepared.result()) is not None:
+                prepared = executor.submit(self._prepare_chunk, chunks, engine)
+                yield self._predict_chunk(chunk, engine)
+
+    def _prepare_chunk(self, chunks, engine):
+        """Take the next chunk of cases and convert them to what the engine
+        predicts from, or return None once there are no more chunks."""
+        X = next(chunks, None)
+        if X is None:
+            return None
+        X = self._cases_frame(X)
+        if engine == "numpy":
+            return self._numpy_model()._case_values(X)
+        return X.shape[0], _encode_cases(X)
+
+    def _predict_chunk(self, chunk, engine):
+        """Predict a chunk of cases from `_prepare_chunk`."""
+        if engine == "numpy":
+            return self._numpy_model()._predict_values(*chunk)
+        n_rows, data = chunk
+        y_hat, output = self._loaded_model().predict(data, np.zeros(n_rows))
+        self._check_predict_output(output)
+        return y_hat
 
-        # make data string for predictions
-        data_string = _make_data_string(X)
-
-        # get cubist predictions from trained model
-        y_hat, output = _predictions(
-            data_string.encode(),
-            zlib.decompress(self._names_string),
-            zlib.decompress(self._data_string),
-            self.model_.encode(),
-            np.zeros(X.shape[0]),
-            b"1",
+    def predict_csv(
+        self, path, out_path, chunk_size=100_000, engine="c", **read_csv_kwargs
+    ):
+        """Predict the cases in a CSV file and write the predictions to
+        another, a chunk at a time.
+
+        The features are read from the columns with their names and any other
+        columns are ignored. The discrete features are read as strings so that
+        their values match those seen during :term:`fit` in every chunk.
+
+        Parameters
+        ----------
+        path : str or path-like
+            The CSV file of the cases, with a header of column names.
+
+        out_path : str or path-like
+            The CSV file written with a ``prediction`` column holding the
+            predicted value of each case.
+
+        chunk_size : int, default=100_000
+            The number of rows read and predicted at once.
+
+        engine : {"c", "numpy"}, default="c"
+            The engine used for the predictions, as for :meth:`predict`.
+
+        **read_csv_kwargs : dict
+            Other arguments for :func:`pandas.read_csv`.
+
+        Returns
+        -------
+        n_samples : int
+            The number of cases predicted.
+        """
+        check_is_fitted(self)
+        features = list(self.feature_names_in_)
+        dtype = {
+            name: str
+            for name, discrete in zip(features, self._discrete_features())
+            if discrete
+        }
+        read_csv_kwargs = {"usecols": features, "dtype": dtype, **read_csv_kwargs}
+        # the columns are put in the order of the features, which usecols
+        # doesn't do
+        chunks = (
+            chunk[features]
+            for chunk in pd.read_csv(path, chunksize=chunk_size, **read_csv_kwargs)
         )
 
-        # decode output
+        n_samples = 0
+        with open(out_path, "w", newline="") as f:
+            f.write("prediction\n")
+            for y_hat in self.predict_iter(chunks, chunk_size, engine):
+                pd.Series(y_hat).to_csv(f, header=False, index=False)
+                n_samples += len(y_hat)
+        return n_samples
+
+    def decision_path(self, X, return_committee_predictions=False):
+        """Return the rules that apply to each case in X.
+
+        The rules are found while predicting the cases in the C library, so
+        this costs little more than :meth:`predict`. Summed over the training
+        cases, the indicator gives the number of cases each rule covers.
+
+        Parameters
+        ----------
+        X : {array-like} of shape (n_samples, n_features)
+            The input samples, as for :meth:`predict`.
+
+        return_committee_predictions : bool, default=False
+            Whether to also return the prediction of each committee's rules,
+            which :meth:`predict` averages, for each case. For composite
+            models these are before the adjustment by the nearest neighbors.
+
+        Returns
+        -------
+        indicator : sparse matrix of shape (n_samples, n_rules)
+            CSR matrix whose nonzero elements show the rules that apply to
+            each case. Column ``j`` is the rule in row ``j`` of ``coeffs_``,
+            which has its committee and rule numbers.
+
+        committee_predictions : ndarray of shape (n_samples, n_committees_used_)
+            The prediction of each committee for each case. Only returned if
+            `return_committee_predictions` is True.
+        """
+        check_is_fitted(self)
+        X = self._cases_frame(X)
+        n_samples = X.shape[0]
+
+        indptr = np.zeros(n_samples + 1, dtype=np.int64)
+        committee_predictions, indices = self._committee_predictions(X, indptr)
+
+        # scipy would otherwise copy both to a common index type
+        if indptr[-1] <= np.iinfo(np.intc).max:
+            indptr = indptr.astype(np.intc)
+        else:
+            indices = indices.astype(np.int64)
+        indicator = csr_matrix(
+            (np.ones(len(indices), dtype=np.intp), indices, indptr),
+            shape=(n_samples, self.coeffs_.shape[0]),
+        )
+        if return_committee_predictions:
+            return indicator, committee_predictions
+        return indicator
+
+    def staged_predict(self, X):
+        """Return the predictions for X after each committee.
+
+        Each committee is built to correct the errors of those before it, so
+        the predictions after ``k`` committees are the same as those of the
+        model fitted with ``n_committees=k``. This allows ``n_committees`` to
+        be chosen from a single fit, and the committees' predictions are all
+        found in one pass over the cases. Composite models aren't supported
+        since the nearest neighbors adjust the prediction of every committee.
+
+        Parameters
+        ----------
+        X : {array-like} of shape (n_samples, n_features)
+            The input samples, as for :meth:`predict`.
+
+        Yields
+        ------
+        y : ndarray of shape (n_samples,)
+            The predicted values after each of the ``n_committees_used_``
+            committees, the last being the same as :meth:`predict`.
+        """
+        check_is_fitted(self)
+        if self._uses_instances():
+            raise ValueError(
+                "staged_predict isn't supported for composite models since the "
+                "nearest neighbors adjust the prediction of all committees"
+            )
+        committee_predictions, _ = self._committee_predictions(self._cases_frame(X))
+
+        # the committees' predictions are averaged as in the C library, which
+        # adds them in order as doubles and rounds the average to a float
+        total = np.zeros(committee_predictions.shape[0])
+        for k, committee in enumerate(committee_predictions.T, start=1):
+            total += committee
+            yield (total / k).astype(np.float32).astype(np.float64)
+
+    def _committee_predictions(self, X, indptr=None):
+        """Predict each committee for the cases in the dataframe from
+        `_cases_frame` and, if `indptr` is given, find the rules that apply to
+        each case, returning the column indices of their CSR matrix."""
+        committee_predictions = np.zeros((X.shape[0], self.n_committees_used_))
+        indices, output = self._loaded_model().decision_path(
+            _encode_cases(X), np.zeros(X.shape[0]), committee_predictions, indptr
+        )
+        self._check_predict_output(output)
+        return committee_predictions, indices
+
+    def _uses_instances(self):
+        """Whether the model is composite, using the nearest training cases
+        to adjust its predictions."""
+        return 'insts="1"' in self.model_.split("\n", 2)[1]
+
+    def _check_predict_output(self, output):
+        """Raise any prediction errors in the C library's output and print it
+        in verbose mode."""
         if output := output.decode():
             # raise Cubist prediction errors
             if "***" in output or "Error" in output:
@@ -497,4 +1101,101 @@ class Cubist(RegressorMixin, BaseEstimator):
             if self.verbose:
                 print(output)
 
+    def predict_one(self, x):
+        """Predict Cubist regression target for a single case.
+
+        This is for scoring one case at a time with low latency. It skips the
+        data validation and conversion of `predict` and passes the values
+        straight to the loaded model, giving the same prediction as `predict`
+        for a one-row input.
+
+        Parameters
+        ----------
+        x : dict or array-like of shape (n_features,)
+            The values of the case's features, either as a mapping from
+            feature name to value or in the order of the features seen
+            during :term:`fit`. Missing values may be None or NaN.
+
+        Returns
+        -------
+        y : float
+            The predicted value.
+        """
+        check_is_fitted(self)
+        return float(self._predict_values([self._case_values(x)])[0])
+
+    def _case_values(self, x):
+        """Return the values of a case given as a mapping or an array-like in
+        the order of the features, checking there is one for each feature."""
+        if isinstance(x, Mapping):
+            if missing := [f for f in self.feature_names_in_ if f not in x]:
+                raise ValueError(f"The case is missing the features {missing}")
+            return [x[f] for f in self.feature_names_in_]
+        values = np.asarray(x, dtype=object).ravel().tolist()
+        if len(values) != self.n_features_in_:
+            raise ValueError(
+                f"The case has {len(values)} features, but Cubist is expecting "
+                f"{self.n_features_in_} features as input."
+            )
+        return values
+
+    def _predict_values(self, rows):
+        """Predict cases given as lists of values in the order of the features,
+        passing them to the loaded model as columns without validating or
+        converting them with pandas."""
+        # the outcome is unknown and is followed by the features in the order
+        # of the names string, then any unused case weight
+        columns = [np.full(len(rows), np.nan)]
+        levels = [None]
+        for j, discrete in enumerate(self._discrete_features()):
+            values = [row[j] for row in rows]
+            if discrete:
+                # "nan" is missing, as in `_make_data_columns`
+                names = ["nan" if v is None else str(v).strip() for v in values]
+                codes = {}
+                columns.append(
+                    np.array(
+                        [
+                            -1 if n == "nan" else codes.setdefault(n, len(codes))
+                            for n in names
+                        ],
+                        dtype=np.intc,
+                    )
+                )
+                levels.append([name.encode() for name in codes])
+            else:
+                columns.append(
+                    np.array([np.nan if v is None else float(v) for v in values])
+                )
+                levels.append(None)
+        if self.is_sample_weighted_:
+            columns.append(np.full(len(rows), np.nan))
+            levels.append(None)
+
+        y_hat, output = self._loaded_model().predict(
+            _DataColumns(columns, levels), np.zeros(len(rows))
+        )
+        self._check_predict_output(output)
         return y_hat
+
+    def _discrete_features(self):
+        """Return whether each feature is discrete in the names string, which
+        is only worked out once."""
+        if getattr(self, "_discrete", None) is None:
+            names = zlib.decompress(self._names_string).decode()
+            self._discrete = [  # noqa W0201
+                levels is not None
+                for levels in _names_values(names, self.n_features_in_)
+            ]
+        return self._discrete
+
+    def _numpy_model(self):
+        """Return the model's rules parsed for the NumPy engine, which is only
+        done once."""
+        if getattr(self, "_numpy_predictor", None) is None:
+            self._numpy_predictor = _NumpyPredictor(  # noqa W0201
+                self.model_,
+                zlib.decompress(self._names_string).decode(),
+                list(self.feature_names_in_),
+            )
+        return self._numpy_predictor
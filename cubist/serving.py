@@ -0,0 +1,175 @@
+"""Asyncio micro-batching for scoring single cases with a fitted Cubist
+model"""
+
+import asyncio
+
+import pandas as pd
+from sklearn.utils.validation import check_is_fitted
+
+from .cubist import Cubist, _check_engine
+from .exceptions import CubistError
+
+# errors that may be caused by a single case of a batch, such as an unseen
+# category or a value that isn't a number, rather than by the batch as a whole
+_CASE_ERRORS = (CubistError, TypeError, ValueError)
+
+
+class MicroBatcher:
+    """Score cases one at a time from concurrent coroutines by collecting
+    them into batches predicted by a fitted Cubist model.
+
+    Each call to :meth:`predict` waits until ``max_batch_size`` cases have
+    been collected or ``max_wait_ms`` milliseconds have passed since the
+    first of them arrived. The batch is then predicted in an executor, so
+    that the event loop isn't blocked, and each caller is given its own
+    prediction. With the C engine, batches are passed to the model in the
+    same way as by :meth:`Cubist.predict_one`, skipping the validation and
+    conversion of :meth:`Cubist.predict`. If a batch fails, for example
+    because one case has an unseen category, its cases are predicted one at
+    a time so that only the callers whose cases fail get the error. Errors
+    that can't be caused by a case are given to every caller of the batch
+    at once.
+
+    Parameters
+    ----------
+    model : Cubist
+        The fitted model to predict with.
+
+    max_batch_size : int, default=64
+        The most cases predicted in one batch.
+
+    max_wait_ms : float, default=2.0
+        The longest time in milliseconds that a case waits for others to
+        join its batch.
+
+    engine : {"c", "numpy"}, default="c"
+        The engine passed to :meth:`Cubist.predict` for batches.
+
+    executor : concurrent.futures.Executor, default=None
+        The executor batches are predicted in. ``None`` uses the event loop's
+        default executor. Since the C library releases the GIL, batches can
+        be predicted in threads at the same time.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> from cubist import Cubist
+    >>> from cubist.serving import MicroBatcher
+    >>> from sklearn.datasets import load_diabetes
+    >>> X, y = load_diabetes(return_X_y=True, as_frame=True)
+    >>> model = Cubist().fit(X, y)
+    >>> async def main():
+    ...     async with MicroBatcher(model, max_batch_size=32) as scorer:
+    ...         rows = X.iloc[:100].to_dict("records")
+    ...         return await asyncio.gather(*(scorer.predict(r) for r in rows))
+    >>> predictions = asyncio.run(main())
+    """
+
+    def __init__(
+        self,
+        model: Cubist,
+        *,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        engine: str = "c",
+        executor=None,
+    ):
+        check_is_fitted(model)
+        if max_batch_size < 1:
+            raise ValueError(
+                f"max_batch_size must be at least 1 but got {max_batch_size}"
+            )
+        if max_wait_ms < 0:
+            raise ValueError(f"max_wait_ms must not be negative but got {max_wait_ms}")
+        _check_engine(engine)
+        if engine == "numpy":
+            # reject models the NumPy engine can't predict before any batch
+            model._numpy_model()
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.engine = engine
+        self.executor = executor
+        self._features = list(model.feature_names_in_)
+        self._pending: list[tuple[list, asyncio.Future]] = []
+        self._timer = None
+        self._running: set[asyncio.Task] = set()
+
+    async def predict(self, row):
+        """Predict a single case once its batch has been predicted.
+
+        Parameters
+        ----------
+        row : dict or array-like of shape (n_features,)
+            The values of the case's features, either as a mapping from
+            feature name to value or in the order of the features seen
+            during :term:`fit`.
+
+        Returns
+        -------
+        y : float
+            The predicted value.
+        """
+        values = self.model._case_values(row)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((values, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    async def aclose(self):
+        """Predict any cases still waiting and wait for all batches to
+        finish."""
+        self._flush()
+        while self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _flush(self):
+        """Start predicting the cases waiting, if there are any."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._predict_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _predict_batch(self, batch):
+        """Predict a batch in the executor and give each caller its result."""
+        loop = asyncio.get_running_loop()
+        rows = [values for values, _ in batch]
+        try:
+            y_hat = await loop.run_in_executor(self.executor, self._predict_rows, rows)
+        except Exception as error:  # noqa: BLE001
+            if len(rows) == 1 or not isinstance(error, _CASE_ERRORS):
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                return
+            # find which cases failed by predicting them one at a time
+            for values, future in batch:
+                await self._predict_batch([(values, future)])
+            return
+
+        for (_, future), prediction in zip(batch, y_hat):
+            if not future.done():
+                future.set_result(float(prediction))
+
+    def _predict_rows(self, rows):
+        """Predict the cases of a batch with the model."""
+        if self.engine == "c":
+            return self.model._predict_values(rows)
+        X = pd.DataFrame(rows, columns=self._features)
+        return self.model.predict(X, engine=self.engine)
@@ -98,10 +98,20 @@ void SingleCttee(void)
 void ConstructCttee(void)
 /*   --------------  */
 {
-  int m;
+  int m, Best = 0, NWarm = 0;
   Boolean SaveUSEINSTANCES;
-  CaseNo i;
-  double Cases, SumErr = 0, Err, FinalErr = 0;
+  RRuleSet *Warm;
+  CaseNo i, NHold = 0;
+  double Cases, SumErr = 0, Err, FinalErr = 0, *HoldSum = Nil, HoldErr,
+                BestHoldErr = 0, BestSumErr = 0;
+
+  /*  Hold out cases to stop adding members once they no longer
+      reduce the committee's error on them  */
+
+  if (HOLDOUT > 0 && MEMBERS > 1) {
+    NHold = HoldOutCases();
+    HoldSum = AllocZero(NHold, double);
+  }
 
   /*  Preserve original item order  */
 
@@ -131,11 +141,55 @@ void ConstructCttee(void)
 
   Cttee = AllocZero(MEMBERS, RRuleSet);
 
+  /*  Start from the members of a saved committee (a warm start), which
+      are only used to find the target values for the members after them  */
+
+  if (!XVAL && (Warm = GetCommitteeRules(".warm", &NWarm))) {
+    ForEach(m, 0, NWarm - 1) {
+      if (m < MEMBERS) {
+        Cttee[m] = Warm[m];
+      } else {
+        FreeRuleSet(Warm[m]);
+      }
+    }
+    Free(Warm);
+  }
+
   ForEach(m, 0, MEMBERS - 1) {
 
-    Cttee[m] = ConstructRuleSet(m);
+    if (m < NWarm) {
+      /*  As when the member was built, its errors are measured against
+          the original target values  */
+
+      ForEach(i, 0, MaxCase) { Class(Case[i]) = CVal(Case[i], ClassAtt); }
+
+      PrintMember(Cttee[m], m);
+    } else {
+      Cttee[m] = ConstructRuleSet(m);
+
+      memcpy(Case, SaveCase, (MaxCase + 1) * sizeof(DataRec)); /* restore */
+    }
+
+    if (NHold) {
+      /*  Error of the committee so far on the held out cases  */
 
-    memcpy(Case, SaveCase, (MaxCase + 1) * sizeof(DataRec)); /* restore */
+      HoldErr = 0;
+
+      ForEach(i, 0, NHold - 1) {
+        HoldSum[i] += RuleSetPrediction(Cttee[m], Case[MaxCase + 1 + i]);
+
+        HoldErr += fabs(CVal(Case[MaxCase + 1 + i], ClassAtt) -
+                        (float)(HoldSum[i] / (m + 1)));
+      }
+
+      if (!m || HoldErr < BestHoldErr) {
+        Best = m;
+        BestHoldErr = HoldErr;
+        BestSumErr = SumErr;
+      } else if (m - Best >= NOCHANGE) {
+        break;
+      }
+    }
 
     if (m < MEMBERS - 1) {
       /*  Adjust target value for next regression tree  */
@@ -157,6 +211,21 @@ void ConstructCttee(void)
   FreeUnlessNil(SaveCase);
   SaveCase = Nil;
 
+  if (NHold) {
+    /*  Keep the members up to the one with least error on the held
+        out cases  */
+
+    ForEach(m, Best + 1, MEMBERS - 1) {
+      if (Cttee[m])
+        FreeRuleSet(Cttee[m]);
+      Cttee[m] = Nil;
+    }
+    MEMBERS = Best + 1;
+    SumErr = BestSumErr;
+
+    Free(HoldSum);
+  }
+
   if (!XVAL && MEMBERS > 1) {
     /*  Calculate the error reduction achieved by committee model  */
 
@@ -174,6 +243,8 @@ void ConstructCttee(void)
     ErrReduction = FinalErr / (SumErr / (MEMBERS - 1));
   }
 
+  MaxCase += NHold; /* return any held out cases to the training cases */
+
   /*  See whether to use rulesets or rulesets with instances  */
 
   if (USEINSTANCES) {
@@ -190,11 +261,43 @@ void ConstructCttee(void)
     SaveCommittee(Cttee, ".model");
 }
 
+/*************************************************************************/
+/*                                                                       */
+/*      Move a random HOLDOUT proportion of the cases to the end of      */
+/*      Case and exclude them from the training cases                    */
+/*                                                                       */
+/*************************************************************************/
+
+CaseNo HoldOutCases(void)
+/*     ------------  */
+{
+  CaseNo i, j, NHold;
+  DataRec Hold;
+
+  NHold = rint((MaxCase + 1) * HOLDOUT);
+  NHold = Max(1, Min(NHold, MaxCase - 1));
+
+  ResetKR(KRInit); /* initialise KRandom() */
+
+  ForEach(i, 0, NHold - 1) {
+    j = (MaxCase + 1 - i) * KRandom();
+
+    Hold = Case[j];
+    Case[j] = Case[MaxCase - i];
+    Case[MaxCase - i] = Hold;
+  }
+
+  ResetKR(KRInit); /* restore KRandom() */
+
+  MaxCase -= NHold;
+
+  return NHold;
+}
+
 RRuleSet ConstructRuleSet(int ModelNo)
 /*       ----------------  */
 {
   RRuleSet RS;
-  char Msg[20];
   CaseNo i;
   RuleNo r;
   float TempMTSize;
@@ -202,12 +305,17 @@ RRuleSet ConstructRuleSet(int ModelNo)
   NotifyStage(GROUPDATA);
   Progress(-(MaxCase + 1.0));
 
+  /*  The tree is formed, and its models found and pruned, from the
+      values of the cases held in columns  */
+
+  FillColumns();
+
   FormTree(0, MaxCase, 0, &TempMT, Nil);
 
   NotifyStage(ADDMODELS);
   Progress((TempMTSize = (float)-TreeSize(TempMT)));
 
-  AddModels(0, MaxCase, TempMT, Nil);
+  AddModels(0, MaxCase, TempMT, Nil, Nil);
 
   NotifyStage(SIMPLIFYGROUPS);
   Progress(TempMTSize);
@@ -226,6 +334,19 @@ RRuleSet ConstructRuleSet(int ModelNo)
   RS = FormRules(TempMT);
   ForEach(r, 1, RS->SNRules) { RS->SRule[r]->MNo = ModelNo; }
 
+  PrintMember(RS, ModelNo);
+
+  FreeTree(TempMT);
+  TempMT = Nil;
+
+  return RS;
+}
+
+void PrintMember(RRuleSet RS, int ModelNo)
+/*   -----------  */
+{
+  char Msg[20];
+
   if (MEMBERS > 1) {
     sprintf(Msg, "Model %d:", ModelNo + 1);
   } else {
@@ -233,11 +354,6 @@ RRuleSet ConstructRuleSet(int ModelNo)
   }
 
   PrintRules(RS, Msg);
-
-  FreeTree(TempMT);
-  TempMT = Nil;
-
-  return RS;
 }
 
 /*************************************************************************/
@@ -360,8 +476,8 @@ void SampleTrainingCases(void)
 /*                                                                       */
 /*************************************************************************/
 
-CaseCount SumCases, *SumCond = 0, *SumModel = 0;
-Boolean *AttUsed = 0;
+THREAD_LOCAL CaseCount SumCases, *SumCond = 0, *SumModel = 0;
+THREAD_LOCAL Boolean *AttUsed = 0;
 
 void AttributeUsage(void)
 /*   --------------  */
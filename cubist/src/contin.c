@@ -51,19 +51,17 @@
 void EvalContinuousAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
 /*   -----------------  */
 {
-  CaseNo i, Xp, BestI, Cases, Edge, LoK, HiK;
+  CaseNo i, Xp, BestI, Cases, Edge;
   ContValue Val, LowVal, HighVal;
   double ThisGain, BestGain = 0, LoSumX = 0, LoSumXX = 0, LoSumY = 0,
-                   LoSumYY = 0, LoSumXY = 0, LoN, LoMX, LoVX, LoMY, LoVY, LoR,
-                   HiSumX = 0, HiSumXX = 0, HiSumY = 0, HiSumYY = 0,
-                   HiSumXY = 0, HiN, HiMX, HiVX, HiMY, HiVY, HiR, Wt, X, Exp2Z;
+                   LoSumYY = 0, LoSumXY = 0, HiSumX = 0, HiSumXX = 0,
+                   HiSumY = 0, HiSumYY = 0, HiSumXY = 0, Wt, X;
+  OrderRec *Order;
+  DataRec C;
+  Boolean Unknown;
 
-  /*  Lots of cryptic variable names!  Here's the key:
-      Lo = outcome 2, Hi = outcome 3
-      X = attribute value, Y = input value (i.e., target residual)
-      M = mean, V = variance
-      N = weighted number of cases, K = count
-      R = correlation coefficient  */
+  /*  Lo = outcome 2, Hi = outcome 3
+      X = attribute value, Y = input value (i.e., target residual)  */
 
   /*  Special case when very few values  */
 
@@ -77,21 +75,39 @@ void EvalContinuousAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
       GEnv.BrSumSq[2] = GEnv.BrFreq[2] = GEnv.BrSum[3] = GEnv.BrSumSq[3] =
           GEnv.BrFreq[3] = 0;
 
-  /*  Isolate N/A values and sort the rest on the attribute value.
+  /*  With binned values the cuts are found without sorting  */
+
+  if (GEnv.BinCut) {
+    EvalBinnedAtt(Node, Att, Fp, Lp);
+    return;
+  }
+
+  /*  Isolate N/A values and sort the rest on the attribute value,
+      taking the cases in order if they were sorted at the root.
       All cases are initially assigned to the high branch (outcome 3)  */
 
+  Order = (GEnv.Order ? GEnv.Order[Att] : Nil);
+
   Xp = Lp + 1;
   for (i = Lp; i >= Fp; i--) {
-    Val = Resid(Case[i]);
-    Wt = CWeight(Case[i]);
+    if (Order) {
+      C = Order[i].Case;
+      Val = Resid(C);
+      Wt = CWeight(C);
+      Unknown = NotApplic(C, Att);
+      X = Order[i].V;
+    } else {
+      Val = ColResid(i);
+      Wt = ColWeight(i);
+      Unknown = ColNotApplic(Att, i);
+      X = ColCVal(Att, i);
+    }
 
-    if (NotApplic(Case[i], Att)) {
+    if (Unknown) {
       GEnv.BrSum[1] += Wt * Val;
       GEnv.BrSumSq[1] += Wt * Val * Val;
       GEnv.BrFreq[1] += Wt;
     } else {
-      X = CVal(Case[i], Att);
-
       Xp--;
       SRec[Xp].V = X;
       SRec[Xp].T = Val;
@@ -107,7 +123,9 @@ void EvalContinuousAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
     }
   }
 
-  Cachesort(Xp, Lp);
+  if (!Order) {
+    Cachesort(Xp, Lp);
+  }
 
   /*  Try possible cuts between items i and i+1 and determine the
       gain of the split in each case  */
@@ -136,36 +154,10 @@ void EvalContinuousAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
     if (SRec[i + 1].V > SRec[i].V && i >= Xp + Edge - 1) {
       /*  Possible cut here  */
 
-      LoK = i - Xp + 1;
-      LoN = GEnv.BrFreq[2];
-      LoMX = LoSumX / LoN;
-      LoVX = LoSumXX / LoN - LoMX * LoMX;
-      LoMY = LoSumY / LoN;
-      LoVY = LoSumYY / LoN - LoMY * LoMY;
-      LoR =
-          (LoSumXY - LoSumX * LoSumY / LoN) / (LoN * sqrt(LoVX * LoVY + 1E-10));
-      Exp2Z = (LoK < 6 ? 1E38 : exp(2 * 1.96 * sqrt(1.0 / (LoK - 3))));
-      if (fabs(LoR) < (Exp2Z - 1) / (Exp2Z + 1))
-        LoR = 0;
-
-      HiK = Lp - i;
-      HiN = GEnv.BrFreq[3];
-      HiMX = HiSumX / HiN;
-      HiVX = HiSumXX / HiN - HiMX * HiMX;
-      HiMY = HiSumY / HiN;
-      HiVY = HiSumYY / HiN - HiMY * HiMY;
-      HiR =
-          (HiSumXY - HiSumX * HiSumY / HiN) / (HiN * sqrt(HiVX * HiVY + 1E-10));
-      Exp2Z = (HiK < 6 ? 1E38 : exp(2 * 1.96 * sqrt(1.0 / (HiK - 3))));
-      if (fabs(HiR) < (Exp2Z - 1) / (Exp2Z + 1))
-        HiR = 0;
-
-      /*  Record the sums of squares of the imagined residuals  */
-
-      GEnv.BrSumSq[2] = (1 - LoR * LoR) * LoN * LoVY;
-      GEnv.BrSumSq[3] = (1 - HiR * HiR) * HiN * HiVY;
-
-      if ((ThisGain = ComputeGain(Node)) > BestGain) {
+      ThisGain = CutGain(Node, i - Xp + 1, LoSumX, LoSumXX, LoSumY, LoSumYY,
+                         LoSumXY, Lp - i, HiSumX, HiSumXX, HiSumY, HiSumYY,
+                         HiSumXY);
+      if (ThisGain > BestGain) {
         BestGain = ThisGain;
         BestI = i;
       }
@@ -196,6 +188,266 @@ void EvalContinuousAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
   }
 }
 
+/*************************************************************************/
+/*                                                                  */
+/* Gain of a cut with LoK cases below it and HiK above it, given  */
+/* the weighted sums of the attribute values X and residuals Y of */
+/* each outcome.  The weights of outcomes 2 and 3 are in GEnv.BrFreq */
+/*                                                                  */
+/*************************************************************************/
+
+double CutGain(Tree Node, CaseNo LoK, double LoSumX, double LoSumXX,
+               double LoSumY, double LoSumYY, double LoSumXY, CaseNo HiK,
+               double HiSumX, double HiSumXX, double HiSumY, double HiSumYY,
+               double HiSumXY)
+/*     -------  */
+{
+  double LoN, LoMX, LoVX, LoMY, LoVY, LoR, HiN, HiMX, HiVX, HiMY, HiVY, HiR,
+      Exp2Z;
+
+  /*  Lots of cryptic variable names!  Here's the key:
+      Lo = outcome 2, Hi = outcome 3
+      X = attribute value, Y = input value (i.e., target residual)
+      M = mean, V = variance
+      N = weighted number of cases, K = count
+      R = correlation coefficient  */
+
+  LoN = GEnv.BrFreq[2];
+  LoMX = LoSumX / LoN;
+  LoVX = LoSumXX / LoN - LoMX * LoMX;
+  LoMY = LoSumY / LoN;
+  LoVY = LoSumYY / LoN - LoMY * LoMY;
+  LoR = (LoSumXY - LoSumX * LoSumY / LoN) / (LoN * sqrt(LoVX * LoVY + 1E-10));
+  Exp2Z = (LoK < 6 ? 1E38 : exp(2 * 1.96 * sqrt(1.0 / (LoK - 3))));
+  if (fabs(LoR) < (Exp2Z - 1) / (Exp2Z + 1))
+    LoR = 0;
+
+  HiN = GEnv.BrFreq[3];
+  HiMX = HiSumX / HiN;
+  HiVX = HiSumXX / HiN - HiMX * HiMX;
+  HiMY = HiSumY / HiN;
+  HiVY = HiSumYY / HiN - HiMY * HiMY;
+  HiR = (HiSumXY - HiSumX * HiSumY / HiN) / (HiN * sqrt(HiVX * HiVY + 1E-10));
+  Exp2Z = (HiK < 6 ? 1E38 : exp(2 * 1.96 * sqrt(1.0 / (HiK - 3))));
+  if (fabs(HiR) < (Exp2Z - 1) / (Exp2Z + 1))
+    HiR = 0;
+
+  /*  Record the sums of squares of the imagined residuals  */
+
+  GEnv.BrSumSq[2] = (1 - LoR * LoR) * LoN * LoVY;
+  GEnv.BrSumSq[3] = (1 - HiR * HiR) * HiN * HiVY;
+
+  return ComputeGain(Node);
+}
+
+/*************************************************************************/
+/*                                                                  */
+/* Find cuts that divide the values of each continuous attribute  */
+/* into at most HISTBINS bins with about the same number of cases, */
+/* or a bin for each value when there are no more values than bins. */
+/* Cuts are then only tried between bins, which are found for the  */
+/* cases at a node without sorting their values.   */
+/*                                                                  */
+/*************************************************************************/
+
+void FindBinCuts(void)
+/*   -----------  */
+{
+  Attribute Att;
+  CaseNo i, n, Distinct;
+  ContValue Cut, *Cuts;
+  int b, NCut;
+
+  if (HISTBINS < 2)
+    return;
+
+  GEnv.BinCut = AllocZero(MaxAtt + 1, ContValue *);
+  GEnv.NBinCut = AllocZero(MaxAtt + 1, int);
+
+  ForEach(Att, 1, MaxAtt) {
+    if (!Continuous(Att) || Skip(Att) || Att == ClassAtt)
+      continue;
+
+    /*  Cuts beyond the last are infinite so that a bin is always found
+        in the same number of steps  */
+
+    Cuts = GEnv.BinCut[Att] = Alloc(MAXBINS, ContValue);
+    ForEach(b, 0, MAXBINS - 1) { Cuts[b] = INFINITY; }
+
+    n = 0;
+    ForEach(i, 0, MaxCase) {
+      if (!NotApplic(Case[i], Att)) {
+        SRec[n++].V = CVal(Case[i], Att);
+      }
+    }
+
+    if (n < 2)
+      continue;
+
+    Cachesort(0, n - 1);
+
+    Distinct = 1;
+    for (i = 1; i < n && Distinct <= HISTBINS; i++) {
+      if (SRec[i].V > SRec[i - 1].V)
+        Distinct++;
+    }
+
+    NCut = 0;
+
+    if (Distinct <= HISTBINS) {
+      for (i = 1; i < n; i++) {
+        if (SRec[i].V > SRec[i - 1].V)
+          Cuts[NCut++] = SRec[i - 1].V;
+      }
+    } else {
+      ForEach(b, 1, HISTBINS - 1) {
+        Cut = SRec[(CaseNo)((double)b * n / HISTBINS) - 1].V;
+        if (Cut < SRec[n - 1].V && (!NCut || Cut > Cuts[NCut - 1])) {
+          Cuts[NCut++] = Cut;
+        }
+      }
+    }
+
+    GEnv.NBinCut[Att] = NCut;
+  }
+}
+
+/*************************************************************************/
+/*                                                                  */
+/* As EvalContinuousAtt, but with the sums of the cases at the   */
+/* node collected for each bin and cuts tried between bins   */
+/*                                                                  */
+/*************************************************************************/
+
+void EvalBinnedAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
+/*   -------------  */
+{
+  CaseNo i, Cases, Edge, LoK = 0, Known = 0, K[MAXBINS];
+  ContValue Val, LowVal, HighVal, *Cuts = GEnv.BinCut[Att], Least[MAXBINS],
+                                  Most[MAXBINS];
+  int b, BestB = None, NBin, Step;
+  double ThisGain, BestGain = 0, LoSumX = 0, LoSumXX = 0, LoSumY = 0,
+                   LoSumYY = 0, LoSumXY = 0, HiSumX = 0, HiSumXX = 0,
+                   HiSumY = 0, HiSumYY = 0, HiSumXY = 0, Wt, X, Freq[MAXBINS],
+                   SumX[MAXBINS], SumXX[MAXBINS], SumY[MAXBINS],
+                   SumYY[MAXBINS], SumXY[MAXBINS];
+
+  Cases = Lp - Fp + 1;
+  NBin = GEnv.NBinCut[Att] + 1;
+
+  ForEach(b, 0, NBin - 1) {
+    K[b] = 0;
+    Freq[b] = SumX[b] = SumXX[b] = SumY[b] = SumYY[b] = SumXY[b] = 0;
+  }
+
+  /*  Isolate N/A values and add the rest to the sums of their bins,
+      the bin of a value being the number of cuts below it  */
+
+  ForEach(i, Fp, Lp) {
+    Val = ColResid(i);
+    Wt = ColWeight(i);
+
+    if (ColNotApplic(Att, i)) {
+      GEnv.BrSum[1] += Wt * Val;
+      GEnv.BrSumSq[1] += Wt * Val * Val;
+      GEnv.BrFreq[1] += Wt;
+      continue;
+    }
+
+    X = ColCVal(Att, i);
+
+    b = 0;
+    for (Step = (MAXBINS + 1) / 2; Step; Step >>= 1) {
+      b += (Cuts[b + Step - 1] < X ? Step : 0);
+    }
+
+    if (!K[b]++) {
+      Least[b] = Most[b] = X;
+    } else if (X < Least[b]) {
+      Least[b] = X;
+    } else if (X > Most[b]) {
+      Most[b] = X;
+    }
+
+    Freq[b] += Wt;
+    SumX[b] += Wt * X;
+    SumXX[b] += Wt * X * X;
+    SumY[b] += Wt * Val;
+    SumYY[b] += Wt * Val * Val;
+    SumXY[b] += Wt * X * Val;
+  }
+
+  /*  All cases are initially assigned to the high branch (outcome 3)  */
+
+  ForEach(b, 0, NBin - 1) {
+    Known += K[b];
+    GEnv.BrFreq[3] += Freq[b];
+    HiSumX += SumX[b];
+    HiSumXX += SumXX[b];
+    HiSumY += SumY[b];
+    HiSumYY += SumYY[b];
+    HiSumXY += SumXY[b];
+  }
+
+  /*  Try possible cuts after each bin  */
+
+  Edge = (Cases >= 3 * MINITEMS ? MINITEMS : MINSPLIT);
+
+  ForEach(b, 0, NBin - 2) {
+    if (!K[b])
+      continue;
+
+    GEnv.BrFreq[2] += Freq[b];
+    GEnv.BrFreq[3] -= Freq[b];
+
+    LoSumX += SumX[b];
+    LoSumXX += SumXX[b];
+    LoSumY += SumY[b];
+    LoSumYY += SumYY[b];
+    LoSumXY += SumXY[b];
+    HiSumX -= SumX[b];
+    HiSumXX -= SumXX[b];
+    HiSumY -= SumY[b];
+    HiSumYY -= SumYY[b];
+    HiSumXY -= SumXY[b];
+
+    LoK += K[b];
+
+    if (LoK >= Edge && Known - LoK >= Edge) {
+      ThisGain = CutGain(Node, LoK, LoSumX, LoSumXX, LoSumY, LoSumYY, LoSumXY,
+                         Known - LoK, HiSumX, HiSumXX, HiSumY, HiSumYY,
+                         HiSumXY);
+      if (ThisGain > BestGain) {
+        BestGain = ThisGain;
+        BestB = b;
+      }
+    }
+  }
+
+  /*  If there is a gain, set the cut between the greatest value of the
+      best bin and the least value of the next bin with cases  */
+
+  if (BestGain > 0) {
+    GEnv.Gain[Att] = BestGain;
+
+    LowVal = Most[BestB];
+    for (b = BestB + 1; !K[b]; b++)
+      ;
+    HighVal = Least[b];
+
+    if ((GEnv.Bar[Att] = (ContValue)(0.5 * (LowVal + HighVal))) >= HighVal) {
+      GEnv.Bar[Att] = LowVal;
+    }
+
+    Verbosity(2, fprintf(Of, "Att %s\tcut=%.3f, gain %.3f\n", AttName[Att],
+                         GEnv.Bar[Att], GEnv.Gain[Att]))
+  } else {
+    GEnv.Gain[Att] = None;
+
+    Verbosity(2, fprintf(Of, "Att %s\tno gain\n", AttName[Att]))
+  }
+}
+
 /*************************************************************************/
 /*                                                                  */
 /* Change a leaf into a test on a continuous attribute             */
@@ -219,7 +471,7 @@ void ContinTest(Tree Node, Attribute Att, float Cut)
 /*                                                                  */
 /*************************************************************************/
 
-Boolean Sorted;
+THREAD_LOCAL Boolean Sorted;
 
 void AdjustAllThresholds(Tree T)
 /*   -------------------  */
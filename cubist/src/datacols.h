@@ -0,0 +1,20 @@
+#ifndef _DATACOLS_H_
+#define _DATACOLS_H_
+
+/*
+ * Cases passed as columns of values rather than as the text of a data
+ * file.  There is one column for each attribute that is not defined by
+ * a formula, in the order of the names file.  A continuous column holds
+ * values (NaN if unknown) and a discrete column holds codes into its
+ * list of value names (negative if unknown).  The columns are only read.
+ */
+typedef struct _data_columns {
+  long NRows;     /* number of cases */
+  int NCols;      /* number of columns */
+  double **Values; /* continuous columns, NULL for discrete ones */
+  int **Codes;     /* discrete columns, NULL for continuous ones */
+  char ***Levels;  /* discrete value names indexed by code */
+  int *NLevels;    /* number of discrete value names */
+} DataColumns;
+
+#endif
@@ -37,12 +37,16 @@
 #include <float.h>
 #include <limits.h>
 #include <math.h>
+#include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <time.h>
 
+#include "datacols.h"
+#include "lapackfuncs.h"
 #include "text.h"
+#include "threadlocal.h"
 
 /*************************************************************************/
 /*									 */
@@ -83,6 +87,9 @@
 /*************************************************************************/
 
 #define MINSPLIT 3     /* min branch size for initial tree */
+#define PARCASES 1000  /* min cases to evaluate atts in threads */
+#define MAXBINS 255    /* max bins of contin att values */
+#define MODELBLOCK 256 /* items whose model values are found together */
 #define MINFRACT 0.001 /* min fraction of cases covered by rule */
 
 #define MAXN 20 /* max neighbors allowing for ties */
@@ -128,6 +135,20 @@
 #define CopyBits(n, f, t) memcpy(t, f, n)
 #define SetBit(b, s) (s[(b) >> 3] |= Bit((b)&07))
 
+/*  Sets of cases held as words of 64 bits (see CaseBits)  */
+
+#define CaseWords(n) (((n) >> 6) + 1)
+#define HasCase(i, s) ((s[(i) >> 6] >> ((i)&63)) & 1)
+#define AddCase(i, s) (s[(i) >> 6] |= (CaseBits)1 << ((i)&63))
+
+/*  The number of the lowest bit set in a nonzero word  */
+
+#if defined(__GNUC__)
+#define LowBit(w) __builtin_ctzll(w)
+#else
+#define LowBit(w) CountBits(((w) & -(w)) - 1)
+#endif
+
 #define ForEach(v, f, l) for (v = f; v <= l; ++v)
 
 #define StatBit(a, b) (SpecialStatus[a] & (b))
@@ -228,6 +249,8 @@ typedef int CaseNo, /* data item number */
     DiscrValue,     /* discrete attribute value (0 = ?) */
     Attribute;      /* attribute number, 1..MaxAtt */
 
+typedef uint64_t CaseBits; /* 64 cases, case i is bit i & 63 of word i >> 6 */
+
 #ifdef USEDOUBLE
 typedef double ContValue; /* continuous attribute value */
 #define PREC 14           /* precision */
@@ -267,9 +290,31 @@ typedef union _attribute_value {
 #define PredVal(Case) Case[MaxAtt + 1]._cont_val
 #define DRef1(Case) Case[MaxAtt + 1]._cont_val
 #define DRef2(Case) Case[MaxAtt + 2]._cont_val
+#define Outcome(Case) Case[MaxAtt + 2]._discr_val
 
 #define CWeight(Case) (CWtAtt ? CVal(Case, CWtAtt) : 1.0)
 
+/*  While a tree is formed the values of the cases are also held in
+    columns, with place i holding the values of Case[i]  */
+
+#define ColCVal(Att, i) GEnv.Col[Att][i]._cont_val
+#define ColDVal(Att, i) GEnv.Col[Att][i]._discr_val
+#define ColNotApplic(Att, i) (ColDVal(Att, i) == NA)
+#define ColClass(i) ColCVal(0, i)
+#define ColResid(i) GEnv.ColResid[i]
+#define ColWeight(i) (CWtAtt ? ColCVal(CWtAtt, i) : 1.0)
+
+/*  Sums of cross-products over n atts are packed as the lower triangle
+    of xTx, row r starting at TriPlace(r, 0), followed by xTy  */
+
+#define TriPlace(r, c) ((r) * ((r) + 1) / 2 + (c))
+#define TableSize(n) (TriPlace((n) + 1, 0) + (n) + 1)
+
+typedef struct _order_rec {
+  ContValue V;  /* attribute value */
+  DataRec Case; /* case with this value */
+} OrderRec;
+
 typedef struct _env_rec {
   double *LocalModel,  /* intermediate regression model */
       *ValFreq,        /* count of items with att value v */
@@ -283,13 +328,31 @@ typedef struct _env_rec {
   ContValue *Bar;      /* best threshold for contin att */
   Boolean *Left;       /* bintrue if v is in left subset */
   Set **Subset;        /* subset s for att a */
+  Attribute *EvalAtt;  /* atts to evaluate at node */
+  int NEvalAtt;        /* number ditto */
+  ContValue **BinCut;  /* cuts between bins of contin att */
+  int *NBinCut;        /* number ditto */
+  OrderRec **Order;    /* cases sorted on contin att */
+  OrderRec *OrderTmp;  /* for partitioning ditto */
+  AttValue **Col;      /* [Att][place] values of cases */
+  AttValue *ColTmp;    /* for regrouping ditto */
+  ContValue *ColResid; /* [place] residuals of cases */
+  CaseNo *ColPlace;    /* [place] place before grouping */
+  ContValue *ModelVal; /* [a] values of model atts of an item */
+  float *ModelPred;    /* [place] values of a model */
   Attribute *ModelAtt; /* atts used in current model */
   int NModelAtt;       /* number ditto */
+  Attribute *TableAtt; /* atts whose sums are kept for a tree */
+  int NTableAtt,       /* number ditto */
+      *TableIndex;     /* [Att] place ditto */
+  double *NodeTables,  /* sums of cross-products of current node */
+      *Sums;           /* sums found by BuildTables */
 
   double **xTx,       /* [Att][Att] */
       *xTy,           /* [Att] */
       **A,            /* copy of xTx destroyed by inversion */
       *B,             /* copy of xTy ditto */
+      *Chol,          /* Cholesky factor of xTx, then xTy (LAPACK) */
       *BestModel,     /* for SimplifyModel */
       *Resid,         /* [Case] */
       *PResid,        /* [Case] */
@@ -298,7 +361,7 @@ typedef struct _env_rec {
       *AvDev;         /* [Att] */
   Boolean *ZeroCoeff, /* bintrue if coeff to be set to zero */
       *SaveZero;      /* for SimplifyModel */
-  DataRec *Filtered;  /* items minus outliers */
+  CaseNo *Filtered;   /* places of items minus outliers */
 } EnvRec, *Env;
 
 typedef struct _sort_rec {
@@ -345,6 +408,9 @@ typedef struct _rulerec {
       Size;       /* number of conditions */
   Condition *Lhs; /* conditions themselves */
   double *Rhs;    /* model given by rule */
+  int NCoeff;     /* number of nonzero coefficients in Rhs */
+  Attribute *CoeffAtt; /* attributes with nonzero coefficients */
+  double *Coeff;  /* their coefficients (Nil if model is being built) */
   CaseNo Cover;   /* number of cases covered */
   float Mean,     /* mean value of cases matching rule */
       LoVal,      /* lowest value in data */
@@ -368,11 +434,35 @@ typedef struct _oldrulerec {
       EstErr;     /* estimated error */
 } OldRuleRec;
 
+typedef struct _ruleindexrec *RuleIndex;
+
 typedef struct _rulesetrec {
-  RuleNo SNRules; /* number of rules */
-  CRule *SRule;   /* rules */
+  RuleNo SNRules;   /* number of rules */
+  CRule *SRule;     /* rules */
+  RuleIndex RIndex; /* index of conditions (if built) */
 } RuleSetRec, *RRuleSet;
 
+/*  Index of the conditions of a ruleset.  For each attribute tested by
+    the rules, the values of the attribute are divided into intervals
+    (or discrete values) and each has the set of rules whose conditions
+    on the attribute it satisfies.  A case then satisfies all the
+    conditions of the rules in the intersection of its sets  */
+
+#define MAXINDEXRULES 4095 /* largest ruleset that is indexed */
+#define MAXINDEXWORDS ((MAXINDEXRULES >> 6) + 1)
+
+typedef uint64_t RuleBits; /* 64 rules, rule r is bit r & 63 of word r >> 6 */
+
+typedef struct _ruleindexrec {
+  int NRules,          /* number of rules */
+      NAtt,            /* number of attributes tested */
+      Words;           /* words in each set of rules */
+  Attribute *Att;      /* attributes tested */
+  int *NCut;           /* thresholds of each attribute, or -1 if discrete */
+  ContValue **Cut;     /* thresholds in ascending order */
+  RuleBits **Satisfy;  /* sets of rules for each interval or value */
+} RuleIndexRec;
+
 typedef struct _indexrec *Index;
 typedef struct _indexrec {
   Attribute Tested; /* split attribute for KD-tree */
@@ -390,6 +480,21 @@ typedef struct _nnrec {
       *AttMinD;      /* min attribute distance from case */
 } NNEnvRec;
 
+/*  What a search for neighbors reads for each instance it examines,
+    copied from the thread-local globals when the search starts since
+    each read of those is a call in a shared library  */
+
+typedef struct _nnsearchrec {
+  Attribute MaxAtt, /* as the globals of the same names */
+      ClassAtt;
+  char *SpecialStatus;
+  DiscrValue *MaxAttVal;
+  ContValue *AttSD;
+  DataRec *Instance;
+  NNEnvRec *Env;     /* GNNEnv of this thread */
+  ContValue DRef[2]; /* distances of the case to the reference points */
+} NNSearchRec, *NNSearch;
+
 typedef union _def_val {
   String _s_val;    /* att val for comparison */
   ContValue _n_val; /* number for arith */
@@ -458,7 +563,9 @@ int Xmain(int, char *[]);
 
 void SingleCttee(void);
 void ConstructCttee(void);
+CaseNo HoldOutCases(void);
 RRuleSet ConstructRuleSet(int ModelNo);
+void PrintMember(RRuleSet RS, int ModelNo);
 void EvaluateCttee(RRuleSet *RS, Boolean Details);
 void SampleTrainingCases(void);
 void AttributeUsage(void);
@@ -503,6 +610,9 @@ AttValue EvaluateDef(Definition D, DataRec Case);
 void GetData(FILE *Df, Boolean Train, Boolean AllowUnknownTarget);
 Boolean ReplaceUnknowns(DataRec Case, Boolean *AttMsg);
 DataRec GetDataRec(FILE *Df, Boolean Train);
+DiscrValue FindDiscrValue(Attribute Att, String Name, Boolean Train);
+DiscrValue **MapColumnValues(DataColumns *DC, Boolean Train);
+DataRec GetColumnRec(DataColumns *DC, CaseNo Row, DiscrValue **Map);
 CaseNo CountData(FILE *Df);
 int StoreIVal(String S);
 void FreeData(DataRec *Case);
@@ -513,9 +623,15 @@ void FindLimits(Attribute Att, ContValue *Min, ContValue *Max);
 
 float PredictValue(RRuleSet *Cttee, DataRec CaseDesc);
 float RuleSetPrediction(RRuleSet RS, DataRec CaseDesc);
+float RuleSetPath(RRuleSet RS, DataRec CaseDesc, RuleNo *Fired, int *NFired);
 Boolean Matches(CRule R, DataRec Case);
+RuleIndex BuildRuleIndex(RRuleSet RS);
+Boolean FindSatisfiedRules(RuleIndex RX, DataRec Case, RuleBits *Rules);
+void FreeRuleIndex(RuleIndex RX);
 float LinModel(double *Model, DataRec Case);
 float RawLinModel(double *Model, DataRec Case);
+void ColModelValues(double *Model, CaseNo *Kept, CaseNo Fp, CaseNo Lp,
+                    Boolean Bounded);
 void FindPredictedValues(RRuleSet *RS, CaseNo Fp, CaseNo Lp);
 
 /* formtree.c */
@@ -524,13 +640,24 @@ void InitialiseEnvData(void);
 void FreeEnvData(void);
 void FindGlobalProperties(void);
 void FormTree(CaseNo, CaseNo, int, Tree *, Tree);
-void AddModels(CaseNo Fp, CaseNo Lp, Tree T, Tree Parent);
+void AddModels(CaseNo Fp, CaseNo Lp, Tree T, Tree Parent, double *Sums);
 CaseNo Group(DiscrValue, CaseNo, CaseNo, Tree);
 void Divide(Tree Node, CaseNo Fp, CaseNo Lp, int Level);
+void SortOrders(void);
+void FillColumns(void);
+void RegroupColumns(CaseNo Fp, CaseNo Lp);
+void GroupOrders(Tree TestNode, CaseNo Fp, CaseNo Lp);
 void AddSplitAtts(Tree T);
+void FindTableAtts(Tree T);
 void AddDefAtts(void);
 void FindModelAtts(double *Model);
 
+/* parallel.c */
+
+void StartEvalThreads(void);
+void StopEvalThreads(void);
+void EvalAtts(Tree Node, CaseNo Fp, CaseNo Lp);
+
 /* discr.c */
 
 void EvalDiscreteAtt(Tree, Attribute, CaseNo Fp, CaseNo Lp);
@@ -541,6 +668,12 @@ void DiscreteTest(Tree Node, Attribute Att, Set *Subset);
 /* contin.c */
 
 void EvalContinuousAtt(Tree, Attribute, CaseNo Fp, CaseNo Lp);
+double CutGain(Tree Node, CaseNo LoK, double LoSumX, double LoSumXX,
+               double LoSumY, double LoSumYY, double LoSumXY, CaseNo HiK,
+               double HiSumX, double HiSumXX, double HiSumY, double HiSumYY,
+               double HiSumXY);
+void FindBinCuts(void);
+void EvalBinnedAtt(Tree, Attribute, CaseNo Fp, CaseNo Lp);
 void ContinTest(Tree Node, Attribute Att, float Cut);
 void AdjustAllThresholds(Tree T);
 void AdjustThresholds(Tree T, Attribute Att);
@@ -549,6 +682,7 @@ ContValue GreatestValueBelow(ContValue Th);
 /* sort.c */
 
 void Cachesort(CaseNo Fp, CaseNo Lp);
+void Ordersort(OrderRec *O, CaseNo Fp, CaseNo Lp);
 
 /* trees.c */
 
@@ -583,19 +717,24 @@ float MedianResid(CaseNo Fp, CaseNo Lp, double Want);
 
 void Regress(CaseNo Fp, CaseNo Lp, double *Model);
 void BuildTables(CaseNo Fp, CaseNo Lp);
+void SumTables(CaseNo Fp, CaseNo Lp, Attribute *Att, int NAtt, double *Sums);
 void Solve(double *Model);
+Boolean FactorTables(void);
+Boolean SweepTables(void);
+Boolean UnsweepAtt(Attribute Att, double *Model);
+void SweepAtt(Attribute Att, double Sign);
 void FindActiveAtts(void);
 void AddRow(double *Model, short From, short To, double Factor);
 void ExchangeRow(double *Model, short From, short To);
 int CountCoeffs(double *Model);
-void SimplifyModel(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model);
+void SimplifyModel(CaseNo *Kept, CaseNo Fp, CaseNo Lp, double *Model);
 
 /* stats.c */
 
 double AverageDev(float Mean, CaseNo Fp, CaseNo Lp);
 double SD(double N, double Sum, double SumSq);
 double ComputeGain(Tree Node);
-double AverageErr(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model);
+double AverageErr(CaseNo *Kept, CaseNo Fp, CaseNo Lp, double *Model);
 double EstimateErr(double Val, double NData, float NParam);
 
 /* utility.c */
@@ -609,6 +748,7 @@ DataRec NewCase(void);
 void FreeCases(void);
 void FreeLastCase(DataRec Case);
 void FreeVector(void **V, int First, int Last);
+int CountBits(CaseBits W);
 double KRandom(void);
 void ResetKR(int KRInit);
 void Error(int ErrNo, String S1, String S2);
@@ -637,12 +777,10 @@ RRuleSet FormRules(Tree T);
 void TreeParameters(Tree T, int D);
 void Scan(Tree T);
 void PushCondition(void);
-void PopCondition(void);
 void PruneRule(Condition Cond[], float InitCoeffs);
 void UpdateCount(int d, CaseNo i, double *Total, double *PredErr);
 void ProcessLists(void);
-void AddToList(CaseNo *List, CaseNo N);
-void DeleteFromList(CaseNo *Before, CaseNo N);
+void CountFails(int w);
 int SingleFail(CaseNo i);
 void RemoveBias(CRule R, int Coeffs);
 void OrderRules(void);
@@ -655,6 +793,7 @@ Boolean NewRule(Condition Cond[], int NConds, Boolean *Deleted, CaseNo Cover,
                 double *Model);
 Boolean SameRule(RuleNo r, Condition Cond[], int NConds);
 void ReleaseRule(CRule R);
+void FreeRuleSet(RRuleSet RS);
 void FreeCttee(RRuleSet *Cttee);
 void PrintRules(RRuleSet, String);
 void PrintRule(CRule R);
@@ -672,9 +811,11 @@ void SaveRules(RRuleSet RS);
 void AsciiOut(String Pre, String S);
 void ReadHeader(void);
 RRuleSet *GetCommittee(String Extension);
+RRuleSet *GetCommitteeRules(String Extension, int *N);
 RRuleSet InRules(void);
 CRule InRule(void);
 Condition InCondition(void);
+void FreePropVal(void);
 int ReadProp(char *Delim);
 String RemoveQuotes(String S);
 Set MakeSubset(Attribute Att);
@@ -689,18 +830,33 @@ void Progress(float);
 void InitialiseInstances(RRuleSet *Cttee);
 void SetParameters(RRuleSet *Cttee);
 void CheckForms(RRuleSet *Cttee);
+void SetNeighborParameters(RRuleSet *Cttee);
 void CopyInstances(void);
 float NNEstimate(RRuleSet *Cttee, DataRec Case);
+void StartSearch(NNSearch S);
 float Distance(DataRec Case1, DataRec Case2, float Thresh);
-void CheckDistance(DataRec Case, CaseNo Saved);
+float CaseDistance(NNSearch S, DataRec Case1, DataRec Case2, float Thresh);
+void CheckDistance(NNSearch S, DataRec Case, CaseNo Saved);
 void FindNearestNeighbors(DataRec Case);
 float AverageNeighbors(RRuleSet *Cttee, DataRec Case);
 Index BuildIndex(CaseNo Fp, CaseNo Lp);
-void ScanIndex(DataRec Case, Index Node, float MinD);
+void ScanIndex(NNSearch S, DataRec Case, Index Node, float MinD);
 void SwapInstance(CaseNo A, CaseNo B);
 void FreeIndex(Index Node);
+void SaveInstances(FILE *F);
+void SaveIndex(Index Node, FILE *F);
+Boolean RestoreInstances(RRuleSet *Cttee, FILE *F);
+Index RestoreIndex(FILE *F, Boolean *OK);
 void FreeInstances(void);
 
+/* rsample.c */
+
+RRuleSet *LoadCommittee(void);
+void PredictCases(RRuleSet *CubistModel, double *outputv);
+void PathCases(RRuleSet *CubistModel, double *outputv, double *memberv,
+               int64_t *indptr, int **indices);
+void FreeCommittee(RRuleSet *CubistModel);
+
 /*  xval.c  */
 
 void CrossVal(void);
@@ -78,11 +78,11 @@ void EvalBinarySplit(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
   ForEach(v, 1, 3) { GEnv.BrFreq[v] = GEnv.BrSum[v] = GEnv.BrSumSq[v] = 0; }
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
-    v = DVal(Case[i], Att);
+    Wt = ColWeight(i);
+    v = ColDVal(Att, i);
 
     GEnv.BrFreq[v] += Wt;
-    GEnv.BrSum[v] += Wt * (Cv = Resid(Case[i]));
+    GEnv.BrSum[v] += Wt * (Cv = ColResid(i));
     GEnv.BrSumSq[v] += Wt * Cv * Cv;
   }
 
@@ -109,11 +109,11 @@ void EvalSubsetSplit(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
   }
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
+    Wt = ColWeight(i);
 
-    v = DVal(Case[i], Att);
+    v = ColDVal(Att, i);
     GEnv.ValFreq[v] += Wt;
-    GEnv.ValSum[v] += Wt * (Cv = Resid(Case[i]));
+    GEnv.ValSum[v] += Wt * (Cv = ColResid(i));
     GEnv.ValSumSq[v] += Wt * Cv * Cv;
   }
 
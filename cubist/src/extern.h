@@ -29,77 +29,90 @@
 /*									 */
 /*************************************************************************/
 
-extern Attribute ClassAtt, LabelAtt, CWtAtt;
+extern THREAD_LOCAL Attribute ClassAtt, LabelAtt, CWtAtt;
 
-extern char *IgnoredVals;
-extern int IValsSize, IValsOffset;
+extern THREAD_LOCAL char *IgnoredVals;
+extern THREAD_LOCAL int IValsSize, IValsOffset;
 
-extern int MaxAtt, MaxDiscrVal, Precision, MaxLabel, LineNo, ErrMsgs, AttExIn,
+extern THREAD_LOCAL int MaxAtt, MaxDiscrVal, Precision, MaxLabel, LineNo, ErrMsgs, AttExIn,
     TSBase;
 
-extern CaseNo MaxCase;
+extern THREAD_LOCAL CaseNo MaxCase;
 
-extern DataRec *Case;
+extern THREAD_LOCAL DataRec *Case;
 
-extern DataRec *SaveCase, *Blocked;
-extern CaseNo SaveMaxCase;
+extern THREAD_LOCAL DataRec *SaveCase, *Blocked;
+extern THREAD_LOCAL CaseNo SaveMaxCase;
 
-extern DiscrValue *MaxAttVal, *Modal;
+extern THREAD_LOCAL DiscrValue *MaxAttVal, *Modal;
 
-extern char *SpecialStatus;
+extern THREAD_LOCAL char *SpecialStatus;
 
-extern Definition *AttDef;
-extern Attribute **AttDefUses;
+extern THREAD_LOCAL Definition *AttDef;
+extern THREAD_LOCAL Attribute **AttDefUses;
 
-extern String *AttName, **AttValName;
+extern THREAD_LOCAL String *AttName, **AttValName;
 
-extern FILE *Of;
-extern String FileStem;
+extern THREAD_LOCAL FILE *Of;
+extern THREAD_LOCAL String FileStem;
 
-extern ContValue *AttMean, *AttSD, *AttMaxVal, *AttMinVal, *AttPref, Ceiling,
+extern THREAD_LOCAL ContValue *AttMean, *AttSD, *AttMaxVal, *AttMinVal, *AttPref, Ceiling,
     Floor, AvCWt;
 
-extern float ErrReduction;
+extern THREAD_LOCAL float ErrReduction;
 
-extern double *AttUnit;
+extern THREAD_LOCAL double *AttUnit;
 
-extern int *AttPrec;
+extern THREAD_LOCAL int *AttPrec;
 
-extern DataRec *Instance, Ref[2];
-extern CaseNo MaxInstance;
-extern Index KDTree;
-extern NNEnvRec GNNEnv;
-extern float *RSPredVal;
+extern THREAD_LOCAL DataRec *Instance, Ref[2];
+extern THREAD_LOCAL CaseNo MaxInstance;
+extern THREAD_LOCAL Index KDTree;
+extern THREAD_LOCAL NNEnvRec GNNEnv;
+extern THREAD_LOCAL float *RSPredVal;
 
-extern EnvRec GEnv;
+extern THREAD_LOCAL EnvRec GEnv;
 
-extern Tree TempMT;
+extern THREAD_LOCAL Tree TempMT;
 
-extern SortRec *SRec;
+extern THREAD_LOCAL SortRec *SRec;
 
-extern float GlobalMean, GlobalSD, GlobalErr;
+extern THREAD_LOCAL float GlobalMean, GlobalSD, GlobalErr;
 
-extern char Fn[512];
+extern THREAD_LOCAL char Fn[512];
 
-extern FILE *Mf, *Pf;
+extern THREAD_LOCAL FILE *Mf, *Pf;
 
-extern CRule *Rule;
-extern RuleNo NRules;
-extern int RuleSpace;
+extern THREAD_LOCAL CRule *Rule;
+extern THREAD_LOCAL RuleNo NRules;
+extern THREAD_LOCAL int RuleSpace;
 
-extern RRuleSet *Cttee;
+extern THREAD_LOCAL RRuleSet *Cttee;
 
-extern int VERBOSITY, FOLDS, NN, MEMBERS;
+extern THREAD_LOCAL int VERBOSITY, FOLDS, NN, MEMBERS;
 
-extern float MAXD;
+extern THREAD_LOCAL float MAXD;
 
-extern Boolean XVAL, CHOOSEMODE, USEINSTANCES, UNBIASED;
+extern THREAD_LOCAL Boolean XVAL, CHOOSEMODE, USEINSTANCES, UNBIASED;
 
-extern float SAMPLE;
-extern int KRInit;
-extern Boolean LOCK;
+extern THREAD_LOCAL float SAMPLE;
+extern THREAD_LOCAL int KRInit;
+extern THREAD_LOCAL Boolean LOCK;
 
-extern CaseCount MINITEMS;
-extern int MAXRULES;
+extern THREAD_LOCAL CaseCount MINITEMS;
+extern THREAD_LOCAL int MAXRULES;
 
-extern float EXTRAP;
+extern THREAD_LOCAL float EXTRAP;
+
+extern THREAD_LOCAL float HOLDOUT;
+extern THREAD_LOCAL int NOCHANGE;
+
+extern THREAD_LOCAL int THREADS;
+
+extern THREAD_LOCAL int HISTBINS;
+
+extern THREAD_LOCAL Boolean PRESORT;
+
+extern THREAD_LOCAL LapackFunctions *Lapack;
+
+extern THREAD_LOCAL Boolean KeepModel;
@@ -31,8 +31,11 @@
 /*   * Fail0: those cases that satisfy all undeleted conditions  */
 /*   * Fail1: those that satisfy all but one of the above   */
 /*   * FailMany: the remaining cases     */
-/* Lists are implemented via Succ; Succ[i] is the number of the  */
-/* case that follows case i.      */
+/* Lists are implemented as sets of bits; CondFailedBy[d] is the  */
+/* set of cases that fail condition d, and FailOnce and FailTwice  */
+/* the cases that fail at least one and at least two undeleted  */
+/* conditions.  Fail0 is then ~FailOnce, Fail1 is FailOnce &  */
+/* ~FailTwice, and FailMany is FailTwice.    */
 /*            */
 /*************************************************************************/
 
@@ -42,26 +45,25 @@
 #include "redefine.h"
 #include "transform.h"
 
-double *Total = Nil, /* [Condition] */
+THREAD_LOCAL double *Total = Nil, /* [Condition] */
     *PredErr = Nil,  /* [Condition] */
     *Model;
 
-Boolean **CondFailedBy = Nil, /* [Condition][CaseNo] */
-    *Deleted = Nil;           /* [Condition] */
+THREAD_LOCAL CaseBits **CondFailedBy = Nil, /* [Condition][word] */
+    *FailOnce = Nil,  /* cases failing 1+ undeleted conditions */
+    *FailTwice = Nil, /* ditto 2+ */
+    Padding;          /* bits past MaxCase in the last word */
 
-Condition *Stack = Nil;
+THREAD_LOCAL Boolean *Deleted = Nil; /* [Condition] */
 
-int Leaves, MaxDepth, NCond, Bestd;
+THREAD_LOCAL Condition *Stack = Nil;
 
-short *NFail = Nil,    /* NFail[i] = conditions failed by i */
-    *LocalNFail = Nil; /* copy used during rule pruning */
+THREAD_LOCAL int Leaves, MaxDepth, NCond, Bestd, NWords;
 
-CaseNo *Succ = Nil, /* case following case i */
-    Fail0,          /* first satisfying all conditions */
-    Fail1,          /* ditto all but one */
-    FailMany;       /* first case failing 2+ conditions */
+THREAD_LOCAL CaseNo *Covered = Nil, /* cases covered by pruned rule */
+    NCovered;                       /* number of them */
 
-float *CPredVal = Nil; /* raw model values for each case */
+THREAD_LOCAL float *CPredVal = Nil; /* raw model values for each case */
 
 RRuleSet FormRules(Tree T)
 /*  ---------  */
@@ -85,19 +87,22 @@ RRuleSet FormRules(Tree T)
   Total = Alloc(MaxDepth + 2, double);
   PredErr = Alloc(MaxDepth + 2, double);
 
-  CondFailedBy = AllocZero(MaxDepth + 2, Boolean *);
+  CondFailedBy = AllocZero(MaxDepth + 2, CaseBits *);
   Deleted = AllocZero(MaxDepth + 2, Boolean);
 
   Stack = AllocZero(MaxDepth + 2, Condition);
 
+  NWords = CaseWords(MaxCase);
+  Padding = ~(((CaseBits)2 << (MaxCase & 63)) - 1);
+
   ForEach(i, 0, MaxDepth + 1) {
-    CondFailedBy[i] = AllocZero(MaxCase + 1, Boolean);
+    CondFailedBy[i] = AllocZero(NWords, CaseBits);
   }
 
-  NFail = AllocZero(MaxCase + 1, short);
-  LocalNFail = AllocZero(MaxCase + 1, short);
+  FailOnce = Alloc(NWords, CaseBits);
+  FailTwice = Alloc(NWords, CaseBits);
 
-  Succ = Alloc(MaxCase + 1, CaseNo);
+  Covered = Alloc(MaxCase + 1, CaseNo);
 
   NRules = RuleSpace = 0;
 
@@ -172,15 +177,11 @@ void Scan(Tree T)
       if (Term->NodeType == BrSubset)
         Term->Subset = T->Subset[v];
 
-      /*  Adjust number of failed conditions  */
+      /*  Find the cases that fail this condition  */
 
       PushCondition();
 
       Scan(T->Branch[v]);
-
-      /*  Reset number of failed conditions  */
-
-      PopCondition();
     }
 
     /*  Free local storage  */
@@ -189,8 +190,6 @@ void Scan(Tree T)
 
     NCond--;
   } else if (T->Cases >= 1) {
-    memcpy(LocalNFail, NFail, (MaxCase + 1) * sizeof(short));
-
     /*  Prune the current path  */
 
     Model = T->Model;
@@ -203,31 +202,53 @@ void Scan(Tree T)
 
 /*************************************************************************/
 /*            */
-/* Update NFail when a condition is added to/removed from Stack  */
+/* Set CondFailedBy when a condition is added to Stack.  The  */
+/* outcomes are found as by Satisfies(), but from the columns of  */
+/* values, which are in the order of the cases left by FormTree  */
 /*            */
 /*************************************************************************/
 
 void PushCondition(void)
 /*   -------------  */
 {
-  int i;
+  CaseNo i, Last;
+  CaseBits Bits;
+  Condition C = Stack[NCond];
+  Attribute Att = C->Tested;
+  AttValue *Col = GEnv.Col[Att];
+  DiscrValue v, Outcome = 0;
+  int w;
+
+  ForEach(w, 0, NWords - 1) {
+    Last = Min((w << 6) + 63, MaxCase);
+    Bits = 0;
+
+    ForEach(i, w << 6, Last) {
+      switch (C->NodeType) {
+      case BrDiscr: /* test of discrete attribute */
+
+        v = Col[i]._discr_val;
+        Outcome = (v == 0 ? -1 : v);
+        break;
+
+      case BrThresh: /* test of continuous attribute */
+
+        Outcome = (NotApplicVal(Col[i])
+                       ? 1
+                       : Col[i]._cont_val <= C->Cut ? 2 : 3);
+        break;
+
+      case BrSubset: /* subset test on discrete attribute  */
+
+        v = Col[i]._discr_val;
+        Outcome =
+            (v <= MaxAttVal[Att] && In(v, C->Subset) ? C->TestValue : 0);
+      }
 
-  ForEach(i, 0, MaxCase) {
-    if ((CondFailedBy[NCond][i] = !Satisfies(Case[i], Stack[NCond]))) {
-      NFail[i]++;
+      Bits |= (CaseBits)(Outcome != C->TestValue) << (i & 63);
     }
-  }
-}
-
-void PopCondition(void)
-/*   -------------  */
-{
-  int i;
 
-  ForEach(i, 0, MaxCase) {
-    if (CondFailedBy[NCond][i]) {
-      NFail[i]--;
-    }
+    CondFailedBy[NCond][w] = Bits;
   }
 }
 
@@ -242,11 +263,11 @@ void PopCondition(void)
 void PruneRule(Condition Cond[], float InitCoeffs)
 /*   ---------  */
 {
-  int d, id, Bestid, Remaining = NCond;
+  int d, id, Bestid, Remaining = NCond, w;
   ContValue Val, LoVal = 1E38, HiVal = -1E38, Wt;
   double Sum = 0, SumWt = 0;
-  CaseNo i;
-  CaseCount Cover = 0;
+  CaseNo i, j;
+  CaseBits Bits;
 
   FindModelAtts(Model);
 
@@ -315,8 +336,16 @@ void PruneRule(Condition Cond[], float InitCoeffs)
   /*  Find lowest and highest value among cases covered by this rule,
       and the average local error  */
 
-  for (i = Fail0; i >= 0;) {
-    Cover++;
+  NCovered = 0;
+
+  ForEach(w, 0, NWords - 1) {
+    for (Bits = ~FailOnce[w]; Bits; Bits &= Bits - 1) {
+      Covered[NCovered++] = (w << 6) + LowBit(Bits);
+    }
+  }
+
+  ForEach(j, 0, NCovered - 1) {
+    i = Covered[j];
 
     Wt = CWeight(Case[i]);
     SumWt += Wt;
@@ -324,30 +353,33 @@ void PruneRule(Condition Cond[], float InitCoeffs)
 
     LoVal = Min(LoVal, Val);
     HiVal = Max(HiVal, Val);
-
-    i = Succ[i];
   }
 
   /*  Add this as a possible new rule  */
 
-  PredErr[0] = EstimateErr(PredErr[0] / Total[0], Cover, InitCoeffs);
+  PredErr[0] = EstimateErr(PredErr[0] / Total[0], NCovered, InitCoeffs);
 
-  if (NewRule(Cond, NCond, Deleted, Cover, Sum / SumWt, LoVal, HiVal,
+  if (NewRule(Cond, NCond, Deleted, NCovered, Sum / SumWt, LoVal, HiVal,
               PredErr[0], Model)) {
     /*  Adjust average predictions for new cases covered by this rule.
         Do not adjust for cases covered by the initial rule, since the
         value was entered at initialisation  */
 
-    for (i = Fail0; i >= 0;) {
-      if (NFail[i]) /* not covered by initial rule */
+    ForEach(j, 0, NCovered - 1) {
+      i = Covered[j];
+
+      ForEach(d, 1, NCond) {
+        if (HasCase(i, CondFailedBy[d]))
+          break;
+      }
+
+      if (d <= NCond) /* not covered by initial rule */
       {
         PredSum(Case[i]) +=
             (CPredVal[i] < LoVal ? LoVal
                                  : CPredVal[i] > HiVal ? HiVal : CPredVal[i]);
         PredCount(Case[i])++;
       }
-
-      i = Succ[i];
     }
 
     if (UNBIASED)
@@ -392,99 +424,88 @@ void UpdateCount(int d, CaseNo i, double *Total, double *PredErr)
 /*            */
 /* Change Fail0, Fail1, and FailMany.     */
 /*                                                                       */
-/* If Bestd has not been set, initialise the lists; otherwise  */
-/* record the changes for deleting condition Bestd and reduce  */
-/* LocalNFail for cases that do not satisfy condition Bestd  */
+/* If Bestd has not been set, initialise the sets; otherwise  */
+/* record the changes for deleting condition Bestd.  Only the  */
+/* words holding cases that fail condition Bestd can change   */
 /*            */
 /*************************************************************************/
 
 void ProcessLists(void)
 /*   ------------  */
 {
-  CaseNo i, iNext, *Prev;
-  int d;
+  CaseNo i;
+  CaseBits Once, Twice, Bits;
+  int d, w;
 
   if (!Bestd) {
-    /*  Initialise the lists  */
-
-    Fail0 = Fail1 = FailMany = -1;
+    /*  Initialise the sets  */
 
     ForEach(d, 0, NCond) { Total[d] = PredErr[d] = 0; }
 
-    ForEach(i, 0, MaxCase) {
-      if (!LocalNFail[i]) {
-        UpdateCount(0, i, Total, PredErr);
-        AddToList(&Fail0, i);
-      } else if (LocalNFail[i] == 1) {
+    ForEach(w, 0, NWords - 1) {
+      CountFails(w);
+
+      for (Bits = ~FailOnce[w]; Bits; Bits &= Bits - 1) {
+        UpdateCount(0, (w << 6) + LowBit(Bits), Total, PredErr);
+      }
+
+      for (Bits = FailOnce[w] & ~FailTwice[w]; Bits; Bits &= Bits - 1) {
+        i = (w << 6) + LowBit(Bits);
         d = SingleFail(i);
         UpdateCount(d, i, Total, PredErr);
-        AddToList(&Fail1, i);
-      } else {
-        AddToList(&FailMany, i);
       }
     }
   } else {
-    /*  Promote cases from Fail1 to Fail0  */
+    ForEach(w, 0, NWords - 1) {
+      if (!CondFailedBy[Bestd][w])
+        continue;
 
-    Prev = &Fail1;
+      Once = FailOnce[w];
+      Twice = FailTwice[w];
+      CountFails(w);
 
-    for (i = Fail1; i >= 0;) {
-      iNext = Succ[i];
-      if (CondFailedBy[Bestd][i]) {
-        LocalNFail[i] = 0;
-        UpdateCount(0, i, Total, PredErr);
+      /*  Promote cases from Fail1 to Fail0  */
 
-        DeleteFromList(Prev, i);
-        AddToList(&Fail0, i);
-      } else {
-        Prev = &Succ[i];
+      for (Bits = Once & ~FailOnce[w]; Bits; Bits &= Bits - 1) {
+        UpdateCount(0, (w << 6) + LowBit(Bits), Total, PredErr);
       }
-      i = iNext;
-    }
-
-    /*  Check cases in FailMany  */
 
-    Prev = &FailMany;
+      /*  Promote cases from FailMany to Fail1  */
 
-    for (i = FailMany; i >= 0;) {
-      iNext = Succ[i];
-      if (CondFailedBy[Bestd][i] && --LocalNFail[i] == 1) {
+      for (Bits = Twice & ~FailTwice[w] & FailOnce[w]; Bits; Bits &= Bits - 1) {
+        i = (w << 6) + LowBit(Bits);
         d = SingleFail(i);
         UpdateCount(d, i, Total, PredErr);
-
-        DeleteFromList(Prev, i);
-        AddToList(&Fail1, i);
-      } else {
-        Prev = &Succ[i];
       }
-      i = iNext;
     }
   }
 }
 
 /*************************************************************************/
 /*            */
-/* Add case to list whose first case is *List    */
+/* Find FailOnce and FailTwice for word w from the undeleted  */
+/* conditions.  The bits past the last case are put in FailMany  */
 /*            */
 /*************************************************************************/
 
-void AddToList(CaseNo *List, CaseNo N)
-/*   ---------  */
+void CountFails(int w)
+/*   ----------  */
 {
-  Succ[N] = *List;
-  *List = N;
-}
+  CaseBits Once, Twice;
+  int d;
 
-/*************************************************************************/
-/*            */
-/* Delete case from list where previous case is *Before   */
-/*            */
-/*************************************************************************/
+  Once = Twice = (w == NWords - 1 ? Padding : 0);
 
-void DeleteFromList(CaseNo *Before, CaseNo N)
-/*   --------------  */
-{
-  *Before = Succ[N];
+  ForEach(d, 1, NCond) {
+    if (Deleted[d])
+      continue;
+
+    Twice |= Once & CondFailedBy[d][w];
+    Once |= CondFailedBy[d][w];
+  }
+
+  FailOnce[w] = Once;
+  FailTwice[w] = Twice;
 }
 
 /*************************************************************************/
@@ -499,7 +520,7 @@ int SingleFail(CaseNo i)
   int d;
 
   ForEach(d, 1, NCond) {
-    if (!Deleted[d] && CondFailedBy[d][i])
+    if (!Deleted[d] && HasCase(i, CondFailedBy[d]))
       return d;
   }
 
@@ -516,11 +537,12 @@ void RemoveBias(CRule R, int Coeffs)
 /*   ----------  */
 {
   double Wt, TotErr = 0, TotWt = 0, TotAbsErr = -1, Bias = 0, LastBias, New;
-  CaseNo i;
+  CaseNo i, j;
 
   /*  Computer initial bias and total weight  */
 
-  for (i = Fail0; i >= 0;) {
+  ForEach(j, 0, NCovered - 1) {
+    i = Covered[j];
     Wt = CWeight(Case[i]);
     TotWt += Wt;
 
@@ -529,8 +551,6 @@ void RemoveBias(CRule R, int Coeffs)
                : CPredVal[i] > R->HiLim ? R->HiLim : CPredVal[i]);
 
     TotErr += Wt * (New - Class(Case[i]));
-
-    i = Succ[i];
   }
 
   Bias = TotErr / TotWt;
@@ -543,7 +563,8 @@ void RemoveBias(CRule R, int Coeffs)
 
     TotErr = TotAbsErr = 0;
 
-    for (i = Fail0; i >= 0;) {
+    ForEach(j, 0, NCovered - 1) {
+      i = Covered[j];
       Wt = CWeight(Case[i]);
 
       /*  Remove previous bias from raw value  */
@@ -558,8 +579,6 @@ void RemoveBias(CRule R, int Coeffs)
 
       TotErr += Wt * (New - Class(Case[i]));
       TotAbsErr += Wt * fabs(New - Class(Case[i]));
-
-      i = Succ[i];
     }
 
     Bias = TotErr / TotWt;
@@ -633,12 +652,12 @@ void FreeFormRuleData(void)
   Total = Nil;
   Free(PredErr);
   PredErr = Nil;
-  Free(NFail);
-  NFail = Nil;
-  Free(LocalNFail);
-  LocalNFail = Nil;
-  Free(Succ);
-  Succ = Nil;
+  Free(FailOnce);
+  FailOnce = Nil;
+  Free(FailTwice);
+  FailTwice = Nil;
+  Free(Covered);
+  Covered = Nil;
   Free(CPredVal);
   CPredVal = Nil;
 }
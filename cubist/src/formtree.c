@@ -37,6 +37,14 @@
 #include "redefine.h"
 #include "transform.h"
 
+#define SwapPlace(a, b)                                                        \
+  {                                                                            \
+    Swap(a, b);                                                                \
+    pab = Place[a];                                                            \
+    Place[a] = Place[b];                                                       \
+    Place[b] = pab;                                                            \
+  }
+
 /*************************************************************************/
 /*           */
 /* Allocate space for tree tables       */
@@ -67,6 +75,8 @@ void InitialiseEnvData(void)
   GEnv.Left = Alloc(MaxDiscrVal + 1, Boolean);
   GEnv.Subset = AllocZero(MaxAtt + 1, Set *);
 
+  GEnv.EvalAtt = Alloc(MaxAtt + 1, Attribute);
+
   ForEach(Att, 1, MaxAtt) {
     if (Discrete(Att)) {
       GEnv.Subset[Att] = AllocZero(4, Set);
@@ -87,6 +97,11 @@ void InitialiseEnvData(void)
   GEnv.xTy = Alloc(MaxAtt + 1, double);
   GEnv.B = Alloc(MaxAtt + 1, double);
 
+  /*  The factor of xTx is packed into columns, followed by the
+      right-hand side  */
+
+  GEnv.Chol = (Lapack ? Alloc((MaxAtt + 1) * (MaxAtt + 2), double) : Nil);
+
   GEnv.Resid = Alloc(MaxCase + 1, double);
   GEnv.PResid = Alloc(MaxCase + 1, double);
 
@@ -99,11 +114,53 @@ void InitialiseEnvData(void)
   GEnv.BestModel = Alloc(MaxAtt + 1, double);
   GEnv.SaveZero = Alloc(MaxAtt + 1, Boolean);
 
-  GEnv.Filtered = Alloc(MaxCase + 1, DataRec);
+  GEnv.Filtered = Alloc(MaxCase + 1, CaseNo);
+
+  /*  Columns of the values of the attributes that can be tested or
+      used in models, with the target in column 0  */
+
+  GEnv.Col = AllocZero(MaxAtt + 1, AttValue *);
+  ForEach(Att, 0, MaxAtt) {
+    if (!Att || Att == CWtAtt || (!Skip(Att) && Att != ClassAtt)) {
+      GEnv.Col[Att] = Alloc(MaxCase + 1, AttValue);
+    }
+  }
+  GEnv.ColTmp = Alloc(MaxCase + 1, AttValue);
+  GEnv.ColResid = Alloc(MaxCase + 1, ContValue);
+  GEnv.ColPlace = Alloc(MaxCase + 1, CaseNo);
+  GEnv.ModelVal = Alloc(MaxAtt + 1, ContValue);
+  GEnv.ModelPred = Alloc(MaxCase + 1, float);
 
   GEnv.DoNotUse = Alloc(MaxAtt + 1, Boolean);
 
   GEnv.ModelAtt = Alloc(MaxAtt + 1, Attribute);
+
+  /*  Sums of cross-products, kept for each node while models are added  */
+
+  GEnv.TableAtt = Alloc(MaxAtt + 1, Attribute);
+  GEnv.TableIndex = Alloc(MaxAtt + 1, int);
+  GEnv.Sums = Alloc(TableSize(MaxAtt), double);
+
+  /*  Cases sorted on each continuous attribute once per tree  */
+
+  if (PRESORT) {
+    GEnv.Order = AllocZero(MaxAtt + 1, OrderRec *);
+    GEnv.OrderTmp = Alloc(MaxCase + 1, OrderRec);
+
+    ForEach(Att, 1, MaxAtt) {
+      if (Continuous(Att) && !Skip(Att) && Att != ClassAtt) {
+        GEnv.Order[Att] = Alloc(MaxCase + 1, OrderRec);
+      }
+    }
+  }
+
+  /*  Bins of continuous attribute values for approximate cuts  */
+
+  FindBinCuts();
+
+  /*  Threads that share the evaluation of attributes  */
+
+  StartEvalThreads();
 }
 
 void FreeEnvData(void)
@@ -114,6 +171,8 @@ void FreeEnvData(void)
   if (!GEnv.LocalModel)
     return;
 
+  StopEvalThreads();
+
   FreeUnlessNil(GEnv.LocalModel);
 
   FreeUnlessNil(GEnv.ValFreq);
@@ -131,10 +190,24 @@ void FreeEnvData(void)
   }
   FreeUnlessNil(GEnv.Subset);
 
+  FreeUnlessNil(GEnv.EvalAtt);
+
+  FreeVector((void **)GEnv.BinCut, 1, MaxAtt);
+  GEnv.BinCut = Nil;
+  FreeUnlessNil(GEnv.NBinCut);
+  GEnv.NBinCut = Nil;
+
+  FreeVector((void **)GEnv.Order, 1, MaxAtt);
+  GEnv.Order = Nil;
+  FreeUnlessNil(GEnv.OrderTmp);
+  GEnv.OrderTmp = Nil;
+
   FreeVector((void **)GEnv.xTx, 0, MaxAtt);
   FreeVector((void **)GEnv.A, 0, MaxAtt);
   FreeUnlessNil(GEnv.xTy);
   FreeUnlessNil(GEnv.B);
+  FreeUnlessNil(GEnv.Chol);
+  GEnv.Chol = Nil;
 
   FreeUnlessNil(GEnv.Resid);
   FreeUnlessNil(GEnv.PResid);
@@ -150,12 +223,29 @@ void FreeEnvData(void)
 
   FreeUnlessNil(GEnv.Filtered);
 
+  FreeVector((void **)GEnv.Col, 0, MaxAtt);
+  GEnv.Col = Nil;
+  FreeUnlessNil(GEnv.ColTmp);
+  FreeUnlessNil(GEnv.ColResid);
+  FreeUnlessNil(GEnv.ColPlace);
+  FreeUnlessNil(GEnv.ModelVal);
+  FreeUnlessNil(GEnv.ModelPred);
+
   FreeUnlessNil(GEnv.DoNotUse);
 
   FreeUnlessNil(GEnv.ModelAtt);
 
+  FreeUnlessNil(GEnv.TableAtt);
+  FreeUnlessNil(GEnv.TableIndex);
+  FreeUnlessNil(GEnv.Sums);
+  GEnv.NodeTables = Nil;
+
   FreeUnlessNil(SRec);
   SRec = Nil;
+
+  /*  Cleanup() calls this again after an error  */
+
+  GEnv.LocalModel = Nil;
 }
 
 /*************************************************************************/
@@ -277,13 +367,22 @@ void FormTree(CaseNo Fp, CaseNo Lp, int Level, Tree *Result, Tree Parent)
 
   MaxResid = 0;
 
+  if (!Root) {
+    ColModelValues(GEnv.LocalModel, Nil, Fp, Lp, bintrue);
+  }
+
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
-    Val = Resid(Case[i]) =
-        (Root ? Class(Case[i])
-              : Class(Case[i]) - LinModel(GEnv.LocalModel, Case[i]));
+    Wt = ColWeight(i);
+    Val = ColResid(i) = (Root ? ColClass(i) : ColClass(i) - GEnv.ModelPred[i]);
+
+    /*  Cases sorted at the root are found through their records  */
+
+    if (GEnv.Order) {
+      Resid(Case[i]) = Val;
+    }
+
     Cases += Wt;
-    RawSum += Wt * Class(Case[i]);
+    RawSum += Wt * ColClass(i);
     Sum += Wt * Val;
     SumSq += Wt * Val * Val;
 
@@ -309,25 +408,37 @@ void FormTree(CaseNo Fp, CaseNo Lp, int Level, Tree *Result, Tree Parent)
     return;
   }
 
+  /*  At the root, sort the cases on each continuous attribute for
+      the nodes below to share  */
+
+  if (Root && GEnv.Order) {
+    SortOrders();
+  }
+
   /*  Find the attribute with maximum gain  */
 
   BestVal = -Epsilon;
   BestAtt = None;
 
+  GEnv.NEvalAtt = 0;
+
   ForEach(Att, 1, MaxAtt) {
     GEnv.Gain[Att] = None;
 
     if (Skip(Att) || Att == ClassAtt)
       continue;
 
-    if (Discrete(Att)) {
-      if (Root || MaxAttVal[Att] > 3 || GEnv.DoNotUse[Att]) {
-        EvalDiscreteAtt(Node, Att, Fp, Lp);
-      }
-    } else {
-      EvalContinuousAtt(Node, Att, Fp, Lp);
+    if (Continuous(Att) || Root || MaxAttVal[Att] > 3 || GEnv.DoNotUse[Att]) {
+      GEnv.EvalAtt[GEnv.NEvalAtt++] = Att;
     }
+  }
+
+  /*  The attributes may be evaluated by several threads, so the best
+      is chosen afterwards  */
 
+  EvalAtts(Node, Fp, Lp);
+
+  ForEach(Att, 1, MaxAtt) {
     if ((Val = GEnv.Gain[Att]) > -Epsilon) {
       if (Val > BestVal ||
           (Val > 0.999 * BestVal && AttPref[Att] > AttPref[BestAtt])) {
@@ -367,29 +478,55 @@ void FormTree(CaseNo Fp, CaseNo Lp, int Level, Tree *Result, Tree Parent)
   }
 }
 
-void AddModels(CaseNo Fp, CaseNo Lp, Tree T, Tree Parent)
+/*************************************************************************/
+/*           */
+/* Find models for the nodes of the tree T, working up from the  */
+/* leaves.  The sums of cross-products of the items at a node are */
+/* those of its branches, so only the leaves need a scan of the  */
+/* data; the sums of T are added to Sums if this is not Nil   */
+/*           */
+/*************************************************************************/
+
+void AddModels(CaseNo Fp, CaseNo Lp, Tree T, Tree Parent, double *Sums)
 /*   ---------  */
 {
   Attribute Att;
   CaseNo Bp, Ep;
   DiscrValue v;
+  double *Tables;
+  int k, Size;
 
   Progress(1.0);
 
   if (!T->Cases)
     return;
 
+  /*  The sums are kept for the atts that any model in the tree can use  */
+
+  if (!Parent) {
+    FindTableAtts(T);
+  }
+
+  Size = TableSize(GEnv.NTableAtt);
+  Tables = AllocZero(Size, double);
+
+  Bp = Fp;
   if (T->NodeType) {
-    Bp = Fp;
     ForEach(v, 1, T->Forks) {
       if (T->Branch[v]->Cases) {
         Ep = Bp + T->Branch[v]->Cases - 1;
-        AddModels(Bp, Ep, T->Branch[v], T);
+        AddModels(Bp, Ep, T->Branch[v], T, Tables);
         Bp = Ep + 1;
       }
     }
   }
 
+  /*  Scan the items of a leaf, or any items in no branch  */
+
+  if (Bp <= Lp) {
+    SumTables(Bp, Lp, GEnv.TableAtt, GEnv.NTableAtt, Tables);
+  }
+
   /*  Find a new model for this node  */
 
   ForEach(Att, 1, MaxAtt) { GEnv.DoNotUse[Att] = bintrue; }
@@ -405,7 +542,15 @@ void AddModels(CaseNo Fp, CaseNo Lp, Tree T, Tree Parent)
   AddSplitAtts(T);
   AddDefAtts();
 
+  GEnv.NodeTables = Tables;
   Regress(Fp, Lp, T->Model);
+  GEnv.NodeTables = Nil;
+
+  if (Sums) {
+    ForEach(k, 0, Size - 1) { Sums[k] += Tables[k]; }
+  }
+
+  Free(Tables);
 }
 
 /*************************************************************************/
@@ -417,7 +562,7 @@ void AddModels(CaseNo Fp, CaseNo Lp, Tree T, Tree Parent)
 void Divide(Tree Node, CaseNo Fp, CaseNo Lp, int Level)
 /*   ------  */
 {
-  CaseNo Ep;
+  CaseNo i, Bp, Ep[4];
   DiscrValue v;
 #ifdef VerbOpt
   CaseNo XEp[4]; /*  Queue tasks in non-SMP order  */
@@ -427,17 +572,34 @@ void Divide(Tree Node, CaseNo Fp, CaseNo Lp, int Level)
   /* gets flagged by R CMD check, uncomment for debugging */
   /* assert(Node->Forks < 4); */
 
-  /*  Recursive divide and conquer  */
+  /*  Keep the sorted cases of each branch together, as Group will  */
+
+  if (GEnv.Order) {
+    GroupOrders(Node, Fp, Lp);
+  }
+
+  /*  Group the items of every branch, then move their values in the
+      columns to the same places  */
+
+  ForEach(i, Fp, Lp) { GEnv.ColPlace[i] = i; }
 
+  Bp = Fp;
   ForEach(v, 1, Node->Forks) {
-    Ep = Group(v, Fp, Lp, Node);
+    Ep[v] = Group(v, Bp, Lp, Node);
+    Bp = Ep[v] + 1;
+  }
+
+  RegroupColumns(Fp, Lp);
 
+  /*  Recursive divide and conquer  */
+
+  ForEach(v, 1, Node->Forks) {
 #ifdef VerbOpt
-    XEp[v] = Ep;
+    XEp[v] = Ep[v];
 #endif
-    if (Fp <= Ep) {
-      FormTree(Fp, Ep, Level + 1, &Node->Branch[v], Node);
-      Fp = Ep + 1;
+    if (Fp <= Ep[v]) {
+      FormTree(Fp, Ep[v], Level + 1, &Node->Branch[v], Node);
+      Fp = Ep[v] + 1;
     } else {
       Node->Branch[v] = Leaf(0, Node->Mean, Node->SD);
     }
@@ -456,7 +618,7 @@ void Divide(Tree Node, CaseNo Fp, CaseNo Lp, int Level)
 CaseNo Group(DiscrValue V, CaseNo Fp, CaseNo Lp, Tree TestNode)
 /*     -----  */
 {
-  CaseNo i;
+  CaseNo i, *Place = GEnv.ColPlace, pab;
   Attribute Att;
   ContValue Thresh;
   Set SS;
@@ -465,14 +627,15 @@ CaseNo Group(DiscrValue V, CaseNo Fp, CaseNo Lp, Tree TestNode)
   Att = TestNode->Tested;
 
   /*  Group items on the value of attribute Att, and depending
-      on the type of branch  */
+      on the type of branch.  The values are found in the columns
+      through the places of the items, which move with them  */
 
   switch (TestNode->NodeType) {
   case BrDiscr:
 
     ForEach(i, Fp, Lp) {
-      if (DVal(Case[i], Att) == V) {
-        Swap(Fp, i);
+      if (ColDVal(Att, Place[i]) == V) {
+        SwapPlace(Fp, i);
         Fp++;
       }
     }
@@ -482,9 +645,9 @@ CaseNo Group(DiscrValue V, CaseNo Fp, CaseNo Lp, Tree TestNode)
 
     Thresh = TestNode->Cut;
     ForEach(i, Fp, Lp) {
-      if (V == 1 ? NotApplic(Case[i], Att)
-                 : (CVal(Case[i], Att) <= Thresh) == (V == 2)) {
-        Swap(Fp, i);
+      if (V == 1 ? ColNotApplic(Att, Place[i])
+                 : (ColCVal(Att, Place[i]) <= Thresh) == (V == 2)) {
+        SwapPlace(Fp, i);
         Fp++;
       }
     }
@@ -494,8 +657,8 @@ CaseNo Group(DiscrValue V, CaseNo Fp, CaseNo Lp, Tree TestNode)
 
     SS = TestNode->Subset[V];
     ForEach(i, Fp, Lp) {
-      if (In(DVal(Case[i], Att), SS)) {
-        Swap(Fp, i);
+      if (In(ColDVal(Att, Place[i]), SS)) {
+        SwapPlace(Fp, i);
         Fp++;
       }
     }
@@ -505,6 +668,151 @@ CaseNo Group(DiscrValue V, CaseNo Fp, CaseNo Lp, Tree TestNode)
   return Fp - 1;
 }
 
+/*************************************************************************/
+/*           */
+/* Sort all cases on each continuous attribute with an order  */
+/*           */
+/*************************************************************************/
+
+void SortOrders(void)
+/*   ----------  */
+{
+  CaseNo i;
+  Attribute Att;
+  OrderRec *O;
+
+  ForEach(Att, 1, MaxAtt) {
+    if (!(O = GEnv.Order[Att]))
+      continue;
+
+    /*  N/A values are skipped when the order is used, so their
+        place in it is immaterial  */
+
+    ForEach(i, 0, MaxCase) {
+      O[i].Case = Case[i];
+      O[i].V = (NotApplic(Case[i], Att) ? -INFINITY : CVal(Case[i], Att));
+    }
+
+    Ordersort(O, 0, MaxCase);
+  }
+}
+
+/*************************************************************************/
+/*           */
+/* Note the branch of each item Fp to Lp at TestNode, then stably  */
+/* partition the sorted items of each attribute by branch so that  */
+/* the items of branch v occupy the places Group will give them   */
+/*           */
+/*************************************************************************/
+
+void GroupOrders(Tree TestNode, CaseNo Fp, CaseNo Lp)
+/*   -----------  */
+{
+  CaseNo i, First[5], Next[5];
+  Attribute Att;
+  DiscrValue v, Forks = TestNode->Forks;
+  OrderRec *O, *Tmp = GEnv.OrderTmp;
+
+  Att = TestNode->Tested;
+
+  ForEach(v, 1, Forks + 1) { Next[v] = 0; }
+
+  /*  An item in no branch is left after the last, as by Group  */
+
+  ForEach(i, Fp, Lp) {
+    switch (TestNode->NodeType) {
+    case BrDiscr:
+      v = ColDVal(Att, i);
+      break;
+
+    case BrThresh:
+      if (ColNotApplic(Att, i)) {
+        v = 1;
+      } else {
+        v = (ColCVal(Att, i) <= TestNode->Cut ? 2 : 3);
+      }
+      break;
+
+    case BrSubset:
+      for (v = 1; v <= Forks && !In(ColDVal(Att, i), TestNode->Subset[v]);
+           v++)
+        ;
+      break;
+    }
+
+    if (v < 1 || v > Forks)
+      v = Forks + 1;
+
+    Outcome(Case[i]) = v;
+    Next[v]++;
+  }
+
+  /*  Convert the counts to the first place of each branch  */
+
+  i = Fp;
+  ForEach(v, 1, Forks + 1) {
+    First[v] = i;
+    i += Next[v];
+  }
+
+  ForEach(Att, 1, MaxAtt) {
+    if (!(O = GEnv.Order[Att]))
+      continue;
+
+    memcpy(Next + 1, First + 1, (Forks + 1) * sizeof(CaseNo));
+
+    ForEach(i, Fp, Lp) { Tmp[Next[Outcome(O[i].Case)]++] = O[i]; }
+
+    memcpy(O + Fp, Tmp + Fp, (Lp - Fp + 1) * sizeof(OrderRec));
+  }
+}
+
+/*************************************************************************/
+/*           */
+/* Copy the values of all cases into the columns    */
+/*           */
+/*************************************************************************/
+
+void FillColumns(void)
+/*   -----------  */
+{
+  CaseNo i;
+  Attribute Att;
+  AttValue *C;
+
+  ForEach(Att, 0, MaxAtt) {
+    if (!(C = GEnv.Col[Att]))
+      continue;
+
+    ForEach(i, 0, MaxCase) { C[i] = Case[i][Att]; }
+  }
+}
+
+/*************************************************************************/
+/*           */
+/* Move the values of items Fp to Lp in the columns to the places  */
+/* of the items after grouping, the values of the item now at i  */
+/* being those that were at GEnv.ColPlace[i]     */
+/*           */
+/*************************************************************************/
+
+void RegroupColumns(CaseNo Fp, CaseNo Lp)
+/*   --------------  */
+{
+  CaseNo i, *Place = GEnv.ColPlace;
+  Attribute Att;
+  AttValue *C, *Tmp = GEnv.ColTmp;
+
+  ForEach(Att, 0, MaxAtt) {
+    if (!(C = GEnv.Col[Att]))
+      continue;
+
+    ForEach(i, Fp, Lp) { Tmp[i] = C[Place[i]]; }
+
+    memcpy(C + Fp, Tmp + Fp, (Lp - Fp + 1) * sizeof(AttValue));
+  }
+}
+
 /*************************************************************************/
 /*           */
 /* Add the continuous attributes that are used in a branch of  */
@@ -526,6 +834,35 @@ void AddSplitAtts(Tree T)
   }
 }
 
+/*************************************************************************/
+/*           */
+/* Find the atts that can be used in a model at the root of tree T */
+/* and so at any of its nodes       */
+/*           */
+/*************************************************************************/
+
+void FindTableAtts(Tree T)
+/*   -------------  */
+{
+  Attribute Att;
+
+  ForEach(Att, 1, MaxAtt) { GEnv.DoNotUse[Att] = bintrue; }
+
+  AddSplitAtts(T);
+  AddDefAtts();
+
+  GEnv.NTableAtt = 0;
+  GEnv.TableAtt[0] = GEnv.TableIndex[0] = 0;
+
+  ForEach(Att, 1, MaxAtt) {
+    if (Continuous(Att) && Att != ClassAtt && !Skip(Att) &&
+        !GEnv.DoNotUse[Att]) {
+      GEnv.TableAtt[++GEnv.NTableAtt] = Att;
+      GEnv.TableIndex[Att] = GEnv.NTableAtt;
+    }
+  }
+}
+
 /*************************************************************************/
 /*           */
 /* If attribute A can be used in a model, then so can any   */
@@ -58,12 +58,12 @@ static double my_rand(void) {
 
 #define Inc 2048
 
-Boolean SuppressErrorMessages = binfalse;
+THREAD_LOCAL Boolean SuppressErrorMessages = binfalse;
 #define XError(a, b, c)                                                        \
   if (!SuppressErrorMessages)                                                  \
   Error(a, b, c)
 
-CaseNo SampleFrom; /* file count for sampling */
+THREAD_LOCAL CaseNo SampleFrom; /* file count for sampling */
 
 /*************************************************************************/
 /*                                                                       */
@@ -88,11 +88,19 @@ void GetData(FILE *Df, Boolean Train, Boolean AllowUnknownTarget)
   CaseNo Count, WantTrain, LeftTrain, WantTest, LeftTest;
   Boolean SelectTrain;
   double Sum, SumSq;
-  DiscrValue v;
+  DiscrValue v, **DCMap = Nil;
+  DataColumns *DC;
+  CaseNo Row = 0;
 
   LineNo = 0;
   SuppressErrorMessages = SAMPLE && !Train;
 
+  /*  The file may stand in for columns of values rather than text  */
+
+  if ((DC = rbm_columns(Df))) {
+    DCMap = MapColumnValues(DC, Train);
+  }
+
   if (Train || !Case) {
     MaxCase = MaxLabel = CaseSpace = 0;
     Case = Alloc(1, DataRec); /* for error reporting */
@@ -103,7 +111,7 @@ void GetData(FILE *Df, Boolean Train, Boolean AllowUnknownTarget)
 
   if (SAMPLE) {
     if (Train) {
-      SampleFrom = CountData(Df);
+      SampleFrom = (DC ? DC->NRows : CountData(Df));
       ResetKR(KRInit); /* initialise KRandom() */
     } else {
       ResetKR(KRInit); /* restore  KRandom() */
@@ -116,7 +124,15 @@ void GetData(FILE *Df, Boolean Train, Boolean AllowUnknownTarget)
     LeftTest = SampleFrom - WantTrain;
   }
 
-  while ((DVec = GetDataRec(Df, Train))) {
+  /*  The number of cases in columns is known in advance  */
+
+  if (DC && MaxCase + DC->NRows > CaseSpace) {
+    CaseSpace = MaxCase + DC->NRows;
+    Realloc(Case, CaseSpace + 1, DataRec);
+  }
+
+  while ((DVec = (DC ? GetColumnRec(DC, Row++, DCMap)
+                     : GetDataRec(Df, Train)))) {
     /*  Check whether to include if we are sampling */
 
     if (SAMPLE) {
@@ -172,6 +188,12 @@ void GetData(FILE *Df, Boolean Train, Boolean AllowUnknownTarget)
   fclose(Df);
   MaxCase--;
 
+  if (DCMap) {
+    ForEach(v, 0, DC->NCols - 1) { FreeUnlessNil(DCMap[v]); }
+    Free(DCMap);
+    DCMap = Nil;
+  }
+
   if (Of && MaxCase < 0) {
     fprintf(Of, T_NoCases);
     Goodbye(1);
@@ -345,7 +367,7 @@ DataRec GetDataRec(FILE *Df, Boolean Train)
 {
   Attribute Att;
   char Name[1000], *EndVal;
-  int Dv, Chars;
+  int Chars;
   ContValue Cv;
   DataRec DVec;
   Boolean FirstValue = bintrue;
@@ -389,34 +411,7 @@ DataRec GetDataRec(FILE *Df, Boolean Train)
 
         DVal(DVec, Att) = NA;
       } else if (Discrete(Att)) {
-        Dv = Which(Name, AttValName[Att], 1, MaxAttVal[Att]);
-        if (!Dv) {
-          if (StatBit(Att, DISCRETE)) {
-            if (Train || XVAL) {
-              /*  Add value to list  */
-
-              if (MaxAttVal[Att] >= (long)(intptr_t)AttValName[Att][0]) {
-                XError(TOOMANYVALS, AttName[Att],
-                       (char *)AttValName[Att][0] - 1);
-                Dv = MaxAttVal[Att];
-              } else {
-                Dv = ++MaxAttVal[Att];
-                AttValName[Att][Dv] = strdup(Name);
-                AttValName[Att][Dv + 1] = "<other>"; /* no free */
-              }
-              if (Dv > MaxDiscrVal) {
-                MaxDiscrVal = Dv;
-              }
-            } else {
-              /*  Set value to "<other>"  */
-
-              Dv = MaxAttVal[Att] + 1;
-            }
-          } else {
-            XError(BADATTVAL, AttName[Att], Name);
-          }
-        }
-        DVal(DVec, Att) = Dv;
+        DVal(DVec, Att) = FindDiscrValue(Att, Name, Train);
       } else {
         /*  Continuous value  */
 
@@ -466,6 +461,161 @@ DataRec GetDataRec(FILE *Df, Boolean Train)
   }
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Find the number of a discrete attribute value, adding it to the  */
+/* list of values if the attribute is declared "discrete N"   */
+/*                                                                       */
+/*************************************************************************/
+
+DiscrValue FindDiscrValue(Attribute Att, String Name, Boolean Train)
+/*         --------------  */
+{
+  int Dv;
+
+  Dv = Which(Name, AttValName[Att], 1, MaxAttVal[Att]);
+  if (!Dv) {
+    if (StatBit(Att, DISCRETE)) {
+      if (Train || XVAL) {
+        /*  Add value to list  */
+
+        if (MaxAttVal[Att] >= (long)(intptr_t)AttValName[Att][0]) {
+          XError(TOOMANYVALS, AttName[Att], (char *)AttValName[Att][0] - 1);
+          Dv = MaxAttVal[Att];
+        } else {
+          Dv = ++MaxAttVal[Att];
+          AttValName[Att][Dv] = strdup(Name);
+          AttValName[Att][Dv + 1] = "<other>"; /* no free */
+        }
+        if (Dv > MaxDiscrVal) {
+          MaxDiscrVal = Dv;
+        }
+      } else {
+        /*  Set value to "<other>"  */
+
+        Dv = MaxAttVal[Att] + 1;
+      }
+    } else {
+      XError(BADATTVAL, AttName[Att], Name);
+    }
+  }
+
+  return Dv;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Find the number of each value name of each discrete column so  */
+/* that GetColumnRec() can translate codes without comparing names  */
+/*                                                                       */
+/*************************************************************************/
+
+DiscrValue **MapColumnValues(DataColumns *DC, Boolean Train)
+/*           ---------------  */
+{
+  DiscrValue **Map;
+  Attribute Att;
+  String Name;
+  int Col = 0, Code;
+
+  Map = AllocZero(DC->NCols + 1, DiscrValue *);
+
+  ForEach(Att, 1, MaxAtt) {
+    if (AttDef[Att])
+      continue;
+    if (Col >= DC->NCols)
+      break;
+
+    if (Discrete(Att) && !Exclude(Att) && DC->Codes[Col]) {
+      Map[Col] = Alloc(DC->NLevels[Col] + 1, DiscrValue);
+
+      ForEach(Code, 0, DC->NLevels[Col] - 1) {
+        Name = DC->Levels[Col][Code];
+        if (!strcmp(Name, "?")) {
+          Map[Col][Code] = 0;
+        } else if (!strcmp(Name, "N/A")) {
+          Map[Col][Code] = NA;
+        } else {
+          Map[Col][Code] = FindDiscrValue(Att, Name, Train);
+        }
+      }
+    }
+    Col++;
+  }
+
+  return Map;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Read a raw case from row Row of columns DC.    */
+/*                                                                       */
+/* This is the counterpart of GetDataRec() for cases passed as  */
+/* columns of values, so there is no text to parse.   */
+/*                                                                       */
+/*************************************************************************/
+
+DataRec GetColumnRec(DataColumns *DC, CaseNo Row, DiscrValue **Map)
+/*      ------------  */
+{
+  Attribute Att;
+  int Col = 0, Code, Chars;
+  double Cv;
+  DataRec DVec;
+
+  if (Row >= DC->NRows) {
+    return Nil;
+  }
+
+  Case[MaxCase] = DVec = NewCase();
+  ForEach(Att, 1, MaxAtt) {
+    if (AttDef[Att]) {
+      DVec[Att] = EvaluateDef(AttDef[Att], DVec);
+      if (Continuous(Att)) {
+        CheckValue(DVec, Att);
+      }
+      continue;
+    }
+
+    if (Col >= DC->NCols) {
+      XError(EOFINATT, AttName[Att], "");
+      FreeLastCase(DVec);
+      return Nil;
+    }
+
+    Code = (DC->Codes[Col] ? DC->Codes[Col][Row] : -1);
+
+    if (Exclude(Att)) {
+      if (Att == LabelAtt) {
+        /*  Record the value as a string  */
+
+        SVal(DVec, Att) = StoreIVal(Code < 0 ? "?" : DC->Levels[Col][Code]);
+      }
+    } else if (Discrete(Att)) {
+      DVal(DVec, Att) = (Code < 0 || !Map[Col] ? 0 : Map[Col][Code]);
+    } else {
+      Cv = (DC->Values[Col] ? DC->Values[Col][Row] : NAN);
+
+      if (isnan(Cv)) {
+        CVal(DVec, Att) = UNKNOWN;
+      } else {
+        CVal(DVec, Att) = Cv;
+        CheckValue(DVec, Att);
+      }
+    }
+    Col++;
+  }
+
+  Class(DVec) = CVal(DVec, ClassAtt);
+
+  if (LabelAtt &&
+      (Chars = strlen(IgnoredVals + SVal(DVec, LabelAtt))) > MaxLabel) {
+    MaxLabel = Chars;
+  }
+
+  return DVec;
+}
+
 /*************************************************************************/
 /*                                                                       */
 /*      Count cases in data file                                         */
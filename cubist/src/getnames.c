@@ -40,8 +40,8 @@
 #include "transform.h"
 
 #define MAXLINEBUFFER 10000
-int Delimiter;
-char LineBuffer[MAXLINEBUFFER], *LBp = LineBuffer;
+THREAD_LOCAL int Delimiter;
+THREAD_LOCAL char LineBuffer[MAXLINEBUFFER], *LBp = Nil; /* set by GetNames or InChar */
 
 /*************************************************************************/
 /*                                                                       */
@@ -530,7 +530,7 @@ void FreeNamesData(void)
 int InChar(FILE *f)
 /*  ------  */
 {
-  if (!*LBp) {
+  if (!LBp || !*LBp) {
     LBp = LineBuffer;
 
     if (!fgets(LineBuffer, MAXLINEBUFFER, f)) {
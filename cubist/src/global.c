@@ -34,15 +34,15 @@
 #include "redefine.h"
 #include "transform.h"
 
-Attribute ClassAtt = 0, /* attribute to use as class */
+THREAD_LOCAL Attribute ClassAtt = 0, /* attribute to use as class */
     LabelAtt = 0,       /* attribute to use as case ID */
     CWtAtt = 0;         /* attribute to use as case weight */
 
-char *IgnoredVals = 0; /* values of labels and atts marked ignore */
-int IValsSize = 0,     /* size of above */
+THREAD_LOCAL char *IgnoredVals = 0; /* values of labels and atts marked ignore */
+THREAD_LOCAL int IValsSize = 0,     /* size of above */
     IValsOffset = 0;   /* index of first free char */
 
-int MaxAtt,          /* max att number */
+THREAD_LOCAL int MaxAtt,          /* max att number */
     MaxDiscrVal = 3, /* max discrete values for any att */
     Precision,       /* decimal places for target */
     MaxLabel = 0,    /* max characters in case label */
@@ -51,29 +51,29 @@ int MaxAtt,          /* max att number */
     AttExIn = 0,     /* attribute exclusions/inclusions */
     TSBase = 0;      /* base day for time stamps */
 
-CaseNo MaxCase = -1; /* max data item number */
+THREAD_LOCAL CaseNo MaxCase = -1; /* max data item number */
 
-DataRec *Case; /* data items */
+THREAD_LOCAL DataRec *Case; /* data items */
 
-DataRec *SaveCase = Nil, /* original case order for better caching */
+THREAD_LOCAL DataRec *SaveCase = Nil, /* original case order for better caching */
     *Blocked = Nil;      /* cross-validation blocks */
-CaseNo SaveMaxCase;      /* original number of cases  */
+THREAD_LOCAL CaseNo SaveMaxCase;      /* original number of cases  */
 
-DiscrValue *MaxAttVal = Nil, /* number of values for each att */
+THREAD_LOCAL DiscrValue *MaxAttVal = Nil, /* number of values for each att */
     *Modal = Nil;            /* most frequent value for discr att */
 
-char *SpecialStatus = Nil; /* special att treatment */
+THREAD_LOCAL char *SpecialStatus = Nil; /* special att treatment */
 
-Definition *AttDef = Nil;     /* definitions of implicit atts */
-Attribute **AttDefUses = Nil; /* list of attributes used by definition */
+THREAD_LOCAL Definition *AttDef = Nil;     /* definitions of implicit atts */
+THREAD_LOCAL Attribute **AttDefUses = Nil; /* list of attributes used by definition */
 
-String *AttName = Nil,  /* att names */
+THREAD_LOCAL String *AttName = Nil,  /* att names */
     **AttValName = Nil; /* att value names */
 
-FILE *Of = 0; /* output file */
-String FileStem = "undefined";
+THREAD_LOCAL FILE *Of = 0; /* output file */
+THREAD_LOCAL String FileStem = "undefined";
 
-ContValue *AttMean = Nil,       /* means of att values */
+THREAD_LOCAL ContValue *AttMean = Nil,       /* means of att values */
     *AttSD = Nil,               /* std dev ditto */
         *AttMaxVal = Nil,       /* maximum value in training data */
             *AttMinVal = Nil,   /* minimum ditto */
@@ -82,18 +82,18 @@ ContValue *AttMean = Nil,       /* means of att values */
     Floor,                      /* min allowable global prediction */
     AvCWt;                      /* average case weight */
 
-float ErrReduction = 1; /* benefit of committee model */
+THREAD_LOCAL float ErrReduction = 1; /* benefit of committee model */
 
-double *AttUnit = Nil; /* units in which attribute reported */
+THREAD_LOCAL double *AttUnit = Nil; /* units in which attribute reported */
 
-int *AttPrec = Nil; /* Attribute precision  */
+THREAD_LOCAL int *AttPrec = Nil; /* Attribute precision  */
 
-DataRec *Instance = Nil, /* training cases */
+THREAD_LOCAL DataRec *Instance = Nil, /* training cases */
     Ref[2];              /* reference points */
-CaseNo MaxInstance = -1; /* highest instance */
-Index KDTree = Nil;      /* index of same */
-NNEnvRec GNNEnv;         /* global NN environment */
-float *RSPredVal = Nil;  /* tabulated RS predictions */
+THREAD_LOCAL CaseNo MaxInstance = -1; /* highest instance */
+THREAD_LOCAL Index KDTree = Nil;      /* index of same */
+THREAD_LOCAL NNEnvRec GNNEnv;         /* global NN environment */
+THREAD_LOCAL float *RSPredVal = Nil;  /* tabulated RS predictions */
 
 /*************************************************************************/
 /*                                                                       */
@@ -102,19 +102,19 @@ float *RSPredVal = Nil;  /* tabulated RS predictions */
 /*                                                                       */
 /*************************************************************************/
 
-EnvRec GEnv; /* global environment */
+THREAD_LOCAL EnvRec GEnv; /* global environment */
 
-Tree TempMT = Nil; /* intermediate model tree */
+THREAD_LOCAL Tree TempMT = Nil; /* intermediate model tree */
 
-SortRec *SRec = Nil; /* cache for sorting */
+THREAD_LOCAL SortRec *SRec = Nil; /* cache for sorting */
 
-float GlobalMean, /* mean of entire training set  */
+THREAD_LOCAL float GlobalMean, /* mean of entire training set  */
     GlobalSD,     /* std dev of entire training set */
     GlobalErr;    /* av abs error over training set */
 
-char Fn[512]; /* file name */
+THREAD_LOCAL char Fn[512]; /* file name */
 
-FILE *Mf = 0, /* file for saving models  */
+THREAD_LOCAL FILE *Mf = 0, /* file for saving models  */
     *Pf = 0;  /* file for predicted test values */
 
 /*************************************************************************/
@@ -124,11 +124,11 @@ FILE *Mf = 0, /* file for saving models  */
 /*                                                                       */
 /*************************************************************************/
 
-CRule *Rule = Nil; /* current rules */
-RuleNo NRules;     /* number of rules */
-int RuleSpace;     /* space currently allocated for rules */
+THREAD_LOCAL CRule *Rule = Nil; /* current rules */
+THREAD_LOCAL RuleNo NRules;     /* number of rules */
+THREAD_LOCAL int RuleSpace;     /* space currently allocated for rules */
 
-RRuleSet *Cttee = Nil;
+THREAD_LOCAL RRuleSet *Cttee = Nil;
 
 /*************************************************************************/
 /*                                                                       */
@@ -137,23 +137,36 @@ RRuleSet *Cttee = Nil;
 /*                                                                       */
 /*************************************************************************/
 
-int VERBOSITY = 0, /* verbosity level (0 = none) */
+THREAD_LOCAL int VERBOSITY = 0, /* verbosity level (0 = none) */
     FOLDS = 10,    /* cross-validation folds */
     NN = 0,        /* nearest neighbors to use */
     MEMBERS = 1;   /* members in committee */
 
-float MAXD; /* max distance for close neighbors */
+THREAD_LOCAL float MAXD; /* max distance for close neighbors */
 
-Boolean XVAL = 0,     /* bintrue if perform crossvalidation */
+THREAD_LOCAL Boolean XVAL = 0,     /* bintrue if perform crossvalidation */
     CHOOSEMODE = 0,   /* choose whether to use instances */
     USEINSTANCES = 0, /* using instances */
     UNBIASED = 0;     /* correct any rule bias */
 
-float SAMPLE = 0.0;   /* sample training proportion */
-int KRInit = 0;       /* KRandom initializer for SAMPLE */
-Boolean LOCK = binfalse; /* bintrue if sample locked */
+THREAD_LOCAL float SAMPLE = 0.0;   /* sample training proportion */
+THREAD_LOCAL int KRInit = 0;       /* KRandom initializer for SAMPLE */
+THREAD_LOCAL Boolean LOCK = binfalse; /* bintrue if sample locked */
 
-CaseCount MINITEMS; /* min rule coverage */
-int MAXRULES = 100; /* max number of rules */
+THREAD_LOCAL CaseCount MINITEMS; /* min rule coverage */
+THREAD_LOCAL int MAXRULES = 100; /* max number of rules */
 
-float EXTRAP = 0.1; /* allowed extrapolation from models */
+THREAD_LOCAL float EXTRAP = 0.1; /* allowed extrapolation from models */
+
+THREAD_LOCAL float HOLDOUT = 0.0; /* proportion held out to stop committees */
+THREAD_LOCAL int NOCHANGE = 5;    /* members without improvement to stop */
+
+THREAD_LOCAL int THREADS = 1; /* threads evaluating attributes */
+
+THREAD_LOCAL int HISTBINS = 0; /* bins of contin atts, 0 for exact cuts */
+
+THREAD_LOCAL Boolean PRESORT = binfalse; /* sort contin atts once per tree */
+
+THREAD_LOCAL LapackFunctions *Lapack = Nil; /* Nil to solve by elimination */
+
+THREAD_LOCAL Boolean KeepModel = binfalse; /* bintrue if model is owned by a handle */
@@ -37,17 +37,17 @@
 #include "redefine.h"
 #include "transform.h"
 
-char *Buff;       /* buffer for input characters */
-int BuffSize, BN; /* size and index of next character */
+THREAD_LOCAL char *Buff;       /* buffer for input characters */
+THREAD_LOCAL int BuffSize, BN; /* size and index of next character */
 
-EltRec *TStack;      /* expression stack model */
-int TStackSize, TSN; /* size of stack and index of next entry */
+THREAD_LOCAL EltRec *TStack;      /* expression stack model */
+THREAD_LOCAL int TStackSize, TSN; /* size of stack and index of next entry */
 
-int DefSize, DN; /* size of definition and next element */
+THREAD_LOCAL int DefSize, DN; /* size of definition and next element */
 
-Boolean PreviousError; /* to avoid parasitic errors */
+THREAD_LOCAL Boolean PreviousError; /* to avoid parasitic errors */
 
-AttValue _UNK, /* quasi-constant for unknown value */
+THREAD_LOCAL AttValue _UNK, /* quasi-constant for unknown value */
     _NA;       /* ditto for not applicable */
 
 #define FailSyn(Msg)                                                           \
@@ -35,18 +35,26 @@
 
 #define CVDiff(c, cv, a) (fabs(CVal(c, a) - (cv)) / (5 * AttSD[a]))
 
+/*  As Skip() etc., from the values copied for a search  */
+
+#define SSkip(S, a) ((S)->SpecialStatus[a] & (EXCLUDE | SKIP))
+#define SContinuous(S, a)                                                      \
+  (!(S)->MaxAttVal[a] && !((S)->SpecialStatus[a] & DISCRETE))
+#define SOrdered(S, a) ((S)->SpecialStatus[a] & ORDERED)
+#define SCVDiff(S, c, cv, a) (fabs(CVal(c, a) - (cv)) / (5 * (S)->AttSD[a]))
+
 #define Select(t)                                                              \
   (UseAll ? (t) : (MaxInstance + 1) * ((2 * (t) + 1) / (2.0 * Try)))
 
-int MinN; /* minimum close neighbors */
+THREAD_LOCAL int MinN; /* minimum close neighbors */
 
-int Try;                  /* sample size for estimates */
-Boolean UseAll,           /* bintrue if no sampling */
+THREAD_LOCAL int Try;      /* sample size for estimates */
+THREAD_LOCAL Boolean UseAll, /* bintrue if no sampling */
     SetNN,                /* bintrue if NN set automatically */
         *Tested = Nil;    /* for BuildIndex */
-CaseCount *ValFreq = Nil; /* ditto */
+THREAD_LOCAL CaseCount *ValFreq = Nil; /* ditto */
 
-AttValue *KDBlock; /* copy of instances in KDTree order to
+THREAD_LOCAL AttValue *KDBlock; /* copy of instances in KDTree order to
                       improve caching  */
 
 /*************************************************************************/
@@ -129,8 +137,18 @@ void InitialiseInstances(RRuleSet *Cttee)
 
   ForEach(i, 0, MaxCase) { RSPredVal[i] = PredictValue(Cttee, Instance[i]); }
 
-  /*  Set parameters for nearest neighbors if not read from model file  */
+  SetNeighborParameters(Cttee);
+}
 
+/*************************************************************************/
+/*                                                                       */
+/* Set parameters for nearest neighbors if not read from model file */
+/*                                                                       */
+/*************************************************************************/
+
+void SetNeighborParameters(RRuleSet *Cttee)
+/*   ---------------------  */
+{
   Try = Min(MaxInstance + 1, 1000);
   UseAll = (Try == MaxInstance + 1);
 
@@ -158,17 +176,19 @@ void SetParameters(RRuleSet *Cttee)
   float Estimate, RealClass;
   CaseNo i, j;
   int t, BestNN = 1;
+  NNSearchRec S;
 
   /*  Set MAXD to the average distance between instances  */
 
   GNNEnv.WorstBest = GNNEnv.BestD; /* use single nearest neighbor */
+  StartSearch(&S);
 
   ForEach(t, 0, Try - 1) {
     i = Select(t);
     while ((j = KRandom() * (MaxInstance + 1)) == i)
       ;
 
-    Sum += Distance(Instance[j], Instance[i], 1E10);
+    Sum += CaseDistance(&S, Instance[j], Instance[i], 1E10);
   }
   MAXD = rint(DPREC * Sum / Try) / DPREC;
 
@@ -329,29 +349,62 @@ float NNEstimate(RRuleSet *Cttee, DataRec Case)
 
 float Distance(DataRec Case1, DataRec Case2, float Thresh)
 /*    --------  */
+{
+  NNSearchRec S;
+
+  StartSearch(&S);
+
+  return CaseDistance(&S, Case1, Case2, Thresh);
+}
+
+float CaseDistance(NNSearch S, DataRec Case1, DataRec Case2, float Thresh)
+/*    ------------  */
 {
   Attribute Att;
   double DTot, Diff;
 
-  for (Att = 1, DTot = 0; DTot < Thresh && Att <= MaxAtt; Att++) {
-    if (Skip(Att) || Att == ClassAtt)
+  for (Att = 1, DTot = 0; DTot < Thresh && Att <= S->MaxAtt; Att++) {
+    if (SSkip(S, Att) || Att == S->ClassAtt)
       continue;
 
     if (NotApplic(Case2, Att) != NotApplic(Case1, Att)) {
       DTot += 1.0;
-    } else if (Continuous(Att)) {
-      Diff = CVDiff(Case2, CVal(Case1, Att), Att);
+    } else if (SContinuous(S, Att)) {
+      Diff = SCVDiff(S, Case2, CVal(Case1, Att), Att);
       DTot += Min(1.0, Diff);
-    } else if (Ordered(Att)) {
-      DTot += abs(DVal(Case2, Att) - DVal(Case1, Att)) / (MaxAttVal[Att] - 1);
+    } else if (SOrdered(S, Att)) {
+      DTot +=
+          abs(DVal(Case2, Att) - DVal(Case1, Att)) / (S->MaxAttVal[Att] - 1);
     } else if (DVal(Case2, Att) != DVal(Case1, Att)) {
-      DTot += 2.0 / (MaxAttVal[Att] - 1);
+      DTot += 2.0 / (S->MaxAttVal[Att] - 1);
     }
   }
 
   return DTot;
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Copy the globals read in comparing cases for a search.  The   */
+/* engine's globals are thread-local, and every read of one in a  */
+/* shared library is a call, so they are read once per search   */
+/* rather than once per instance compared.    */
+/*                                                                       */
+/*************************************************************************/
+
+void StartSearch(NNSearch S)
+/*   -----------  */
+{
+  S->MaxAtt = MaxAtt;
+  S->ClassAtt = ClassAtt;
+  S->SpecialStatus = SpecialStatus;
+  S->MaxAttVal = MaxAttVal;
+  S->AttSD = AttSD;
+  S->Instance = Instance;
+  S->Env = &GNNEnv;
+  S->DRef[0] = S->DRef[1] = 0;
+}
+
 /*************************************************************************/
 /*                                                                       */
 /* Check whether a saved instance should be one of the neighbors.  */
@@ -359,31 +412,32 @@ float Distance(DataRec Case1, DataRec Case2, float Thresh)
 /*                                                                       */
 /*************************************************************************/
 
-void CheckDistance(DataRec Case, CaseNo Saved)
+void CheckDistance(NNSearch S, DataRec Case, CaseNo Saved)
 /*   -------------  */
 {
   int d, dd;
   float Dist;
+  NNEnvRec *E = S->Env;
 
-  if (Instance[Saved] == Case)
+  if (S->Instance[Saved] == Case)
     return;
 
-  Dist = rint(DPREC * Distance(Case, Instance[Saved],
-                               *GNNEnv.WorstBest + 0.55 / DPREC)) /
+  Dist = rint(DPREC * CaseDistance(S, Case, S->Instance[Saved],
+                                   *E->WorstBest + 0.55 / DPREC)) /
          DPREC;
 
-  if (Dist <= *GNNEnv.WorstBest) {
-    for (d = 0; d < MAXN && GNNEnv.BestD[d] < Dist; d++)
+  if (Dist <= *E->WorstBest) {
+    for (d = 0; d < MAXN && E->BestD[d] < Dist; d++)
       ;
 
     if (d < MAXN) {
       for (dd = MAXN - 1; dd > d; dd--) {
-        GNNEnv.BestD[dd] = GNNEnv.BestD[dd - 1];
-        GNNEnv.BestI[dd] = GNNEnv.BestI[dd - 1];
+        E->BestD[dd] = E->BestD[dd - 1];
+        E->BestI[dd] = E->BestI[dd - 1];
       }
 
-      GNNEnv.BestD[d] = Dist;
-      GNNEnv.BestI[d] = Saved;
+      E->BestD[d] = Dist;
+      E->BestI[d] = Saved;
     }
   }
 }
@@ -400,6 +454,7 @@ void FindNearestNeighbors(DataRec Case)
 {
   int d;
   Attribute Att;
+  NNSearchRec S;
 
   /*  Clear best distances and attribute minimum distances  */
 
@@ -410,10 +465,11 @@ void FindNearestNeighbors(DataRec Case)
 
   ForEach(Att, 1, MaxAtt) { GNNEnv.AttMinD[Att] = 0; }
 
-  DRef1(Case) = Distance(Case, Ref[0], 1E38);
-  DRef2(Case) = Distance(Case, Ref[1], 1E38);
+  StartSearch(&S);
+  S.DRef[0] = DRef1(Case) = CaseDistance(&S, Case, Ref[0], 1E38);
+  S.DRef[1] = DRef2(Case) = CaseDistance(&S, Case, Ref[1], 1E38);
 
-  ScanIndex(Case, KDTree, 0.0);
+  ScanIndex(&S, Case, KDTree, 0.0);
 }
 
 /*************************************************************************/
@@ -670,28 +726,29 @@ void SwapInstance(CaseNo A, CaseNo B)
   Instance[B] = Hold;
 }
 
-void ScanIndex(DataRec Case, Index Node, float MinD)
+void ScanIndex(NNSearch S, DataRec Case, Index Node, float MinD)
 /*   ---------  */
 {
   CaseNo Xp;
   DiscrValue Forks, First, v;
   float NewMinD, SaveAttMinD;
   Attribute Att;
+  NNEnvRec *E = S->Env;
 
   if (Node == Nil)
     return;
 
   if (!(Att = Node->Tested)) {
-    ForEach(Xp, Node->IFp, Node->ILp) { CheckDistance(Case, Xp); }
-  } else if (Max(Node->MinDRef[0] - DRef1(Case),
-                 DRef1(Case) - Node->MaxDRef[0]) <=
-                 *GNNEnv.WorstBest + 0.5 / DPREC &&
-             Max(Node->MinDRef[1] - DRef2(Case),
-                 DRef2(Case) - Node->MaxDRef[1]) <=
-                 *GNNEnv.WorstBest + 0.5 / DPREC) {
-    if (Discrete(Att)) {
+    ForEach(Xp, Node->IFp, Node->ILp) { CheckDistance(S, Case, Xp); }
+  } else if (Max(Node->MinDRef[0] - S->DRef[0],
+                 S->DRef[0] - Node->MaxDRef[0]) <=
+                 *E->WorstBest + 0.5 / DPREC &&
+             Max(Node->MinDRef[1] - S->DRef[1],
+                 S->DRef[1] - Node->MaxDRef[1]) <=
+                 *E->WorstBest + 0.5 / DPREC) {
+    if (!SContinuous(S, Att)) {
       First = DVal(Case, Att);
-      Forks = MaxAttVal[Att];
+      Forks = S->MaxAttVal[Att];
     } else {
       First = (NotApplic(Case, Att) ? 1 : CVal(Case, Att) <= Node->Cut ? 2 : 3);
       Forks = 3;
@@ -701,30 +758,31 @@ void ScanIndex(DataRec Case, Index Node, float MinD)
         as can improve on current best neighbors  */
 
     if (First <= Forks) {
-      ScanIndex(Case, Node->SubIndex[First], MinD);
+      ScanIndex(S, Case, Node->SubIndex[First], MinD);
     }
 
-    SaveAttMinD = GNNEnv.AttMinD[Att];
+    SaveAttMinD = E->AttMinD[Att];
 
     ForEach(v, 1, Forks) {
       if (v == First || !Node->SubIndex[v])
         continue;
 
-      GNNEnv.AttMinD[Att] =
+      E->AttMinD[Att] =
           (v == 1 || First == 1
                ? 1.0
-               : Continuous(Att)
-                     ? CVDiff(Case, Node->Cut, Att)
-                     : Ordered(Att) ? abs(v - First) / (MaxAttVal[Att] - 1)
-                                    : 2.0 / (MaxAttVal[Att] - 1));
-      NewMinD = MinD + GNNEnv.AttMinD[Att] - SaveAttMinD;
-
-      if (NewMinD <= *GNNEnv.WorstBest + 0.5 / DPREC) {
-        ScanIndex(Case, Node->SubIndex[v], NewMinD);
+               : SContinuous(S, Att)
+                     ? SCVDiff(S, Case, Node->Cut, Att)
+                     : SOrdered(S, Att)
+                           ? abs(v - First) / (S->MaxAttVal[Att] - 1)
+                           : 2.0 / (S->MaxAttVal[Att] - 1));
+      NewMinD = MinD + E->AttMinD[Att] - SaveAttMinD;
+
+      if (NewMinD <= *E->WorstBest + 0.5 / DPREC) {
+        ScanIndex(S, Case, Node->SubIndex[v], NewMinD);
       }
     }
 
-    GNNEnv.AttMinD[Att] = SaveAttMinD;
+    E->AttMinD[Att] = SaveAttMinD;
   }
 }
 
@@ -746,6 +804,190 @@ void FreeIndex(Index Node)
   Free(Node);
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Save the instances in KDTree order, their values predicted by the */
+/* ruleset, the reference points and the KD-tree itself so that a */
+/* model can be loaded again without reading the data and rebuilding */
+/* the index.  The limits on predictions that reading the data sets */
+/* are saved too, since the model file only records them rounded.  */
+/* The values are written as they are held in memory, so */
+/* the header records enough for RestoreInstances() to check that they */
+/* are being read on the same kind of machine.  SaveInstances closes */
+/* the file.        */
+/*                                                                       */
+/*************************************************************************/
+
+#define INDEXMAGIC 0x4b444258 /* identifies a saved index */
+#define INDEXVERSION 2
+#define INDEXHEADER 6
+
+static int IndexHeader[INDEXHEADER] = {
+    INDEXMAGIC,       INDEXVERSION,      sizeof(AttValue),
+    sizeof(ContValue), sizeof(Attribute), sizeof(CaseNo)};
+
+void SaveInstances(FILE *F)
+/*   -------------  */
+{
+  fwrite(IndexHeader, sizeof(int), INDEXHEADER, F);
+  fwrite(&MaxAtt, sizeof(Attribute), 1, F);
+  fwrite(&MaxInstance, sizeof(CaseNo), 1, F);
+  fwrite(&Ceiling, sizeof(ContValue), 1, F);
+  fwrite(&Floor, sizeof(ContValue), 1, F);
+
+  fwrite(KDBlock, sizeof(AttValue), (MaxInstance + 1) * (MaxAtt + 3), F);
+  fwrite(RSPredVal, sizeof(float), MaxInstance + 1, F);
+  fwrite(Ref[0], sizeof(AttValue), MaxAtt + 1, F);
+  fwrite(Ref[1], sizeof(AttValue), MaxAtt + 1, F);
+
+  SaveIndex(KDTree, F);
+
+  fclose(F);
+}
+
+void SaveIndex(Index Node, FILE *F)
+/*   ---------  */
+{
+  DiscrValue v, Forks;
+  Attribute Att;
+
+  /*  Missing sub-indices are written as an attribute of -1  */
+
+  Att = (Node ? Node->Tested : -1);
+  fwrite(&Att, sizeof(Attribute), 1, F);
+  if (Node == Nil)
+    return;
+
+  fwrite(&Node->Cut, sizeof(ContValue), 1, F);
+  fwrite(Node->MinDRef, sizeof(ContValue), 2, F);
+  fwrite(Node->MaxDRef, sizeof(ContValue), 2, F);
+  fwrite(&Node->IFp, sizeof(CaseNo), 1, F);
+  fwrite(&Node->ILp, sizeof(CaseNo), 1, F);
+
+  if (Att) {
+    Forks = (Discrete(Att) ? MaxAttVal[Att] : 3);
+    ForEach(v, 1, Forks) { SaveIndex(Node->SubIndex[v], F); }
+  }
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Restore what SaveInstances() wrote in place of InitialiseInstances() */
+/* and CopyInstances().  Returns binfalse, leaving nothing allocated, */
+/* if the file was not written for this model on this kind of machine */
+/* so that the caller can build the index from the data instead.  */
+/* RestoreInstances closes the file.     */
+/*                                                                       */
+/*************************************************************************/
+
+Boolean RestoreInstances(RRuleSet *Cttee, FILE *F)
+/*      ----------------  */
+{
+  int Header[INDEXHEADER];
+  Attribute Atts;
+  CaseNo Instances, i;
+  ContValue Limits[2];
+  size_t Values;
+  Boolean OK;
+
+  OK = fread(Header, sizeof(int), INDEXHEADER, F) == INDEXHEADER &&
+       !memcmp(Header, IndexHeader, sizeof(Header)) &&
+       fread(&Atts, sizeof(Attribute), 1, F) == 1 && Atts == MaxAtt &&
+       fread(&Instances, sizeof(CaseNo), 1, F) == 1 && Instances >= 0 &&
+       fread(Limits, sizeof(ContValue), 2, F) == 2;
+
+  if (OK) {
+    MaxInstance = Instances;
+    Values = (MaxInstance + 1) * (size_t)(MaxAtt + 3);
+
+    KDBlock = Alloc(Values, AttValue);
+    Instance = Alloc(MaxInstance + 1, DataRec);
+    ForEach(i, 0, MaxInstance) { Instance[i] = KDBlock + i * (MaxAtt + 3); }
+
+    RSPredVal = Alloc(MaxInstance + 1, float);
+    Ref[0] = Alloc(MaxAtt + 1, AttValue);
+    Ref[1] = Alloc(MaxAtt + 1, AttValue);
+
+    OK = fread(KDBlock, sizeof(AttValue), Values, F) == Values &&
+         fread(RSPredVal, sizeof(float), MaxInstance + 1, F) ==
+             (size_t)(MaxInstance + 1) &&
+         fread(Ref[0], sizeof(AttValue), MaxAtt + 1, F) ==
+             (size_t)(MaxAtt + 1) &&
+         fread(Ref[1], sizeof(AttValue), MaxAtt + 1, F) ==
+             (size_t)(MaxAtt + 1);
+
+    if (OK) {
+      KDTree = RestoreIndex(F, &OK);
+    }
+  }
+
+  fclose(F);
+
+  if (!OK) {
+    FreeIndex(KDTree);
+    KDTree = Nil;
+    FreeUnlessNil(Ref[0]);
+    Ref[0] = Nil;
+    FreeUnlessNil(Ref[1]);
+    Ref[1] = Nil;
+    FreeInstances();
+    MaxInstance = -1;
+
+    return binfalse;
+  }
+
+  Ceiling = Limits[0];
+  Floor = Limits[1];
+
+  GNNEnv.AttMinD = Alloc(MaxAtt + 1, float);
+  SetNeighborParameters(Cttee);
+
+  return bintrue;
+}
+
+Index RestoreIndex(FILE *F, Boolean *OK)
+/*    ------------  */
+{
+  Index Node;
+  DiscrValue v, Forks;
+  Attribute Att;
+
+  if (fread(&Att, sizeof(Attribute), 1, F) != 1 || Att < -1 || Att > MaxAtt) {
+    *OK = binfalse;
+    return Nil;
+  }
+
+  if (Att < 0)
+    return Nil;
+
+  Node = AllocZero(1, IndexRec);
+
+  /*  Leaves must refer to instances that exist  */
+
+  if (fread(&Node->Cut, sizeof(ContValue), 1, F) != 1 ||
+      fread(Node->MinDRef, sizeof(ContValue), 2, F) != 2 ||
+      fread(Node->MaxDRef, sizeof(ContValue), 2, F) != 2 ||
+      fread(&Node->IFp, sizeof(CaseNo), 1, F) != 1 ||
+      fread(&Node->ILp, sizeof(CaseNo), 1, F) != 1 || Node->IFp < 0 ||
+      Node->ILp > MaxInstance) {
+    *OK = binfalse;
+    return Node;
+  }
+
+  if ((Node->Tested = Att)) {
+    Forks = (Discrete(Att) ? MaxAttVal[Att] : 3);
+    Node->SubIndex = AllocZero(Forks + 1, Index);
+
+    ForEach(v, 1, Forks) {
+      Node->SubIndex[v] = RestoreIndex(F, OK);
+      if (!*OK)
+        break;
+    }
+  }
+
+  return Node;
+}
+
 void FreeInstances(void)
 /*   -------------  */
 {
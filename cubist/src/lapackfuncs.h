@@ -0,0 +1,23 @@
+#ifndef _LAPACKFUNCS_H_
+#define _LAPACKFUNCS_H_
+
+/*
+ * LAPACK routines for solving the normal equations of the linear models
+ * by Cholesky factorization.  The C library isn't linked against LAPACK,
+ * so the caller passes in the routines it has (the Python module takes
+ * them from SciPy), or no routines to solve by elimination.
+ */
+typedef void (*potrf_func)(char *uplo, int *n, double *a, int *lda,
+                           int *info);
+typedef void (*potrs_func)(char *uplo, int *n, int *nrhs, double *a,
+                           int *lda, double *b, int *ldb, int *info);
+typedef void (*potri_func)(char *uplo, int *n, double *a, int *lda,
+                           int *info);
+
+typedef struct _lapack_functions {
+  potrf_func potrf; /* Cholesky factorization */
+  potrs_func potrs; /* solve using the factorization */
+  potri_func potri; /* invert using the factorization */
+} LapackFunctions;
+
+#endif
@@ -35,7 +35,7 @@
 #include "redefine.h"
 #include "transform.h"
 
-int Entry;
+THREAD_LOCAL int Entry;
 
 char *Prop[] = {"null",   "id",      "att",    "elts",  "prec",   "globalmean",
                 "floor",  "ceiling", "sample", "init",  "mean",   "sd",
@@ -44,8 +44,8 @@ char *Prop[] = {"null",   "id",      "att",    "elts",  "prec",   "globalmean",
                 "type",   "cut",     "result", "val",   "coeff",  "max",
                 "min",    "redn"};
 
-char PropName[20], *PropVal = Nil, *Unquoted;
-int PropValSize = 0;
+THREAD_LOCAL char PropName[20], *PropVal = Nil, *Unquoted;
+THREAD_LOCAL int PropValSize = 0;
 
 #define PROPS 31
 
@@ -91,7 +91,7 @@ int PropValSize = 0;
 void CheckFile(String Extension, Boolean Write)
 /*   ---------  */
 {
-  static char *LastExt = "";
+  static THREAD_LOCAL char *LastExt = "";
 
   if (!Mf || strcmp(LastExt, Extension)) {
     LastExt = Extension;
@@ -508,6 +508,40 @@ RRuleSet *GetCommittee(String Extension)
   return (ErrMsgs ? Nil : Cttee);
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Retrieve the rulesets of a committee saved with extension  */
+/* Extension, skipping the header since the data properties it  */
+/* holds are found again from the data.  The number of rulesets  */
+/* is set in *N.  Returns Nil if there is no such file    */
+/*                                                                       */
+/*************************************************************************/
+
+RRuleSet *GetCommitteeRules(String Extension, int *N)
+/*  -----------------  */
+{
+  RRuleSet *Cttee;
+  int m;
+  char Delim;
+
+  if (!(Mf = GetFile(Extension, "r")))
+    return Nil;
+
+  while (ReadProp(&Delim) != ENTRIESP)
+    ;
+  sscanf(PropVal, "\"%d\"", N);
+  Entry = 0;
+
+  Cttee = Alloc(*N, RRuleSet);
+
+  ForEach(m, 0, *N - 1) { Cttee[m] = InRules(); }
+
+  fclose(Mf);
+  Mf = Nil;
+
+  return Cttee;
+}
+
 RRuleSet InRules(void)
 /*  -------  */
 {
@@ -608,6 +642,25 @@ CRule InRule(void)
     }
   } while (Delim == ' ');
 
+  /*  Keep a compact list of the nonzero coefficients so that predictions
+      don't have to visit every attribute  */
+
+  ForEach(Att, 1, MaxAtt) {
+    if (fabs(R->Rhs[Att]) > 0) {
+      R->NCoeff++;
+    }
+  }
+
+  R->CoeffAtt = Alloc(R->NCoeff + 1, Attribute);
+  R->Coeff = Alloc(R->NCoeff + 1, double);
+  R->NCoeff = 0;
+  ForEach(Att, 1, MaxAtt) {
+    if (fabs(R->Rhs[Att]) > 0) {
+      R->CoeffAtt[R->NCoeff] = Att;
+      R->Coeff[R->NCoeff++] = R->Rhs[Att];
+    }
+  }
+
   return R;
 }
 
@@ -674,6 +727,20 @@ Condition InCondition(void)
 /*                                                                       */
 /*************************************************************************/
 
+/*************************************************************************/
+/*                                                                       */
+/* Free the buffer for property values, which is kept per thread  */
+/*                                                                       */
+/*************************************************************************/
+
+void FreePropVal(void)
+/*   -----------  */
+{
+  free(PropVal);
+  PropVal = Nil;
+  PropValSize = 0;
+}
+
 int ReadProp(char *Delim)
 /*  --------  */
 {
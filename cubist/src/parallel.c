@@ -0,0 +1,355 @@
+/*************************************************************************/
+/*                                                                       */
+/*  Evaluation of the attributes at a node by several threads            */
+/*  ---------------------------------------------------------            */
+/*                                                                       */
+/*  Every thread has its own copy of the thread local globals, so the    */
+/*  worker threads are given the calling thread's cases and attribute    */
+/*  tables for each node, along with sorting and value sum scratch of    */
+/*  their own.  An attribute is evaluated by exactly one thread, which   */
+/*  writes only that attribute's GEnv.Gain, GEnv.Bar and GEnv.Subset     */
+/*  entries.  The best attribute is then chosen by the calling thread    */
+/*  in attribute order, so the tree is the same as a serial build.       */
+/*                                                                       */
+/*************************************************************************/
+
+#ifdef _WIN32
+#define WIN32_LEAN_AND_MEAN
+#include <windows.h>
+#else
+#include <pthread.h>
+#endif
+
+#include "defns.h"
+#include "extern.h"
+
+#ifdef _WIN32
+typedef HANDLE ThreadId;
+typedef CRITICAL_SECTION ThreadLock;
+typedef CONDITION_VARIABLE ThreadCond;
+#define ThreadResult DWORD WINAPI
+#define InitMutex(m) InitializeCriticalSection(m)
+#define FreeMutex(m) DeleteCriticalSection(m)
+#define LockMutex(m) EnterCriticalSection(m)
+#define UnlockMutex(m) LeaveCriticalSection(m)
+#define InitCondition(c) InitializeConditionVariable(c)
+#define FreeCondition(c)
+#define WaitCondition(c, m) SleepConditionVariableCS(c, m, INFINITE)
+#define SignalAll(c) WakeAllConditionVariable(c)
+#else
+typedef pthread_t ThreadId;
+typedef pthread_mutex_t ThreadLock;
+typedef pthread_cond_t ThreadCond;
+#define ThreadResult void *
+#define InitMutex(m) pthread_mutex_init(m, Nil)
+#define FreeMutex(m) pthread_mutex_destroy(m)
+#define LockMutex(m) pthread_mutex_lock(m)
+#define UnlockMutex(m) pthread_mutex_unlock(m)
+#define InitCondition(c) pthread_cond_init(c, Nil)
+#define FreeCondition(c) pthread_cond_destroy(c)
+#define WaitCondition(c, m) pthread_cond_wait(c, m)
+#define SignalAll(c) pthread_cond_broadcast(c)
+#endif
+
+typedef struct _pool_rec *Pool;
+
+typedef struct _worker_rec {
+  Pool P;             /* pool of this worker */
+  ThreadId Id;        /* its thread */
+  SortRec *SRec;      /* its sorting cache */
+  double *ValFreq,    /* its value counts */
+      *ValSum,        /* its value sums */
+      *ValSumSq;      /* ditto sum squares */
+  Boolean *Left;      /* its subset scratch */
+} WorkerRec;
+
+typedef struct _pool_rec {
+  int NSlot,          /* workers allocated */
+      NWorker;        /* workers with a thread */
+  WorkerRec *Worker;  /* [NSlot] */
+  ThreadLock Lock;    /* guards the fields below */
+  ThreadCond Start,   /* a job or quit has been posted */
+      Done;           /* the last worker has finished a job */
+  int Job,            /* number of jobs posted */
+      Busy,           /* workers yet to finish the job */
+      NextAtt;        /* next entry of EvalAtt to evaluate */
+  Boolean Quit;       /* workers are to exit */
+
+  /*  The job and the calling thread's globals that it reads  */
+
+  Tree Node;
+  CaseNo Fp, Lp;
+  Attribute *EvalAtt;
+  int NEvalAtt;
+  DataRec *Case;
+  int MaxAtt;
+  Attribute CWtAtt;
+  DiscrValue *MaxAttVal;
+  char *SpecialStatus;
+  CaseCount MINITEMS;
+  float *Gain;
+  ContValue *Bar;
+  Set **Subset;
+  ContValue **BinCut;
+  int *NBinCut;
+  OrderRec **Order;
+  AttValue **Col;
+  ContValue *ColResid;
+} PoolRec;
+
+static THREAD_LOCAL Pool EvalPool = Nil;
+
+/*************************************************************************/
+/*                                                                       */
+/* Evaluate a split on attribute Att for the cases Fp through Lp         */
+/*                                                                       */
+/*************************************************************************/
+
+static void EvalAtt(Tree Node, Attribute Att, CaseNo Fp, CaseNo Lp)
+/*          -------  */
+{
+  if (Discrete(Att)) {
+    EvalDiscreteAtt(Node, Att, Fp, Lp);
+  } else {
+    EvalContinuousAtt(Node, Att, Fp, Lp);
+  }
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Evaluate attributes of the current job until none are left            */
+/*                                                                       */
+/*************************************************************************/
+
+static void EvalJob(Pool P)
+/*          -------  */
+{
+  int i;
+
+  while (bintrue) {
+    LockMutex(&P->Lock);
+    i = P->NextAtt++;
+    UnlockMutex(&P->Lock);
+
+    if (i >= P->NEvalAtt)
+      break;
+
+    EvalAtt(P->Node, P->EvalAtt[i], P->Fp, P->Lp);
+  }
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Body of a worker thread: take part in each job that is posted         */
+/*                                                                       */
+/*************************************************************************/
+
+static ThreadResult EvalWorker(void *Arg)
+/*                  ----------  */
+{
+  WorkerRec *W = (WorkerRec *)Arg;
+  Pool P = W->P;
+  int Job = 0;
+
+  SRec = W->SRec;
+  GEnv.ValFreq = W->ValFreq;
+  GEnv.ValSum = W->ValSum;
+  GEnv.ValSumSq = W->ValSumSq;
+  GEnv.Left = W->Left;
+
+  LockMutex(&P->Lock);
+  while (bintrue) {
+    while (P->Job == Job && !P->Quit) {
+      WaitCondition(&P->Start, &P->Lock);
+    }
+    if (P->Quit)
+      break;
+
+    Job = P->Job;
+    UnlockMutex(&P->Lock);
+
+    Case = P->Case;
+    MaxAtt = P->MaxAtt;
+    CWtAtt = P->CWtAtt;
+    MaxAttVal = P->MaxAttVal;
+    SpecialStatus = P->SpecialStatus;
+    MINITEMS = P->MINITEMS;
+    GEnv.Gain = P->Gain;
+    GEnv.Bar = P->Bar;
+    GEnv.Subset = P->Subset;
+    GEnv.BinCut = P->BinCut;
+    GEnv.NBinCut = P->NBinCut;
+    GEnv.Order = P->Order;
+    GEnv.Col = P->Col;
+    GEnv.ColResid = P->ColResid;
+
+    EvalJob(P);
+
+    LockMutex(&P->Lock);
+    if (--P->Busy == 0) {
+      SignalAll(&P->Done);
+    }
+  }
+  UnlockMutex(&P->Lock);
+
+  return 0;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Start THREADS-1 worker threads, each with its own scratch.  All       */
+/* allocation is done here so that errors occur in the calling thread.   */
+/*                                                                       */
+/*************************************************************************/
+
+void StartEvalThreads(void)
+/*   ----------------  */
+{
+  Pool P;
+  WorkerRec *W;
+  int w;
+
+  if (THREADS <= 1 || EvalPool || VERBOSITY >= 2)
+    return;
+
+  P = AllocZero(1, PoolRec);
+  InitMutex(&P->Lock);
+  InitCondition(&P->Start);
+  InitCondition(&P->Done);
+  EvalPool = P;
+
+  P->Worker = AllocZero(THREADS - 1, WorkerRec);
+  P->NSlot = THREADS - 1;
+
+  ForEach(w, 0, P->NSlot - 1) {
+    W = &P->Worker[w];
+    W->P = P;
+    W->SRec = Alloc(MaxCase + 1, SortRec);
+    W->ValFreq = Alloc(MaxDiscrVal + 1, double);
+    W->ValSum = Alloc(MaxDiscrVal + 1, double);
+    W->ValSumSq = Alloc(MaxDiscrVal + 1, double);
+    W->Left = Alloc(MaxDiscrVal + 1, Boolean);
+  }
+
+  /*  Use as many threads as can be created  */
+
+  ForEach(w, 0, P->NSlot - 1) {
+    W = &P->Worker[w];
+#ifdef _WIN32
+    if (!(W->Id = CreateThread(Nil, 0, EvalWorker, W, 0, Nil)))
+      break;
+#else
+    if (pthread_create(&W->Id, Nil, EvalWorker, W))
+      break;
+#endif
+    P->NWorker++;
+  }
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Stop the worker threads and free their scratch                        */
+/*                                                                       */
+/*************************************************************************/
+
+void StopEvalThreads(void)
+/*   ---------------  */
+{
+  Pool P;
+  WorkerRec *W;
+  int w;
+
+  if (!(P = EvalPool))
+    return;
+
+  LockMutex(&P->Lock);
+  P->Quit = bintrue;
+  SignalAll(&P->Start);
+  UnlockMutex(&P->Lock);
+
+  ForEach(w, 0, P->NWorker - 1) {
+#ifdef _WIN32
+    WaitForSingleObject(P->Worker[w].Id, INFINITE);
+    CloseHandle(P->Worker[w].Id);
+#else
+    pthread_join(P->Worker[w].Id, Nil);
+#endif
+  }
+
+  ForEach(w, 0, P->NSlot - 1) {
+    W = &P->Worker[w];
+    FreeUnlessNil(W->SRec);
+    FreeUnlessNil(W->ValFreq);
+    FreeUnlessNil(W->ValSum);
+    FreeUnlessNil(W->ValSumSq);
+    FreeUnlessNil(W->Left);
+  }
+  FreeUnlessNil(P->Worker);
+
+  FreeCondition(&P->Done);
+  FreeCondition(&P->Start);
+  FreeMutex(&P->Lock);
+  free(P);
+
+  EvalPool = Nil;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Evaluate the attributes GEnv.EvalAtt for the cases Fp through Lp,     */
+/* sharing them among the worker threads when there are enough cases     */
+/*                                                                       */
+/*************************************************************************/
+
+void EvalAtts(Tree Node, CaseNo Fp, CaseNo Lp)
+/*   --------  */
+{
+  Pool P = EvalPool;
+  int i;
+
+  if (!P || !P->NWorker || Lp - Fp + 1 < PARCASES || GEnv.NEvalAtt < 2) {
+    ForEach(i, 0, GEnv.NEvalAtt - 1) {
+      EvalAtt(Node, GEnv.EvalAtt[i], Fp, Lp);
+    }
+    return;
+  }
+
+  LockMutex(&P->Lock);
+
+  P->Node = Node;
+  P->Fp = Fp;
+  P->Lp = Lp;
+  P->EvalAtt = GEnv.EvalAtt;
+  P->NEvalAtt = GEnv.NEvalAtt;
+  P->Case = Case;
+  P->MaxAtt = MaxAtt;
+  P->CWtAtt = CWtAtt;
+  P->MaxAttVal = MaxAttVal;
+  P->SpecialStatus = SpecialStatus;
+  P->MINITEMS = MINITEMS;
+  P->Gain = GEnv.Gain;
+  P->Bar = GEnv.Bar;
+  P->Subset = GEnv.Subset;
+  P->BinCut = GEnv.BinCut;
+  P->NBinCut = GEnv.NBinCut;
+  P->Order = GEnv.Order;
+  P->Col = GEnv.Col;
+  P->ColResid = GEnv.ColResid;
+
+  P->NextAtt = 0;
+  P->Busy = P->NWorker;
+  P->Job++;
+  SignalAll(&P->Start);
+
+  UnlockMutex(&P->Lock);
+
+  /*  This thread evaluates attributes too, then waits for the workers  */
+
+  EvalJob(P);
+
+  LockMutex(&P->Lock);
+  while (P->Busy) {
+    WaitCondition(&P->Done, &P->Lock);
+  }
+  UnlockMutex(&P->Lock);
+}
@@ -54,26 +54,83 @@ float PredictValue(RRuleSet *Cttee, DataRec CaseDesc)
   return PredSum / MEMBERS;
 }
 
+static double RuleValue(CRule R, DataRec CaseDesc)
+/*            ---------  */
+{
+  double Val = R->Rhs[0];
+  Attribute Att;
+  int c;
+
+  /*  Evaluate RHS.  Cannot use RawLinModel() because
+      have not run FindModelAtts().  Loaded models have a list of the
+      nonzero coefficients; models being built only have Rhs  */
+
+  if (R->Coeff) {
+    ForEach(c, 0, R->NCoeff - 1) {
+      Val += CVal(CaseDesc, R->CoeffAtt[c]) * R->Coeff[c];
+    }
+  } else {
+    ForEach(Att, 1, MaxAtt) { Val += CVal(CaseDesc, Att) * R->Rhs[Att]; }
+  }
+
+  return (Val < R->LoLim ? R->LoLim : Val > R->HiLim ? R->HiLim : Val);
+}
+
 float RuleSetPrediction(RRuleSet RS, DataRec CaseDesc)
 /*    -----------------  */
 {
-  double Sum = 0, Weight = 0, Val;
-  int r;
+  return RuleSetPath(RS, CaseDesc, Nil, Nil);
+}
+
+/*************************************************************************/
+/*                                                                */
+/* As RuleSetPrediction, also recording the numbers of the rules */
+/* that apply to the case in order in Fired (unless it is Nil) and */
+/* their count in *NFired       */
+/*                                                                */
+/*************************************************************************/
+
+float RuleSetPath(RRuleSet RS, DataRec CaseDesc, RuleNo *Fired, int *NFired)
+/*    -----------  */
+{
+  double Sum = 0, Weight = 0;
+  int r, w, b;
   CRule R;
-  Attribute Att;
+  RuleBits Satisfied[MAXINDEXWORDS];
 
-  ForEach(r, 1, RS->SNRules) {
-    R = RS->SRule[r];
+  if (Fired)
+    *NFired = 0;
 
-    if (Matches(R, CaseDesc)) {
-      /*  Evaluate RHS.  Cannot use RawLinModel() because
-          have not run FindModelAtts()  */
+#define AddRule(R)                                                             \
+  {                                                                            \
+    Sum += RuleValue(R, CaseDesc);                                             \
+    Weight += 1.0;                                                             \
+    if (Fired)                                                                 \
+      Fired[(*NFired)++] = r;                                                  \
+  }
 
-      Val = R->Rhs[0];
-      ForEach(Att, 1, MaxAtt) { Val += CVal(CaseDesc, Att) * R->Rhs[Att]; }
+  if (RS->RIndex && FindSatisfiedRules(RS->RIndex, CaseDesc, Satisfied)) {
+    /*  Only visit the rules that the index shows match, still in order  */
 
-      Sum += (Val < R->LoLim ? R->LoLim : Val > R->HiLim ? R->HiLim : Val);
-      Weight += 1.0;
+    ForEach(w, 0, RS->RIndex->Words - 1) {
+      if (!Satisfied[w])
+        continue;
+
+      ForEach(b, 0, 63) {
+        if ((Satisfied[w] >> b) & 1) {
+          r = (w << 6) + b;
+          R = RS->SRule[r];
+          AddRule(R);
+        }
+      }
+    }
+  } else {
+    ForEach(r, 1, RS->SNRules) {
+      R = RS->SRule[r];
+
+      if (Matches(R, CaseDesc)) {
+        AddRule(R);
+      }
     }
   }
 
@@ -104,6 +161,234 @@ Boolean Matches(CRule R, DataRec Case)
   return bintrue;
 }
 
+/*************************************************************************/
+/*                 */
+/* Build an index of the conditions of a ruleset that is to be used */
+/* for many predictions (see RuleIndexRec).  Returns Nil if the  */
+/* ruleset is too large for the index to be worthwhile.   */
+/*                 */
+/*************************************************************************/
+
+#define MAXINDEXSIZE (1 << 21) /* most words in all sets of rules */
+
+static int CompareCuts(const void *A, const void *B)
+/*         -----------  */
+{
+  ContValue a = *(const ContValue *)A, b = *(const ContValue *)B;
+
+  return (a < b ? -1 : a > b);
+}
+
+RuleIndex BuildRuleIndex(RRuleSet RS)
+/*        --------------  */
+{
+  RuleIndex RX;
+  Attribute Att;
+  RuleNo r;
+  CRule R;
+  Condition C;
+  DataRec Rep;
+  RuleBits *Set;
+  Boolean *Tested, *Thresh, Sat;
+  int a, d, i, j, NVal, NCut, NCond = 0, Size = 0;
+
+  if (RS->SNRules > MAXINDEXRULES)
+    return Nil;
+
+  /*  Find the attributes tested and whether they are tested against
+      thresholds  */
+
+  Tested = AllocZero(MaxAtt + 1, Boolean);
+  Thresh = AllocZero(MaxAtt + 1, Boolean);
+
+  ForEach(r, 1, RS->SNRules) {
+    R = RS->SRule[r];
+    ForEach(d, 1, R->Size) {
+      C = R->Lhs[d];
+      Tested[C->Tested] = bintrue;
+      Thresh[C->Tested] = (C->NodeType == BrThresh);
+      NCond++;
+    }
+  }
+
+  RX = AllocZero(1, RuleIndexRec);
+  RX->NRules = RS->SNRules;
+  RX->Words = (RS->SNRules >> 6) + 1;
+  RX->Att = Alloc(MaxAtt + 1, Attribute);
+
+  ForEach(Att, 1, MaxAtt) {
+    if (Tested[Att]) {
+      RX->Att[RX->NAtt++] = Att;
+    }
+  }
+  Free(Tested);
+
+  RX->NCut = Alloc(RX->NAtt, int);
+  RX->Cut = AllocZero(RX->NAtt, ContValue *);
+  RX->Satisfy = AllocZero(RX->NAtt, RuleBits *);
+
+  Rep = AllocZero(MaxAtt + 1, AttValue);
+
+  ForEach(a, 0, RX->NAtt - 1) {
+    Att = RX->Att[a];
+
+    /*  Thresholds are sorted with duplicates removed.  Their intervals
+        are N/A, <= first threshold, ..., > last threshold  */
+
+    NCut = 0;
+    if (Thresh[Att]) {
+      RX->Cut[a] = Alloc(NCond, ContValue);
+      ForEach(r, 1, RS->SNRules) {
+        R = RS->SRule[r];
+        ForEach(d, 1, R->Size) {
+          if (R->Lhs[d]->Tested == Att) {
+            RX->Cut[a][NCut++] = R->Lhs[d]->Cut;
+          }
+        }
+      }
+
+      qsort(RX->Cut[a], NCut, sizeof(ContValue), CompareCuts);
+      j = 0;
+      ForEach(i, 0, NCut - 1) {
+        if (!i || RX->Cut[a][i] != RX->Cut[a][j - 1]) {
+          RX->Cut[a][j++] = RX->Cut[a][i];
+        }
+      }
+      RX->NCut[a] = NCut = j;
+      NVal = NCut + 2;
+    } else {
+      RX->NCut[a] = -1;
+      NVal = MaxAttVal[Att] + 1;
+    }
+
+    if ((Size += NVal * RX->Words) > MAXINDEXSIZE) {
+      Free(Thresh);
+      Free(Rep);
+      FreeRuleIndex(RX);
+      return Nil;
+    }
+
+    RX->Satisfy[a] = AllocZero(NVal * RX->Words, RuleBits);
+
+    /*  Find the rules whose conditions on Att are satisfied by a value
+        representing each interval (or each discrete value)  */
+
+    ForEach(i, 0, NVal - 1) {
+      if (!Thresh[Att]) {
+        DVal(Rep, Att) = i;
+      } else if (!i) {
+        DVal(Rep, Att) = NA;
+      } else if (i <= NCut) {
+        CVal(Rep, Att) = RX->Cut[a][i - 1];
+      } else {
+        /*  Not <= any threshold, as for values above the last one  */
+
+        CVal(Rep, Att) = NAN;
+      }
+
+      Set = RX->Satisfy[a] + i * RX->Words;
+      ForEach(r, 1, RS->SNRules) {
+        R = RS->SRule[r];
+        Sat = bintrue;
+        ForEach(d, 1, R->Size) {
+          C = R->Lhs[d];
+          if (C->Tested == Att && !Satisfies(Rep, C)) {
+            Sat = binfalse;
+            break;
+          }
+        }
+
+        if (Sat) {
+          Set[r >> 6] |= (RuleBits)1 << (r & 63);
+        }
+      }
+    }
+  }
+
+  Free(Thresh);
+  Free(Rep);
+
+  return RX;
+}
+
+/*************************************************************************/
+/*                 */
+/* Find the rules of an indexed ruleset whose conditions are all  */
+/* satisfied by a case.  Returns binfalse if the case has a value  */
+/* that the index doesn't cover so that the rules must be checked  */
+/* one by one.         */
+/*                 */
+/*************************************************************************/
+
+Boolean FindSatisfiedRules(RuleIndex RX, DataRec Case, RuleBits *Rules)
+/*      ------------------  */
+{
+  Attribute Att;
+  DiscrValue v;
+  ContValue cv;
+  RuleBits *Set;
+  int a, w, Lo, Hi, Mid, NCut;
+
+  ForEach(w, 0, RX->Words - 1) { Rules[w] = ~(RuleBits)0; }
+
+  ForEach(a, 0, RX->NAtt - 1) {
+    Att = RX->Att[a];
+
+    if ((NCut = RX->NCut[a]) < 0) {
+      if ((v = DVal(Case, Att)) < 0 || v > MaxAttVal[Att])
+        return binfalse;
+    } else if (NotApplic(Case, Att)) {
+      v = 0;
+    } else {
+      /*  The interval follows the thresholds that the value is not
+          <= to, as tested by Satisfies()  */
+
+      cv = CVal(Case, Att);
+      Lo = 0;
+      Hi = NCut;
+      while (Lo < Hi) {
+        Mid = (Lo + Hi) / 2;
+        if (cv <= RX->Cut[a][Mid]) {
+          Hi = Mid;
+        } else {
+          Lo = Mid + 1;
+        }
+      }
+      v = Lo + 1;
+    }
+
+    Set = RX->Satisfy[a] + v * RX->Words;
+    ForEach(w, 0, RX->Words - 1) { Rules[w] &= Set[w]; }
+  }
+
+  /*  Rule numbers start at 1 and end at NRules  */
+
+  Rules[0] &= ~(RuleBits)1;
+  Rules[RX->Words - 1] &= ((RuleBits)2 << (RX->NRules & 63)) - 1;
+
+  return bintrue;
+}
+
+void FreeRuleIndex(RuleIndex RX)
+/*   -------------  */
+{
+  int a;
+
+  if (RX == Nil)
+    return;
+
+  ForEach(a, 0, RX->NAtt - 1) {
+    FreeUnlessNil(RX->Cut[a]);
+    FreeUnlessNil(RX->Satisfy[a]);
+  }
+
+  FreeUnlessNil(RX->Att);
+  FreeUnlessNil(RX->NCut);
+  FreeUnlessNil(RX->Cut);
+  FreeUnlessNil(RX->Satisfy);
+  Free(RX);
+}
+
 /*************************************************************************/
 /*                 */
 /* Evaluate a linear model on a case     */
@@ -135,6 +420,53 @@ float LinModel(double *Model, DataRec Case)
   return (Raw < Floor ? Floor : Raw > Ceiling ? Ceiling : Raw);
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Find the values of Model, limited to [Floor, Ceiling] if   */
+/* Bounded, for the items in places Fp to Lp of the columns, or  */
+/* in places Kept[Fp] to Kept[Lp], and save them in GEnv.ModelPred. */
+/* The items are taken in blocks, each column being read in turn  */
+/* for a block       */
+/*                                                                       */
+/*************************************************************************/
+
+void ColModelValues(double *Model, CaseNo *Kept, CaseNo Fp, CaseNo Lp,
+                    Boolean Bounded)
+/*   --------------  */
+{
+  double Sum[MODELBLOCK], Coeff;
+  CaseNo i, Bp, Ep;
+  Attribute Att, a;
+  AttValue *C;
+  float Raw;
+
+  for (Bp = Fp; Bp <= Lp; Bp = Ep + 1) {
+    Ep = Min(Bp + MODELBLOCK - 1, Lp);
+
+    ForEach(i, Bp, Ep) { Sum[i - Bp] = Model[0]; }
+
+    ForEach(a, 1, GEnv.NModelAtt) {
+      Att = GEnv.ModelAtt[a];
+      Coeff = Model[Att];
+      C = GEnv.Col[Att];
+
+      if (Kept) {
+        ForEach(i, Bp, Ep) { Sum[i - Bp] += Coeff * C[Kept[i]]._cont_val; }
+      } else {
+        ForEach(i, Bp, Ep) { Sum[i - Bp] += Coeff * C[i]._cont_val; }
+      }
+    }
+
+    ForEach(i, Bp, Ep) {
+      Raw = Sum[i - Bp];
+      if (Bounded) {
+        Raw = (Raw < Floor ? Floor : Raw > Ceiling ? Ceiling : Raw);
+      }
+      GEnv.ModelPred[i] = Raw;
+    }
+  }
+}
+
 /*************************************************************************/
 /*                                                                       */
 /* Find values predicted by a model for cases Fp to Lp.   */
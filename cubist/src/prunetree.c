@@ -28,9 +28,9 @@
 #include "redefine.h"
 #include "transform.h"
 
-double TotalErr, ExtraErr, TotalParams, ExtraParams, AdjErrLim, NewAdjErr;
+THREAD_LOCAL double TotalErr, ExtraErr, TotalParams, ExtraParams, AdjErrLim, NewAdjErr;
 
-Tree Weakest;
+THREAD_LOCAL Tree Weakest;
 #define ResidWt PResid
 
 /*************************************************************************/
@@ -258,7 +258,7 @@ void SmoothModels(Tree T, Tree Parent, CaseNo Fp, CaseNo Lp)
 
   if (CWtAtt) {
     SumWt = 0;
-    ForEach(i, Fp, Lp) { SumWt += CWeight(Case[i]); }
+    ForEach(i, Fp, Lp) { SumWt += ColWeight(i); }
   } else {
     SumWt = Lp - Fp + 1;
   }
@@ -281,7 +281,7 @@ void SmoothModels(Tree T, Tree Parent, CaseNo Fp, CaseNo Lp)
 
       SumX = SumY = SumXY = 0;
       ForEach(i, Fp, Lp) {
-        Wt = CWeight(Case[i]);
+        Wt = ColWeight(i);
 
         SumX += Wt * GEnv.Resid[i];
         SumY += Wt * GEnv.PResid[i];
@@ -320,9 +320,11 @@ void SmoothModels(Tree T, Tree Parent, CaseNo Fp, CaseNo Lp)
 
   FindModelAtts(T->Model);
 
+  ColModelValues(T->Model, Nil, Fp, Lp, binfalse);
+
   ForEach(i, Fp, Lp) {
-    GEnv.Resid[i] = RawLinModel(T->Model, Case[i]) - Class(Case[i]);
-    GEnv.ResidWt[i] = CWeight(Case[i]);
+    GEnv.Resid[i] = GEnv.ModelPred[i] - ColClass(i);
+    GEnv.ResidWt[i] = ColWeight(i);
   }
   T->Model[0] -= MedianResid(Fp, Lp, SumWt / 2);
 
@@ -342,11 +344,12 @@ double ErrVariance(double *Model, CaseNo Fp, CaseNo Lp, double *Err)
   CaseNo i;
 
   FindModelAtts(Model);
+  ColModelValues(Model, Nil, Fp, Lp, bintrue);
 
   ForEach(i, Fp, Lp) {
-    Err[i] = V = Class(Case[i]) - LinModel(Model, Case[i]);
+    Err[i] = V = ColClass(i) - GEnv.ModelPred[i];
 
-    Wt = CWeight(Case[i]);
+    Wt = ColWeight(i);
 
     SumWt += Wt;
     Sum += Wt * V;
@@ -374,10 +377,11 @@ void FindErrors(Tree T, CaseNo Fp, CaseNo Lp)
   DiscrValue v;
 
   FindModelAtts(T->Model);
+  ColModelValues(T->Model, Nil, Fp, Lp, binfalse);
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
-    Err += Wt * fabs(Class(Case[i]) - RawLinModel(T->Model, Case[i]));
+    Wt = ColWeight(i);
+    Err += Wt * fabs(ColClass(i) - GEnv.ModelPred[i]);
   }
   T->LeafErr = T->TreeErr = Err;
   T->Utility = 1E38;
@@ -45,7 +45,8 @@ int cubistmain(void)
   CaseNo SaveMaxCase, i, NCWt = 0;
   Attribute Att;
 
-  KRInit = time(0) & 07777;
+  /*  KRInit is set from the seed by setglobals() rather than the time  */
+
   StartTime = ExecTime();
   PrintHeader("");
 
@@ -122,6 +123,11 @@ int cubistmain(void)
     SingleCttee();
   }
 
+  /*  Free the tree tables, stopping any threads that evaluate attributes,
+      since the next call may have other data  */
+
+  FreeEnvData();
+
 #ifdef VerbOpt
   Cleanup();
 #endif
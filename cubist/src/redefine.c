@@ -37,7 +37,7 @@
  * This is used to save the contents of files that have been
  * created and written.
  */
-static void *strbufv;
+static THREAD_LOCAL void *strbufv;
 
 /*
  * XXX Is this called anywhere in Cubist?  It looks like it's
@@ -97,6 +97,11 @@ STRBUF *rbm_lookup(const char *filename) {
   return sb;
 }
 
+/* The columns of cases standing in for an open file, if any */
+DataColumns *rbm_columns(FILE *stream) {
+  return (DataColumns *)((STRBUF *)stream)->data;
+}
+
 FILE *rbm_fopen(const char *filename, const char *mode) {
   STRBUF *sb;
   STRBUF *id = ht_getvoid(strbufv, filename, NULL, NULL);
@@ -166,8 +171,12 @@ int rbm_fputs(const char *s, FILE *stream) {
   return strbuf_puts((STRBUF *)stream, s);
 }
 
+size_t rbm_fread(void *ptr, size_t size, size_t nitems, FILE *stream) {
+  return size ? strbuf_read((STRBUF *)stream, ptr, nitems * size) / size : 0;
+}
+
 size_t rbm_fwrite(const void *ptr, size_t size, size_t nitems, FILE *stream) {
-  return strbuf_write((STRBUF *)stream, ptr, nitems * size);
+  return strbuf_write((STRBUF *)stream, ptr, nitems * size) ? 0 : nitems;
 }
 
 int rbm_remove(const char *path) {
@@ -184,11 +193,11 @@ int rbm_remove(const char *path) {
 }
 
 /*
- * This is called at the beginning of a cubist run to clear out
- * all "files" generated on the previous run and to prepare it
- * for the next run.
+ * Destroy all "files" and the hash table holding them.  The table
+ * is per thread, and threads aren't told when they exit, so this is
+ * called at the end of each cubist run.
  */
-void rbm_removeall(void) {
+void rbm_freeall(void) {
   /* Check if there actually is anything to remove */
   if (strbufv != NULL) {
     /*
@@ -207,7 +216,17 @@ void rbm_removeall(void) {
 
     /* Destroy the hash table itself */
     ht_destroy(strbufv);
+    strbufv = NULL;
   }
+}
+
+/*
+ * This is called at the beginning of a cubist run to clear out
+ * all "files" generated on the previous run and to prepare it
+ * for the next run.
+ */
+void rbm_removeall(void) {
+  rbm_freeall();
 
   /* Create/recreate the hash table for subsequent use */
   strbufv = ht_new(HASH_LEN);
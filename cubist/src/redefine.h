@@ -4,12 +4,15 @@
 #include <setjmp.h>
 #include <stdio.h>
 
+#include "datacols.h"
 #include "strbuf.h"
+#include "threadlocal.h"
 
 extern int rbm_init(void);
 extern int rbm_register(STRBUF *sb, const char *filename, int force);
 extern int rbm_deregister(const char *filename);
 extern STRBUF *rbm_lookup(const char *filename);
+extern DataColumns *rbm_columns(FILE *stream);
 extern FILE *rbm_fopen(const char *filename, const char *mode);
 extern int rbm_fclose(FILE *stream);
 extern int rbm_fflush(FILE *stream);
@@ -21,10 +24,12 @@ extern int rbm_fprintf(FILE *stream, const char *format, ...);
 extern int rbm_fputc(int c, FILE *stream);
 extern int rbm_putc(int c, FILE *stream);
 extern int rbm_fputs(const char *s, FILE *stream);
+extern size_t rbm_fread(void *ptr, size_t size, size_t nitems, FILE *stream);
 extern size_t rbm_fwrite(const void *ptr, size_t size, size_t nitems,
                          FILE *stream);
 extern int rbm_remove(const char *fname);
 extern void rbm_removeall(void);
+extern void rbm_freeall(void);
 extern void rbm_exit(int status);
 
 #endif
@@ -80,17 +80,17 @@ void Regress(CaseNo Fp, CaseNo Lp, double *Model)
   /*  Find means and variances in one data pass  */
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
+    Wt = ColWeight(i);
     Cases += Wt;
 
     ForEach(a, 0, GEnv.NModelAtt) {
       Att = GEnv.ModelAtt[a];
 
-      if (a > 0 && NotApplic(Case[i], Att)) {
+      if (a > 0 && ColNotApplic(Att, i)) {
         GEnv.ZeroCoeff[Att] = bintrue;
         GEnv.ModelAtt[a--] = GEnv.ModelAtt[GEnv.NModelAtt--];
       } else {
-        GEnv.Mean[Att] += Wt * (Val = CVal(Case[i], Att));
+        GEnv.Mean[Att] += Wt * (Val = ColCVal(Att, i));
         GEnv.Var[Att] += Wt * Val * Val;
       }
     }
@@ -113,12 +113,12 @@ void Regress(CaseNo Fp, CaseNo Lp, double *Model)
   /*  Now find average deviations in another data pass  */
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
+    Wt = ColWeight(i);
 
     ForEach(a, 0, GEnv.NModelAtt) {
       Att = GEnv.ModelAtt[a];
 
-      GEnv.AvDev[Att] += Wt * fabs(CVal(Case[i], Att) - GEnv.Mean[Att]);
+      GEnv.AvDev[Att] += Wt * fabs(ColCVal(Att, i) - GEnv.Mean[Att]);
     }
   }
 
@@ -142,7 +142,7 @@ void Regress(CaseNo Fp, CaseNo Lp, double *Model)
 
   BuildTables(Fp, Lp);
   Solve(Model);
-  SimplifyModel(Case, Fp, Lp, Model);
+  SimplifyModel(Nil, Fp, Lp, Model);
 
   /*  See whether ought to exclude outliers and try again.
       An outlier wrt the linear model is a case whose residual
@@ -155,9 +155,11 @@ void Regress(CaseNo Fp, CaseNo Lp, double *Model)
   /*  Compute the residuals and correct any bias caused by limiting
       predictions to range [Floor, Ceiling]  */
 
+  ColModelValues(Model, Nil, Fp, Lp, bintrue);
+
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
-    GEnv.Resid[i] = Class(Case[i]) - LinModel(Model, Case[i]);
+    Wt = ColWeight(i);
+    GEnv.Resid[i] = ColClass(i) - GEnv.ModelPred[i];
     SumR += Wt * fabs(GEnv.Resid[i]);
     Bias += Wt * GEnv.Resid[i];
   }
@@ -179,26 +181,26 @@ void Regress(CaseNo Fp, CaseNo Lp, double *Model)
 
       /*  Remove contribution of this case  */
 
-      Wt = CWeight(Case[i]);
+      Wt = ColWeight(i);
 
       GEnv.xTx[0][0] -= Wt;
-      GEnv.xTy[0] -= Wt * (ClassVal = Class(Case[i]));
+      GEnv.xTy[0] -= Wt * (ClassVal = ColClass(i));
 
       ForEach(jj, 1, GEnv.NModelAtt) {
         j = GEnv.ModelAtt[jj];
-        GEnv.xTy[j] -= Wt * (JVal = CVal(Case[i], j)) * ClassVal;
+        GEnv.xTy[j] -= Wt * (JVal = ColCVal(j, i)) * ClassVal;
 
         GEnv.xTx[j][0] -= Wt * JVal;
 
         ForEach(kk, 1, jj) {
           k = GEnv.ModelAtt[kk];
-          GEnv.xTx[j][k] -= Wt * JVal * CVal(Case[i], k);
+          GEnv.xTx[j][k] -= Wt * JVal * ColCVal(k, i);
         }
       }
     } else {
       /*  Keep this case  */
 
-      GEnv.Filtered[++Kp] = Case[i];
+      GEnv.Filtered[++Kp] = i;
     }
   }
 
@@ -217,52 +219,84 @@ void Regress(CaseNo Fp, CaseNo Lp, double *Model)
 
 /*************************************************************************/
 /*                                                                       */
-/* Scan data to form GEnv.xTx and GEnv.xTy     */
+/* Form GEnv.xTx and GEnv.xTy from the sums of cross-products of  */
+/* the current node if these are known, else from a scan of the data */
 /*                                                                       */
 /*************************************************************************/
 
 void BuildTables(CaseNo Fp, CaseNo Lp)
 /*   -----------  */
 {
-  int i, j, jj, k, kk;
-  ContValue ClassVal, JVal;
-  double Wt;
+  int j, jj, kk, r, N;
+  double *Sums, *xTxj;
+  Boolean Known;
 
   FindActiveAtts();
 
-  /*  Initialise GEnv.xTx and GEnv.xTy  */
+  if ((Known = (GEnv.NodeTables != Nil))) {
+    Sums = GEnv.NodeTables;
+    N = GEnv.NTableAtt;
+  } else {
+    Sums = GEnv.Sums;
+    N = GEnv.NModelAtt;
+
+    memset(Sums, 0, TableSize(N) * sizeof(double));
+    SumTables(Fp, Lp, GEnv.ModelAtt, N, Sums);
+  }
+
+  /*  Copy the sums for the model atts; GEnv.xTx[j][k] is needed only
+      for k <= j  */
 
   ForEach(jj, 0, GEnv.NModelAtt) {
     j = GEnv.ModelAtt[jj];
-    GEnv.xTy[j] = 0;
+    r = (Known ? GEnv.TableIndex[j] : jj);
 
-    ForEach(kk, 0, jj) { GEnv.xTx[j][GEnv.ModelAtt[kk]] = 0; }
+    GEnv.xTy[j] = Sums[TriPlace(N + 1, 0) + r];
+
+    xTxj = GEnv.xTx[j];
+    ForEach(kk, 0, jj) {
+      xTxj[GEnv.ModelAtt[kk]] =
+          Sums[TriPlace(r, Known ? GEnv.TableIndex[GEnv.ModelAtt[kk]] : kk)];
+    }
   }
+}
 
-  /*  Evaluate GEnv.xTx[j][k] etc. for k <= j;  j=0 and k=0 are
-      handled as special cases.
-      (This loop has been reorganised to minimize cache misses
-      that seem to be very important for Suns and AMD Athlons.)  */
+/*************************************************************************/
+/*                                                                       */
+/* Scan the items in places Fp to Lp, adding the cross-products of */
+/* atts Att[0] to Att[NAtt] (Att[0] is 0) to packed Sums   */
+/*                                                                       */
+/*************************************************************************/
 
-  GEnv.xTx[0][0] = 0;
+void SumTables(CaseNo Fp, CaseNo Lp, Attribute *Att, int NAtt, double *Sums)
+/*   ---------  */
+{
+  CaseNo i;
+  int jj, kk;
+  ContValue ClassVal, JVal, *Val = GEnv.ModelVal;
+  double Wt, *Row, *xTy = Sums + TriPlace(NAtt + 1, 0);
+
+  /*  (This loop has been reorganised to minimize cache misses
+      that seem to be very important for Suns and AMD Athlons.)  */
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
+    Wt = ColWeight(i);
 
-    GEnv.xTx[0][0] += Wt;
+    Sums[0] += Wt;
 
-    GEnv.xTy[0] += Wt * (ClassVal = Class(Case[i]));
+    xTy[0] += Wt * (ClassVal = ColClass(i));
 
-    ForEach(jj, 1, GEnv.NModelAtt) {
-      j = GEnv.ModelAtt[jj];
-      GEnv.xTy[j] += Wt * (JVal = CVal(Case[i], j)) * ClassVal;
+    /*  Take the values of the item from the columns once  */
 
-      GEnv.xTx[j][0] += Wt * JVal;
+    ForEach(jj, 1, NAtt) { Val[jj] = ColCVal(Att[jj], i); }
 
-      ForEach(kk, 1, jj) {
-        k = GEnv.ModelAtt[kk];
-        GEnv.xTx[j][k] += Wt * JVal * CVal(Case[i], k);
-      }
+    ForEach(jj, 1, NAtt) {
+      xTy[jj] += Wt * (JVal = Val[jj]) * ClassVal;
+
+      Row = Sums + TriPlace(jj, 0);
+      Row[0] += Wt * JVal;
+
+      ForEach(kk, 1, jj) { Row[kk] += Wt * JVal * Val[kk]; }
     }
   }
 }
@@ -290,6 +324,20 @@ void Solve(double *Model)
     return;
   }
 
+  /*  Solve by Cholesky factorization if LAPACK routines were passed in
+      and the tables are not near singular  */
+
+  if (Lapack && FactorTables()) {
+    ForEach(j, 1, MaxAtt) { Model[j] = 0; }
+
+    ForEach(j, 0, GEnv.NModelAtt) {
+      Model[GEnv.ModelAtt[j]] =
+          GEnv.Chol[(GEnv.NModelAtt + 1) * (GEnv.NModelAtt + 1) + j];
+    }
+
+    return;
+  }
+
   /*  Set up (destructible) copies A and B using only active attributes  */
 
   ForEach(j, 0, GEnv.NModelAtt) {
@@ -369,6 +417,54 @@ void Solve(double *Model)
   ForEach(j, 0, GEnv.NModelAtt) { Model[GEnv.ModelAtt[j]] = GEnv.B[j]; }
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Factor the tables of the active attributes with LAPACK and solve */
+/* the normal equations, leaving the coefficients after the factor */
+/* in GEnv.Chol.  Return binfalse if the tables are near singular  */
+/* by the test of Solve, which then finds the atts to exclude  */
+/*                                                                       */
+/*************************************************************************/
+
+Boolean FactorTables(void)
+/*      ------------  */
+{
+  int j, k, jj, n = GEnv.NModelAtt + 1, One = 1, Info;
+  char Lower = 'L';
+  double MaxElt, Try, *L = GEnv.Chol, *Coeff = GEnv.Chol + n * n;
+
+  ForEach(j, 0, GEnv.NModelAtt) {
+    jj = GEnv.ModelAtt[j];
+
+    ForEach(k, 0, j) { L[j + k * n] = GEnv.xTx[jj][GEnv.ModelAtt[k]]; }
+    Coeff[j] = GEnv.xTy[jj];
+  }
+
+  Lapack->potrf(&Lower, &n, L, &n, &Info);
+  if (Info)
+    return binfalse;
+
+  /*  The square of a diagonal element of the factor is the pivot that
+      Solve would find if it did not exchange rows  */
+
+  ForEach(j, 0, GEnv.NModelAtt) {
+    jj = GEnv.ModelAtt[j];
+    MaxElt = 0;
+    ForEach(k, 0, j) {
+      if ((Try = fabs(GEnv.xTx[GEnv.ModelAtt[k]][jj])) > MaxElt) {
+        MaxElt = Try;
+      }
+    }
+
+    if (L[j + j * n] * L[j + j * n] < n * MaxElt * 1E-12)
+      return binfalse;
+  }
+
+  Lapack->potrs(&Lower, &n, &One, L, &n, Coeff, &n, &Info);
+
+  return !Info;
+}
+
 /*************************************************************************/
 /*                                                                       */
 /* Construct list of active (non-excluded) attributes   */
@@ -456,13 +552,14 @@ int CountCoeffs(double *Model)
 
 /*************************************************************************/
 /*                                                                       */
-/* Simplify a model.       */
+/* Simplify a model of the items in places Fp to Lp, or in places  */
+/* Kept[Fp] to Kept[Lp] if Kept is not Nil.     */
 /* Drop coefficients one at a time, computing adjusted error;  */
 /* then pick the model with lowest adjusted error.    */
 /*                                                                       */
 /*************************************************************************/
 
-void SimplifyModel(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model)
+void SimplifyModel(CaseNo *Kept, CaseNo Fp, CaseNo Lp, double *Model)
 /*   -------------  */
 {
   double ModErr, AdjModErr, BestAdjErr = 1E10, Contrib, LeastContrib, Wt,
@@ -470,10 +567,10 @@ void SimplifyModel(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model)
   CaseNo i;
   Attribute Att, Drop;
   int a;
-  Boolean Stable;
+  Boolean Stable, Swept = binfalse, CanSweep = bintrue;
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(D[i]);
+    Wt = ColWeight(Kept ? Kept[i] : i);
     Cases += Wt;
   }
 
@@ -514,7 +611,7 @@ void SimplifyModel(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model)
     /*  Check whether current model is best so far  */
 
     if (Stable && Cases >= 2 * GEnv.NModelAtt) {
-      ModErr = AverageErr(D, Fp, Lp, Model);
+      ModErr = AverageErr(Kept, Fp, Lp, Model);
       AdjModErr = EstimateErr(ModErr, Cases, GEnv.NModelAtt);
 
       Verbosity(3, fprintf(Of, "Cases %d:%d  mod err=%.2f/%.2f%s\n", Fp, Lp,
@@ -533,15 +630,159 @@ void SimplifyModel(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model)
                            GEnv.AvDev[Drop]))
 
           Model[Drop] = 0;
+
+      /*  The first time, sweep the tables of the active attributes
+          so that each attribute can then be dropped by unsweeping  */
+
+      if (CanSweep && !Swept) {
+        FindActiveAtts();
+        Swept = CanSweep = SweepTables();
+      }
+
       GEnv.ZeroCoeff[Drop] = bintrue;
 
-      /*  Construct new model using remaining attributes  */
+      /*  Construct new model using remaining attributes, solving
+          again only if the tables could not be swept  */
 
       FindActiveAtts();
-      Solve(Model);
+      if (Swept && !(Swept = UnsweepAtt(Drop, Model))) {
+        CanSweep = binfalse;
+      }
+
+      if (!Swept) {
+        Solve(Model);
+      }
     }
   } while (Drop);
 
   memcpy(Model, GEnv.BestModel, (MaxAtt + 1) * sizeof(double));
   memcpy(GEnv.ZeroCoeff, GEnv.SaveZero, (MaxAtt + 1) * sizeof(Boolean));
 }
+
+/*************************************************************************/
+/*                                                                       */
+/* Sweep the tables of the active attributes, leaving the  */
+/* coefficients of the least-squares model in GEnv.B and the  */
+/* negated inverse of xTx in GEnv.A, both indexed by attribute.  */
+/* Return binfalse if a pivot is too small to sweep safely   */
+/*                                                                       */
+/*************************************************************************/
+
+Boolean SweepTables(void)
+/*      -----------  */
+{
+  int jj, kk, n = GEnv.NModelAtt + 1, Info;
+  Attribute j, k;
+  char Lower = 'L';
+
+  /*  With LAPACK, the swept tables are found from the factor  */
+
+  if (Lapack && FactorTables()) {
+    Lapack->potri(&Lower, &n, GEnv.Chol, &n, &Info);
+    if (Info)
+      return binfalse;
+
+    ForEach(jj, 0, GEnv.NModelAtt) {
+      j = GEnv.ModelAtt[jj];
+
+      ForEach(kk, 0, jj) {
+        k = GEnv.ModelAtt[kk];
+        GEnv.A[j][k] = GEnv.A[k][j] = -GEnv.Chol[jj + kk * n];
+      }
+      GEnv.B[j] = GEnv.Chol[n * n + jj];
+    }
+
+    return bintrue;
+  }
+
+  ForEach(jj, 0, GEnv.NModelAtt) {
+    j = GEnv.ModelAtt[jj];
+
+    ForEach(kk, 0, jj) {
+      k = GEnv.ModelAtt[kk];
+      GEnv.A[j][k] = GEnv.A[k][j] = GEnv.xTx[j][k];
+    }
+    GEnv.B[j] = GEnv.xTy[j];
+  }
+
+  ForEach(jj, 0, GEnv.NModelAtt) {
+    j = GEnv.ModelAtt[jj];
+
+    if (GEnv.A[j][j] <= (GEnv.NModelAtt + 1) * GEnv.xTx[j][j] * 1E-12) {
+      return binfalse;
+    }
+
+    SweepAtt(j, 1.0);
+  }
+
+  return bintrue;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Remove attribute Att from the swept tables and put the  */
+/* coefficients of the remaining active attributes into Model.  */
+/* Return binfalse if this cannot be done safely    */
+/*                                                                       */
+/*************************************************************************/
+
+Boolean UnsweepAtt(Attribute Att, double *Model)
+/*      ----------  */
+{
+  int j;
+
+  /*  The pivot of a swept attribute is negative  */
+
+  if (GEnv.A[Att][Att] >= 0)
+    return binfalse;
+
+  SweepAtt(Att, -1.0);
+
+  ForEach(j, 1, MaxAtt) { Model[j] = 0; }
+
+  ForEach(j, 0, GEnv.NModelAtt) {
+    Model[GEnv.ModelAtt[j]] = GEnv.B[GEnv.ModelAtt[j]];
+  }
+
+  return bintrue;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Sweep GEnv.A and GEnv.B on attribute Att (Sign 1) or reverse  */
+/* the sweep (Sign -1), updating the rows of the active attributes */
+/*                                                                       */
+/*************************************************************************/
+
+void SweepAtt(Attribute Att, double Sign)
+/*   --------  */
+{
+  int ii, jj;
+  Attribute i, j;
+  double Pivot, Factor, *Ai, *AAtt = GEnv.A[Att];
+
+  Pivot = AAtt[Att];
+
+  ForEach(ii, 0, GEnv.NModelAtt) {
+    if ((i = GEnv.ModelAtt[ii]) == Att)
+      continue;
+
+    Ai = GEnv.A[i];
+    Factor = Ai[Att] / Pivot;
+
+    ForEach(jj, 0, GEnv.NModelAtt) {
+      if ((j = GEnv.ModelAtt[jj]) != Att) {
+        Ai[j] -= Factor * AAtt[j];
+      }
+    }
+    GEnv.B[i] -= Factor * GEnv.B[Att];
+  }
+
+  ForEach(ii, 0, GEnv.NModelAtt) {
+    if ((i = GEnv.ModelAtt[ii]) != Att) {
+      GEnv.A[i][Att] = AAtt[i] = Sign * GEnv.A[i][Att] / Pivot;
+    }
+  }
+  GEnv.B[Att] = Sign * GEnv.B[Att] / Pivot;
+  AAtt[Att] = -1 / Pivot;
+}
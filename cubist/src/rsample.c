@@ -3,16 +3,16 @@
 
 /*************************************************************************/
 /*                                                                       */
-/* Main                                                             */
+/* Load a model: names, committee and (if used) the instance index  */
 /*                                                                       */
 /*************************************************************************/
 
-int samplemain(double *outputv)
-/*  ----------  */
+RRuleSet *LoadCommittee(void)
+/*        -------------  */
 {
   RRuleSet *CubistModel;
   FILE *F;
-  CaseNo i;
+  int m;
 
   /*  Read information on attribute names and values  */
 
@@ -32,7 +32,18 @@ int samplemain(double *outputv)
 
   CubistModel = GetCommittee(".model");
 
-  if (USEINSTANCES) {
+  /*  Index the conditions of the rules since the model will be used for
+      many predictions  */
+
+  ForEach(m, 0, MEMBERS - 1) {
+    CubistModel[m]->RIndex = BuildRuleIndex(CubistModel[m]);
+  }
+
+  /*  Restore the instances and their index if they have been saved,
+      otherwise read the data and build them  */
+
+  if (USEINSTANCES && !((F = GetFile(".index", "r")) &&
+                        RestoreInstances(CubistModel, F))) {
     if (!(F = GetFile(".data", "r")))
       Error(0, Fn, "");
     GetData(F, bintrue, binfalse); /* GetData closes the file */
@@ -48,6 +59,21 @@ int samplemain(double *outputv)
     Case = Nil;
   }
 
+  return CubistModel;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Predict the cases file with a loaded model    */
+/*                                                                       */
+/*************************************************************************/
+
+void PredictCases(RRuleSet *CubistModel, double *outputv)
+/*   ------------  */
+{
+  FILE *F;
+  CaseNo i;
+
   if (!(F = GetFile(".cases", "r")))
     Error(0, Fn, "");
 
@@ -58,13 +84,105 @@ int samplemain(double *outputv)
 
   ForEach(i, 0, MaxCase) { outputv[i] = PredVal(Case[i]); }
 
-  /* Free memory allocated by GetCommittee */
-  FreeCttee(CubistModel);
-  CubistModel = Nil;
+  /* Free memory allocated by GetData */
+  FreeData(Case);
+  Case = Nil;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Predict the cases file with a loaded model, also finding which  */
+/* rules of each committee member apply to each case.  The rules of */
+/* all members are numbered from 0 in order, and the numbers of the */
+/* rules that apply to case i are (*indices)[indptr[i] .. indptr[i+1]-1] */
+/* in order, as for a compressed sparse row matrix.  *indices is */
+/* allocated here and must be freed by the caller even if there is */
+/* an error.  If indices is Nil, only the predictions are found.  */
+/* memberv[i * MEMBERS + m] is the prediction of member m for case i. */
+/*                                                                       */
+/*************************************************************************/
+
+void PathCases(RRuleSet *CubistModel, double *outputv, double *memberv,
+               int64_t *indptr, int **indices)
+/*   ---------  */
+{
+  FILE *F;
+  CaseNo i;
+  RuleNo *Fired, MaxRules = 0, *Offset;
+  int m, k, NFired;
+  int64_t NPath = 0, PathSpace;
+  double PredSum;
+
+  if (!(F = GetFile(".cases", "r")))
+    Error(0, Fn, "");
+
+  /* Not training, but allow unknown target */
+  GetData(F, binfalse, bintrue); /* GetData closes the file */
+
+  /*  The rules of each member follow those of the previous members  */
+
+  Offset = Alloc(MEMBERS, RuleNo);
+  ForEach(m, 0, MEMBERS - 1) {
+    Offset[m] = (m ? Offset[m - 1] + CubistModel[m - 1]->SNRules : 0);
+    MaxRules = Max(MaxRules, CubistModel[m]->SNRules);
+  }
+  Fired = (indices ? Alloc(MaxRules + 1, RuleNo) : Nil);
+
+  if (indices) {
+    PathSpace = (MaxCase + 1) * (int64_t)MEMBERS + MaxRules;
+    Realloc(*indices, PathSpace, int);
+    indptr[0] = 0;
+  }
+
+  ForEach(i, 0, MaxCase) {
+    PredSum = 0;
+    ForEach(m, 0, MEMBERS - 1) {
+      memberv[i * MEMBERS + m] =
+          RuleSetPath(CubistModel[m], Case[i], Fired, &NFired);
+      PredSum += memberv[i * MEMBERS + m];
+
+      if (!indices)
+        continue;
+
+      if (NPath + NFired > PathSpace) {
+        PathSpace = 2 * PathSpace + NFired;
+        Realloc(*indices, PathSpace, int);
+      }
+      ForEach(k, 0, NFired - 1) {
+        (*indices)[NPath++] = Offset[m] + Fired[k] - 1;
+      }
+    }
+    if (indices) {
+      indptr[i + 1] = NPath;
+    }
+
+    /*  The average of the members is as found by PredictValue()  */
+
+    outputv[i] = (USEINSTANCES ? NNEstimate(CubistModel, Case[i])
+                               : (float)(PredSum / MEMBERS));
+  }
+
+  FreeUnlessNil(Fired);
+  Free(Offset);
 
   /* Free memory allocated by GetData */
   FreeData(Case);
   Case = Nil;
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Free everything allocated by LoadCommittee    */
+/*                                                                       */
+/*************************************************************************/
+
+void FreeCommittee(RRuleSet *CubistModel)
+/*   -------------  */
+{
+  /* Free memory allocated by GetCommittee */
+  if (CubistModel) {
+    FreeCttee(CubistModel);
+  }
 
   if (USEINSTANCES) {
     /* Free memory allocated by InitialiseInstances and CopyInstances */
@@ -73,6 +191,25 @@ int samplemain(double *outputv)
 
   /* Free memory allocated by GetNames */
   FreeNamesData();
+}
+
+/*************************************************************************/
+/*                                                                       */
+/* Main                                                             */
+/*                                                                       */
+/*************************************************************************/
+
+int samplemain(double *outputv)
+/*  ----------  */
+{
+  RRuleSet *CubistModel;
+
+  CubistModel = LoadCommittee();
+
+  PredictCases(CubistModel, outputv);
+
+  FreeCommittee(CubistModel);
+  CubistModel = Nil;
 
   return 0;
 }
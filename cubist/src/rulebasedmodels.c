@@ -7,11 +7,19 @@
 #include "strbuf.h"
 
 /* Global variables defined in update.d */
-extern int Stage;
-extern FILE *Uf;
+extern THREAD_LOCAL int Stage;
+extern THREAD_LOCAL FILE *Uf;
+
+/* Global variables defined in instance.c */
+extern THREAD_LOCAL int MinN, Try;
+extern THREAD_LOCAL Boolean UseAll, SetNN;
+extern THREAD_LOCAL AttValue *KDBlock;
+
+/* Global variables defined in utility.c */
+extern THREAD_LOCAL int KRFp, KRSp;
 
 /* Used to implement rbm_exit */
-jmp_buf rbm_buf;
+THREAD_LOCAL jmp_buf rbm_buf;
 
 /* Don't want to include R.h, which has conflicts with cubist headers */
 // extern void Rprintf(const char *, ...);
@@ -91,6 +99,12 @@ void initglobals(void)
   Ref[1] = Nil;
   MaxInstance = -1;
   KDTree = Nil;
+  KDBlock = Nil;
+  GNNEnv.AttMinD = Nil;
+  MinN = 0;
+  Try = 0;
+  UseAll = binfalse;
+  SetNN = binfalse;
 
   RSPredVal = Nil;
 
@@ -149,6 +163,7 @@ void initglobals(void)
 
   SAMPLE = 0.0;
   KRInit = 0;
+  KRFp = KRSp = 0; /* restart KRandom() as in a new process */
   LOCK = binfalse;
 
   MINITEMS = 0;
@@ -156,6 +171,19 @@ void initglobals(void)
 
   EXTRAP = 0.1;
 
+  HOLDOUT = 0.0;
+  NOCHANGE = 5;
+
+  THREADS = 1;
+
+  HISTBINS = 0;
+
+  PRESORT = binfalse;
+
+  Lapack = Nil;
+
+  KeepModel = binfalse;
+
   /**********************************************/
   /*                                            */
   /* Reinitialize variables defined in update.c */
@@ -171,7 +199,8 @@ void initglobals(void)
  */
 void setglobals(int unbiased, char *composite, int neighbors, int committees,
                 double sample, int seed, int rules, double extrapolation,
-                int cv) {
+                int cv, double holdout, int nochange, int threads, int bins,
+                int presort, LapackFunctions *lapack) {
 
   UNBIASED = unbiased != 0 ? bintrue : binfalse;
 
@@ -193,6 +222,12 @@ void setglobals(int unbiased, char *composite, int neighbors, int committees,
   MAXRULES = rules;
   EXTRAP = extrapolation;
   FOLDS = cv;
+  HOLDOUT = holdout;
+  NOCHANGE = nochange;
+  THREADS = threads;
+  HISTBINS = Min(bins, MAXBINS);
+  PRESORT = presort != 0 ? bintrue : binfalse;
+  Lapack = lapack;
   if (FOLDS > 0){
     XVAL = bintrue;
   }
@@ -224,3 +259,253 @@ void rbm_exit(int status) {
   /* This doesn't return */
   longjmp(rbm_buf, status + JMP_OFFSET);
 }
+
+/*
+ * A model handle owns everything that LoadCommittee allocates (names,
+ * committee, instances and kd-tree) together with the values of the
+ * globals that describe them.  The engine only works on globals, so
+ * the handle's values are copied into them for the duration of a call
+ * and the globals are reset afterwards.  This lets a model be loaded
+ * once and used for any number of predictions.
+ */
+struct _model_handle {
+  RRuleSet *Cttee;
+
+  Attribute ClassAtt, LabelAtt, CWtAtt;
+  int MaxAtt, MaxDiscrVal, Precision, AttExIn, TSBase;
+
+  DiscrValue *MaxAttVal, *Modal;
+  char *SpecialStatus;
+  Definition *AttDef;
+  Attribute **AttDefUses;
+  String *AttName, **AttValName;
+
+  ContValue *AttMean, *AttSD, *AttMaxVal, *AttMinVal, *AttPref, Ceiling,
+      Floor, AvCWt;
+  float ErrReduction;
+  double *AttUnit;
+  int *AttPrec;
+
+  DataRec *Instance, Ref[2];
+  CaseNo MaxInstance;
+  Index KDTree;
+  AttValue *KDBlock;
+  float *AttMinD, *RSPredVal;
+
+  float GlobalMean, GlobalSD, MAXD, SAMPLE, EXTRAP;
+  int NN, MEMBERS, KRInit, MinN, Try;
+  Boolean USEINSTANCES, UseAll, SetNN;
+};
+
+/*
+ * Copy the globals describing a loaded model into a handle
+ */
+static void savemodelstate(ModelHandle H) {
+  H->ClassAtt = ClassAtt;
+  H->LabelAtt = LabelAtt;
+  H->CWtAtt = CWtAtt;
+  H->MaxAtt = MaxAtt;
+  H->MaxDiscrVal = MaxDiscrVal;
+  H->Precision = Precision;
+  H->AttExIn = AttExIn;
+  H->TSBase = TSBase;
+
+  H->MaxAttVal = MaxAttVal;
+  H->Modal = Modal;
+  H->SpecialStatus = SpecialStatus;
+  H->AttDef = AttDef;
+  H->AttDefUses = AttDefUses;
+  H->AttName = AttName;
+  H->AttValName = AttValName;
+
+  H->AttMean = AttMean;
+  H->AttSD = AttSD;
+  H->AttMaxVal = AttMaxVal;
+  H->AttMinVal = AttMinVal;
+  H->AttPref = AttPref;
+  H->Ceiling = Ceiling;
+  H->Floor = Floor;
+  H->AvCWt = AvCWt;
+  H->ErrReduction = ErrReduction;
+  H->AttUnit = AttUnit;
+  H->AttPrec = AttPrec;
+
+  H->Instance = Instance;
+  H->Ref[0] = Ref[0];
+  H->Ref[1] = Ref[1];
+  H->MaxInstance = MaxInstance;
+  H->KDTree = KDTree;
+  H->KDBlock = KDBlock;
+  H->AttMinD = GNNEnv.AttMinD;
+  H->RSPredVal = RSPredVal;
+
+  H->GlobalMean = GlobalMean;
+  H->GlobalSD = GlobalSD;
+  H->MAXD = MAXD;
+  H->SAMPLE = SAMPLE;
+  H->EXTRAP = EXTRAP;
+  H->NN = NN;
+  H->MEMBERS = MEMBERS;
+  H->KRInit = KRInit;
+  H->MinN = MinN;
+  H->Try = Try;
+  H->USEINSTANCES = USEINSTANCES;
+  H->UseAll = UseAll;
+  H->SetNN = SetNN;
+}
+
+/*
+ * Copy the values saved in a handle back into the globals
+ */
+static void restoremodelstate(ModelHandle H) {
+  ClassAtt = H->ClassAtt;
+  LabelAtt = H->LabelAtt;
+  CWtAtt = H->CWtAtt;
+  MaxAtt = H->MaxAtt;
+  MaxDiscrVal = H->MaxDiscrVal;
+  Precision = H->Precision;
+  AttExIn = H->AttExIn;
+  TSBase = H->TSBase;
+
+  MaxAttVal = H->MaxAttVal;
+  Modal = H->Modal;
+  SpecialStatus = H->SpecialStatus;
+  AttDef = H->AttDef;
+  AttDefUses = H->AttDefUses;
+  AttName = H->AttName;
+  AttValName = H->AttValName;
+
+  AttMean = H->AttMean;
+  AttSD = H->AttSD;
+  AttMaxVal = H->AttMaxVal;
+  AttMinVal = H->AttMinVal;
+  AttPref = H->AttPref;
+  Ceiling = H->Ceiling;
+  Floor = H->Floor;
+  AvCWt = H->AvCWt;
+  ErrReduction = H->ErrReduction;
+  AttUnit = H->AttUnit;
+  AttPrec = H->AttPrec;
+
+  Instance = H->Instance;
+  Ref[0] = H->Ref[0];
+  Ref[1] = H->Ref[1];
+  MaxInstance = H->MaxInstance;
+  KDTree = H->KDTree;
+  KDBlock = H->KDBlock;
+  GNNEnv.AttMinD = H->AttMinD;
+  RSPredVal = H->RSPredVal;
+
+  GlobalMean = H->GlobalMean;
+  GlobalSD = H->GlobalSD;
+  MAXD = H->MAXD;
+  SAMPLE = H->SAMPLE;
+  EXTRAP = H->EXTRAP;
+  NN = H->NN;
+  MEMBERS = H->MEMBERS;
+  KRInit = H->KRInit;
+  MinN = H->MinN;
+  Try = H->Try;
+  USEINSTANCES = H->USEINSTANCES;
+  UseAll = H->UseAll;
+  SetNN = H->SetNN;
+
+  /* WorstBest points into GNNEnv itself so it is never saved */
+  GNNEnv.WorstBest = GNNEnv.BestD + NN - 1;
+
+  Case = Nil;
+  MaxCase = -1;
+}
+
+/*
+ * Load the registered names, data and model files into a new handle.
+ * The caller must have set rbm_buf since loading can call rbm_exit.
+ */
+ModelHandle loadmodelhandle(void) {
+  ModelHandle H;
+  RRuleSet *Cttee;
+
+  Cttee = LoadCommittee();
+
+  H = (ModelHandle)calloc(1, sizeof(struct _model_handle));
+  H->Cttee = Cttee;
+  savemodelstate(H);
+
+  return H;
+}
+
+/*
+ * Predict the registered cases file with a loaded model.
+ * The caller must have set rbm_buf since reading cases can call rbm_exit,
+ * and must call finishmodelhandle afterwards whether or not it did.
+ */
+void predictmodelhandle(ModelHandle H, double *predv) {
+  restoremodelstate(H);
+
+  /* The neighbor search writes to AttMinD, so each call (and so each
+     thread) using the same handle needs its own */
+  if (USEINSTANCES) {
+    GNNEnv.AttMinD = AllocZero(MaxAtt + 1, float);
+  }
+
+  /* Errors while reading cases must not free the handle's model */
+  KeepModel = bintrue;
+  PredictCases(H->Cttee, predv);
+}
+
+/*
+ * As predictmodelhandle, also finding the rules that apply to each case
+ * and the prediction of each committee member, see PathCases
+ */
+void pathmodelhandle(ModelHandle H, double *predv, double *memberv,
+                     int64_t *indptr, int **indices) {
+  restoremodelstate(H);
+
+  if (USEINSTANCES) {
+    GNNEnv.AttMinD = AllocZero(MaxAtt + 1, float);
+  }
+
+  KeepModel = bintrue;
+  PathCases(H->Cttee, predv, memberv, indptr, indices);
+}
+
+/*
+ * Release what predictmodelhandle allocated for a single call
+ */
+void finishmodelhandle(ModelHandle H) {
+  if (GNNEnv.AttMinD != H->AttMinD) {
+    FreeUnlessNil(GNNEnv.AttMinD);
+  }
+  GNNEnv.AttMinD = Nil;
+  KeepModel = binfalse;
+}
+
+/*
+ * Write the instances and index of a loaded composite model to the
+ * ".index" file so that loadmodelhandle can restore them rather than
+ * rebuild them.  Returns 0, having written nothing, for other models.
+ * The caller must have set rbm_buf since writing can call rbm_exit.
+ */
+int saveindexhandle(ModelHandle H) {
+  FILE *F;
+
+  restoremodelstate(H);
+
+  if (!USEINSTANCES || !(F = GetFile(".index", "w")))
+    return 0;
+
+  SaveInstances(F); /* SaveInstances closes the file */
+  return 1;
+}
+
+/*
+ * Free a handle and everything it owns
+ */
+void freemodelhandle(ModelHandle H) {
+  if (H == Nil)
+    return;
+
+  restoremodelstate(H);
+  FreeCommittee(H->Cttee);
+  free(H);
+}
@@ -1,14 +1,32 @@
 #ifndef _RULEBASEDMODELS_H_
 #define _RULEBASEDMODELS_H_
 
+#include <stdint.h>
+
+#include "lapackfuncs.h"
+#include "threadlocal.h"
+
 extern void initglobals(void);
 extern void setglobals(int unbiased, char *composite, int neighbors,
                        int committees, double sample, int seed, int rules,
-                       double extrapolation, int cv);
+                       double extrapolation, int cv, double holdout,
+                       int nochange, int threads, int bins, int presort,
+                       LapackFunctions *lapack);
 extern void setOf(void);
 extern char *closeOf(void);
 
+/* A loaded model kept between calls, see rulebasedmodels.c */
+typedef struct _model_handle *ModelHandle;
+
+extern ModelHandle loadmodelhandle(void);
+extern void predictmodelhandle(ModelHandle H, double *predv);
+extern void pathmodelhandle(ModelHandle H, double *predv, double *memberv,
+                            int64_t *indptr, int **indices);
+extern void finishmodelhandle(ModelHandle H);
+extern int saveindexhandle(ModelHandle H);
+extern void freemodelhandle(ModelHandle H);
+
 #endif
 
 #define JMP_OFFSET 100
-extern jmp_buf rbm_buf;
+extern THREAD_LOCAL jmp_buf rbm_buf;
@@ -52,7 +52,7 @@ Boolean NewRule(Condition Cond[], int NCond, Boolean *Deleted, CaseCount Cover,
   Condition *Lhs;
   Boolean Exclude = binfalse;
   float Range, V;
-  extern double *Total;
+  extern THREAD_LOCAL double *Total;
 
   /*  Sort and copy the conditions  */
 
@@ -201,7 +201,7 @@ Boolean SameRule(RuleNo r, Condition Cond[], int NConds)
 
 /*************************************************************************/
 /*            */
-/* Free space occupied by a rule or a committee    */
+/* Free space occupied by a rule, ruleset or committee  */
 /*            */
 /*************************************************************************/
 
@@ -218,22 +218,30 @@ void ReleaseRule(CRule R)
   }
   FreeUnlessNil(R->Lhs);
   FreeUnlessNil(R->Rhs);
+  FreeUnlessNil(R->CoeffAtt);
+  FreeUnlessNil(R->Coeff);
   FreeUnlessNil(R);
 }
 
+void FreeRuleSet(RRuleSet RS)
+/*   -----------  */
+{
+  RuleNo r;
+
+  ForEach(r, 1, RS->SNRules) { ReleaseRule(RS->SRule[r]); }
+  Free(RS->SRule);
+  FreeRuleIndex(RS->RIndex);
+  Free(RS);
+}
+
 void FreeCttee(RRuleSet *Cttee)
 /*   ---------  */
 {
-  int m, r;
-  RRuleSet RS;
+  int m;
 
   ForEach(m, 0, MEMBERS - 1) {
-    if (!(RS = Cttee[m]))
-      continue;
-
-    ForEach(r, 1, RS->SNRules) { ReleaseRule(RS->SRule[r]); }
-    Free(RS->SRule);
-    Free(RS);
+    if (Cttee[m])
+      FreeRuleSet(Cttee[m]);
   }
 
   Free(Cttee);
@@ -20,7 +20,7 @@ int MAIN(int Argc, char *Argv[])
   double pval;
   FILE *F;
   int o;
-  extern String OptArg, Option;
+  extern THREAD_LOCAL String OptArg, Option;
   CaseNo i;
 
   /*  Process options  */
@@ -91,3 +91,48 @@ void Cachesort(CaseNo Fp, CaseNo Lp)
     Fp = High + 1;
   }
 }
+
+/*************************************************************************/
+/*                                                                       */
+/* Sort elements Fp to Lp of O on their values, as Cachesort      */
+/*                                                                       */
+/*************************************************************************/
+
+void Ordersort(OrderRec *O, CaseNo Fp, CaseNo Lp)
+/*   ---------  */
+{
+  CaseNo i, Middle, High;
+  ContValue Thresh, Val;
+  OrderRec Xab;
+
+  while (Fp < Lp) {
+    Thresh = O[(Fp + Lp) / 2].V;
+
+    for (Middle = Fp; O[Middle].V < Thresh; Middle++)
+      ;
+
+    for (High = Lp; O[High].V > Thresh; High--)
+      ;
+
+    for (i = Middle; i <= High;) {
+      if ((Val = O[i].V) < Thresh) {
+        Xab = O[Middle];
+        O[Middle] = O[i];
+        O[i] = Xab;
+        Middle++;
+        i++;
+      } else if (Val > Thresh) {
+        Xab = O[High];
+        O[High] = O[i];
+        O[i] = Xab;
+        High--;
+      } else {
+        i++;
+      }
+    }
+
+    Ordersort(O, Fp, Middle - 1);
+
+    Fp = High + 1;
+  }
+}
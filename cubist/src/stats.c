@@ -50,18 +50,20 @@ double SD(double N, double Sum, double SumSq)
   return (N < 2 ? GlobalSD : sqrt((SumSq - Sum * Sum / N + 1E-3) / (N - 1)));
 }
 
-double AverageErr(DataRec *D, CaseNo Fp, CaseNo Lp, double *Model)
+double AverageErr(CaseNo *Kept, CaseNo Fp, CaseNo Lp, double *Model)
 /*     ----------  */
 {
-  CaseNo i;
+  CaseNo i, p;
   double Wt, Sum = 0, SumWt = 0;
 
   FindModelAtts(Model);
+  ColModelValues(Model, Kept, Fp, Lp, bintrue);
 
   ForEach(i, Fp, Lp) {
-    Wt = CWeight(Case[i]);
+    Wt = ColWeight(i);
+    p = (Kept ? Kept[i] : i);
 
-    Sum += Wt * fabs(Class(D[i]) - LinModel(Model, D[i]));
+    Sum += Wt * fabs(ColClass(p) - GEnv.ModelPred[i]);
     SumWt += Wt;
   }
 
@@ -43,6 +43,7 @@ STRBUF *strbuf_create_empty(unsigned int len) {
   sb->len = len;
   sb->open = TRUE;
   sb->own = TRUE;
+  sb->data = NULL;
 
   /* Return a pointer to the STRBUF */
   return sb;
@@ -68,11 +69,28 @@ STRBUF *strbuf_create_full(char *data, unsigned int len) {
   sb->len = len;
   sb->open = FALSE;
   sb->own = FALSE;
+  sb->data = NULL;
 
   /* Return a pointer to the STRBUF */
   return sb;
 }
 
+/*
+ * Create an empty STRBUF standing in for a file whose contents are
+ * held elsewhere.  The data is neither copied nor freed.
+ */
+STRBUF *strbuf_create_data(void *data) {
+  STRBUF *sb;
+
+  sb = strbuf_create_full("", 0);
+  if (sb == NULL)
+    return NULL;
+
+  sb->data = data;
+
+  return sb;
+}
+
 STRBUF *strbuf_copy(STRBUF *sb) {
   STRBUF *nsb;
 
@@ -95,6 +113,7 @@ STRBUF *strbuf_copy(STRBUF *sb) {
   nsb->len = sb->len;
   nsb->open = FALSE;
   nsb->own = TRUE;
+  nsb->data = sb->data;
 
   /* Return a pointer to the STRBUF */
   return nsb;
@@ -314,6 +333,21 @@ char *strbuf_gets(STRBUF *sb, char *s, unsigned int n) {
   return s;
 }
 
+/*
+ * Read up to the specified amount of data from the STRBUF and return
+ * the amount read.
+ */
+unsigned int strbuf_read(STRBUF *sb, char *data, unsigned int n) {
+  /* Only read what is left after the current position */
+  if (n > sb->n - sb->i)
+    n = sb->n - sb->i;
+
+  memcpy(data, sb->buf + sb->i, n);
+  sb->i += n;
+
+  return n;
+}
+
 /*
  * Read a character from the STRBUF.
  */
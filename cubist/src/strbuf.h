@@ -10,10 +10,12 @@ typedef struct _STRBUF {
   unsigned int len;   // Current length of buffer
   int open;           // File open flag
   int own;            // Should memory be deallocated?
+  void *data;         // Contents held in another form, e.g. see datacols.h
 } STRBUF;
 
 extern STRBUF *strbuf_create_empty(unsigned int len);
 extern STRBUF *strbuf_create_full(char *data, unsigned int len);
+extern STRBUF *strbuf_create_data(void *data);
 extern STRBUF *strbuf_copy(STRBUF *sb);
 extern int strbuf_open(STRBUF *sb);
 extern int strbuf_close(STRBUF *sb);
@@ -26,6 +28,7 @@ extern int strbuf_puts(STRBUF *sb, const char *s);
 extern int strbuf_putc(STRBUF *sb, int c);
 extern int strbuf_write(STRBUF *sb, const char *data, unsigned int n);
 extern char *strbuf_gets(STRBUF *sb, char *s, unsigned int n);
+extern unsigned int strbuf_read(STRBUF *sb, char *data, unsigned int n);
 extern int strbuf_getc(STRBUF *sb);
 extern char *strbuf_getall(STRBUF *sb);
 
@@ -0,0 +1,18 @@
+#ifndef _THREADLOCAL_H_
+#define _THREADLOCAL_H_
+
+/*
+ * Cubist keeps all of its working state in global variables.  Declaring
+ * them thread local gives every thread its own copy of that state, so a
+ * fit or prediction running in one thread never sees another thread's
+ * data.  Each call starts by resetting its copy with initglobals and
+ * ends by freeing the buffers its copy holds, which would otherwise be
+ * left behind when the thread exits.
+ */
+#if defined(_MSC_VER)
+#define THREAD_LOCAL __declspec(thread)
+#else
+#define THREAD_LOCAL __thread
+#endif
+
+#endif
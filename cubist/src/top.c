@@ -1,6 +1,7 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <setjmp.h>
+#include "datacols.h"
 #include "redefine.h"
 #include "rulebasedmodels.h"
 #include "strbuf.h"
@@ -8,11 +9,42 @@
 extern void cubistmain(void);
 extern void samplemain(double *outputv);
 extern void FreeCases(void);
+extern void FreePropVal(void);
 
-static void cubist(char **namesv, char **datav, int *unbiased,
+/*
+ * Register a data or cases file from either its text or, if cols is
+ * not NULL, its columns of values.
+ */
+/*
+ * Free what the engine keeps per thread after a call: the registered
+ * files, including the output file Of, and the buffer for model file
+ * properties.  Threads aren't told when they exit, so anything left
+ * would leak with each thread that calls the engine.
+ */
+static void freethreadstate(void) {
+  rbm_freeall();
+  FreePropVal();
+}
+
+static void registerdata(char *text, DataColumns *cols, const char *filename) {
+  STRBUF *sb;
+
+  // The text is only read so, like the names, it needn't be copied
+  if (cols != NULL) {
+    sb = strbuf_create_data(cols);
+  } else {
+    sb = strbuf_create_full(text, strlen(text));
+  }
+  rbm_register(sb, filename, 1);
+}
+
+static void cubist(char **namesv, char **datav, DataColumns *datac,
+                   int *unbiased,
                    char **compositev, int *neighbors, int *committees,
                    double *sample, int *seed, int *rules, double *extrapolation,
-                   int *cv, char **modelv, char **outputv) {
+                   int *cv, double *holdout, int *nochange, int *threads,
+                   int *bins, int *presort, LapackFunctions *lapack,
+                   char **warmv, char **modelv, char **outputv) {
   int val; /* Used by setjmp/longjmp for implementing rbm_exit */
 
   // Initialize the globals to the values that the cubist
@@ -22,7 +54,8 @@ static void cubist(char **namesv, char **datav, int *unbiased,
   // Set globals based on the arguments.  This is analogous
   // to parsing the command line in the cubist program.
   setglobals(*unbiased, *compositev, *neighbors, *committees, *sample, *seed,
-             *rules, *extrapolation, *cv);
+             *rules, *extrapolation, *cv, *holdout, *nochange, *threads,
+             *bins, *presort, lapack);
   
   // Handles the strbufv data structure
   rbm_removeall();
@@ -43,10 +76,15 @@ static void cubist(char **namesv, char **datav, int *unbiased,
   // Register this strbuf using the name "undefined.names"
   rbm_register(sb_names, "undefined.names", 1);
 
-  // Create a strbuf using *datav and register it as "undefined.data"
-  STRBUF *sb_datav = strbuf_create_full(*datav, strlen(*datav));
-  // XXX why is sb_datav copied? what that part of my debugging?
-  rbm_register(strbuf_copy(sb_datav), "undefined.data", 1);
+  // Register *datav or datac as "undefined.data"
+  registerdata(*datav, datac, "undefined.data");
+
+  // Register the model to add committee members to, if there is one,
+  // as "undefined.warm"
+  if (**warmv) {
+    rbm_register(strbuf_create_full(*warmv, strlen(*warmv)), "undefined.warm",
+                 1);
+  }
 
   /*
    * We need to initialize rbm_buf before calling any code that
@@ -59,7 +97,7 @@ static void cubist(char **namesv, char **datav, int *unbiased,
     // Get the contents of the the model file if not using cross-validation
     if (*cv == 0){
       char *modelString = strbuf_getall(rbm_lookup("undefined.model"));
-      char *model = PyMem_Calloc(strlen(modelString) + 1, 1);
+      char *model = PyMem_RawCalloc(strlen(modelString) + 1, 1);
       strcpy(model, modelString);
 
       // I think the previous value of *modelv will be garbage collected
@@ -69,19 +107,28 @@ static void cubist(char **namesv, char **datav, int *unbiased,
 
   // Close file object "Of", and return its contents via argument outputv
   char *outputString = closeOf();
-  char *output = PyMem_Calloc(strlen(outputString) + 1, 1);
+  char *output = PyMem_RawCalloc(strlen(outputString) + 1, 1);
   strcpy(output, outputString);
   *outputv = output;
 
   // Deallocates memory allocated by NewCase
   FreeCases();
 
+  freethreadstate();
+
   // We reinitialize the globals on exit out of general paranoia
   initglobals();
 }
 
-static void predictions(char **casev, char **namesv, char **datav,
-                        char **modelv, double *predv, char **outputv) {
+/*
+ * Predict the cases with a model read from its text, and the instances of
+ * a composite model, on every call.  The library predicts with loadmodel
+ * and predictmodel instead; this is only kept as the baseline of
+ * benchmarks/bench_predict_latency.py.
+ */
+static void predictions(char **casev, DataColumns *casec, char **namesv,
+                        char **datav, DataColumns *datac, char **modelv,
+                        double *predv, char **outputv) {
   int val; /* Used by setjmp/longjmp for implementing rbm_exit */
 
   // Initialize the globals
@@ -93,15 +140,12 @@ static void predictions(char **casev, char **namesv, char **datav,
   // XXX Should this be controlled via an option?
   setOf();
 
-  STRBUF *sb_cases = strbuf_create_full(*casev, strlen(*casev));
-  rbm_register(sb_cases, "undefined.cases", 1);
+  registerdata(*casev, casec, "undefined.cases");
 
   STRBUF *sb_names = strbuf_create_full(*namesv, strlen(*namesv));
   rbm_register(sb_names, "undefined.names", 1);
 
-  STRBUF *sb_datav = strbuf_create_full(*datav, strlen(*datav));
-  // /* XXX why is sb_datav copied? */
-  rbm_register(strbuf_copy(sb_datav), "undefined.data", 1);
+  registerdata(*datav, datac, "undefined.data");
 
   STRBUF *sb_modelv = strbuf_create_full(*modelv, strlen(*modelv));
   /* XXX should sb_modelv be copied? */
@@ -121,10 +165,147 @@ static void predictions(char **casev, char **namesv, char **datav,
 
   // Close file object "Of", and return its contents via argument outputv
   char *outputString = closeOf();
-  char *output = PyMem_Calloc(strlen(outputString) + 1, 1);
+  char *output = PyMem_RawCalloc(strlen(outputString) + 1, 1);
   strcpy(output, outputString);
   *outputv = output;
+  freethreadstate();
 
   // We reinitialize the globals on exit out of general paranoia
   initglobals();
 }
+
+static ModelHandle loadmodel(char **namesv, char **datav, DataColumns *datac,
+                             char **modelv, char **indexv,
+                             unsigned int *indexn, char **outputv) {
+  ModelHandle volatile H = NULL;
+
+  initglobals();
+  rbm_removeall();
+  setOf();
+
+  STRBUF *sb_names = strbuf_create_full(*namesv, strlen(*namesv));
+  rbm_register(sb_names, "undefined.names", 1);
+
+  registerdata(*datav, datac, "undefined.data");
+
+  STRBUF *sb_modelv = strbuf_create_full(*modelv, strlen(*modelv));
+  rbm_register(sb_modelv, "undefined.model", 1);
+
+  // Instances and their index saved by saveindex, if any
+  if (*indexv != NULL) {
+    STRBUF *sb_index = strbuf_create_full(*indexv, *indexn);
+    rbm_register(sb_index, "undefined.index", 1);
+  }
+
+  if (setjmp(rbm_buf) == 0) {
+    // Read names, committee and instances once; they are owned by H
+    H = loadmodelhandle();
+  }
+
+  char *outputString = closeOf();
+  char *output = PyMem_RawCalloc(strlen(outputString) + 1, 1);
+  strcpy(output, outputString);
+  *outputv = output;
+  freethreadstate();
+
+  // The globals now refer to H's data so only reset them
+  initglobals();
+
+  return H;
+}
+
+static void predictmodel(ModelHandle H, char **casev, DataColumns *casec,
+                         double *predv, char **outputv) {
+  initglobals();
+  rbm_removeall();
+  setOf();
+
+  registerdata(*casev, casec, "undefined.cases");
+
+  if (setjmp(rbm_buf) == 0) {
+    predictmodelhandle(H, predv);
+  }
+  finishmodelhandle(H);
+
+  char *outputString = closeOf();
+  char *output = PyMem_RawCalloc(strlen(outputString) + 1, 1);
+  strcpy(output, outputString);
+  *outputv = output;
+  freethreadstate();
+
+  initglobals();
+}
+
+/*
+ * Predict cases with a loaded model as predictmodel does, also returning
+ * the rules that apply to each case as a compressed sparse row matrix and
+ * the prediction of each committee member.  *indicesv is allocated with
+ * malloc and must be freed by the caller.  If indicesv is NULL only the
+ * predictions are returned.
+ */
+static void decisionpath(ModelHandle H, char **casev, DataColumns *casec,
+                         double *predv, double *memberv, int64_t *indptr,
+                         int **indicesv, char **outputv) {
+  initglobals();
+  rbm_removeall();
+  setOf();
+
+  registerdata(*casev, casec, "undefined.cases");
+
+  if (indicesv != NULL) {
+    *indicesv = NULL;
+  }
+  if (setjmp(rbm_buf) == 0) {
+    pathmodelhandle(H, predv, memberv, indptr, indicesv);
+  }
+  finishmodelhandle(H);
+
+  char *outputString = closeOf();
+  char *output = PyMem_RawCalloc(strlen(outputString) + 1, 1);
+  strcpy(output, outputString);
+  *outputv = output;
+  freethreadstate();
+
+  initglobals();
+}
+
+/*
+ * Copy out the instances and index of a loaded composite model so that
+ * they can be passed back to loadmodel.  *indexv is NULL if there are
+ * none.
+ */
+static void saveindex(ModelHandle H, char **indexv, unsigned int *indexn,
+                      char **outputv) {
+  STRBUF *sb_index;
+
+  initglobals();
+  rbm_removeall();
+  setOf();
+
+  *indexv = NULL;
+  *indexn = 0;
+
+  if (setjmp(rbm_buf) == 0) {
+    if (saveindexhandle(H)) {
+      sb_index = rbm_lookup("undefined.index");
+      *indexv = PyMem_RawMalloc(sb_index->n ? sb_index->n : 1);
+      memcpy(*indexv, sb_index->buf, sb_index->n);
+      *indexn = sb_index->n;
+      rbm_remove("undefined.index");
+    }
+  }
+
+  char *outputString = closeOf();
+  char *output = PyMem_RawCalloc(strlen(outputString) + 1, 1);
+  strcpy(output, outputString);
+  *outputv = output;
+  freethreadstate();
+
+  initglobals();
+}
+
+static void freemodel(ModelHandle H) {
+  initglobals();
+  freemodelhandle(H);
+  initglobals();
+}
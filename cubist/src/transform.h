@@ -17,6 +17,7 @@
 #define fprintf rbm_fprintf
 #define fputc(X, Y) rbm_fputc(X, Y)
 #define fputs(X, Y) rbm_fputs(X, Y)
+#define fread(X, Y, Z, A) rbm_fread(X, Y, Z, A)
 #define fwrite(X, Y, Z, A) rbm_fwrite(X, Y, Z, A)
 #define remove(X) rbm_remove(X)
 
@@ -41,10 +41,10 @@
     printed, subtrees are broken off and printed separately after
     the main tree is finished  */
 
-int SubTree,               /* highest subtree to be printed */
+THREAD_LOCAL int SubTree,               /* highest subtree to be printed */
     SubSpace = 0;          /* maximum subtree encountered */
-Tree *SubDef = Nil;        /* pointers to subtrees */
-Boolean LastBranch[Width]; /* whether printing last branch of subtree */
+THREAD_LOCAL Tree *SubDef = Nil;        /* pointers to subtrees */
+THREAD_LOCAL Boolean LastBranch[Width]; /* whether printing last branch of subtree */
 
 /*************************************************************************/
 /*                                                                       */
@@ -35,8 +35,8 @@
 #include "redefine.h"
 #include "transform.h"
 
-int Stage = 0; /* Current stage number  */
-FILE *Uf = 0;  /* File to which update info written  */
+THREAD_LOCAL int Stage = 0; /* Current stage number  */
+THREAD_LOCAL FILE *Uf = 0;  /* File to which update info written  */
 
 /*************************************************************************/
 /*                                                                       */
@@ -66,8 +66,8 @@ void NotifyStage(int S)
 void Progress(float Delta)
 /*   --------  */
 {
-  static float Total, Current = 0;
-  static int Twentieth, Percent = -6;
+  static THREAD_LOCAL float Total, Current = 0;
+  static THREAD_LOCAL int Twentieth, Percent = -6;
   int p;
   static char *Message[] = {"",
                             "Reading training data      ",
@@ -65,13 +65,13 @@ void PrintHeader(String Title)
 /*                                                                       */
 /*************************************************************************/
 
-String OptArg, Option;
+THREAD_LOCAL String OptArg, Option;
 
 char ProcessOption(int Argc, char *Argv[], char *Options)
 /*   -------------  */
 {
   int i;
-  static int OptNo = 1;
+  static THREAD_LOCAL int OptNo = 1;
 
   if (OptNo >= Argc)
     return '\00';
@@ -159,6 +159,22 @@ void FreeVector(void **V, int First, int Last)
   }
 }
 
+/*************************************************************************/
+/*                                                                       */
+/* Count the bits set in a word, for compilers without a builtin  */
+/*                                                                       */
+/*************************************************************************/
+
+int CountBits(CaseBits W)
+/*  ---------  */
+{
+  W = W - ((W >> 1) & 0x5555555555555555ULL);
+  W = (W & 0x3333333333333333ULL) + ((W >> 2) & 0x3333333333333333ULL);
+  W = (W + (W >> 4)) & 0x0F0F0F0F0F0F0F0FULL;
+
+  return (int)((W * 0x0101010101010101ULL) >> 56);
+}
+
 /*************************************************************************/
 /*                                                                       */
 /* Special memory allocation routines for case memory   */
@@ -173,8 +189,8 @@ typedef struct _datablockrec {
   DataBlock Prev; /* previous data block */
 } DataBlockRec;
 
-DataBlock DataMem = Nil;
-int DataBlockSize = 0;
+THREAD_LOCAL DataBlock DataMem = Nil;
+THREAD_LOCAL int DataBlockSize = 0;
 
 DataRec NewCase(void)
 /*      -------  */
@@ -222,12 +238,12 @@ void FreeLastCase(DataRec Case)
   if ((F -= S) < 0)                                                            \
   F += 1.0
 
-int KRFp = 0, KRSp = 0;
+THREAD_LOCAL int KRFp = 0, KRSp = 0;
 
 double KRandom(void)
 /*     -------  */
 {
-  static double URD[55];
+  static THREAD_LOCAL double URD[55];
   double V1, V2;
   int i, j;
 
@@ -433,7 +449,7 @@ void Error(int ErrNo, String S1, String S2)
 /*                                                                       */
 /*************************************************************************/
 
-char LabelBuffer[1000];
+THREAD_LOCAL char LabelBuffer[1000];
 
 String CaseLabel(CaseNo N)
 /*     ---------  */
@@ -746,7 +762,7 @@ void Cleanup(void)
 /*   -------  */
 {
   RuleNo r;
-  extern FILE *Uf;
+  extern THREAD_LOCAL FILE *Uf;
 
   NotifyStage(CLEANUP);
 
@@ -769,7 +785,9 @@ void Cleanup(void)
     Blocked = Nil;
   }
 
-  if (Instance) {
+  /*  A model loaded into a handle is freed by the handle  */
+
+  if (Instance && !KeepModel) {
     FreeInstances();
     Instance = Nil;
   }
@@ -802,7 +820,9 @@ void Cleanup(void)
 
   KDTree = Nil;
 
-  FreeNamesData();
+  if (!KeepModel) {
+    FreeNamesData();
+  }
 
   MaxCase = -1;
   NotifyStage(0);
@@ -45,7 +45,7 @@ void CrossVal(void)
 /*   --------  */
 {
   CaseNo i, Size, Start = 0, Next, N;
-  int f, SmallTestBlocks;
+  int f, SmallTestBlocks, SaveMEMBERS = MEMBERS;
   double *ErrMag, R, SumR = 0, SumRR = 0, /* real value */
       P, SumP = 0, SumPP = 0,             /* predicted value */
       SumRP = 0,                          /* for correlation coeff */
@@ -133,6 +133,7 @@ void CrossVal(void)
 
     FreeCttee(Cttee);
     Cttee = Nil;
+    MEMBERS = SaveMEMBERS; /* the committee may have stopped early */
 
     if (USEINSTANCES) {
       FreeInstances();
@@ -13,6 +13,11 @@ if sys.platform == "darwin":
             "-Wno-unused-but-set-variable",  # For Bestid in formrules.c
         ]
     )
+extra_link_args: list[str] = []
+if sys.platform != "win32":
+    # the attributes at each node of a tree are evaluated by POSIX threads
+    extra_compile_args.append("-pthread")
+    extra_link_args.append("-pthread")
 
 
 extensions = [
@@ -22,6 +27,7 @@ extensions = [
         include_dirs=["cubist/src", np.get_include()],
         define_macros=[("NPY_NO_DEPRECATED_API", "NPY_1_7_API_VERSION")],
         extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
     )
 ]
 
@@ -3,9 +3,10 @@ https://docs.pytest.org/en/stable/reference/fixtures.html#conftest-py-sharing-fi
 
 from contextlib import contextmanager
 
+import numpy as np
 import pandas as pd
 import pytest
-from sklearn.datasets import fetch_openml, load_iris
+from sklearn.datasets import fetch_openml, load_diabetes, load_iris, make_friedman1
 
 
 @contextmanager
@@ -14,6 +15,12 @@ def no_raise():
     yield
 
 
+def same_model(model, other):
+    """Utility for whether two fitted models are the same, ignoring the
+    header line of the model text, which has the date it was fitted"""
+    return model.model_.split("\n")[1:] == other.model_.split("\n")[1:]
+
+
 @pytest.fixture(scope="session")
 def ames_housing_dataset():
     """Fixture for ames housing dataset"""
@@ -36,6 +43,31 @@ def iris_dataset():
     return load_iris(return_X_y=True, as_frame=True)
 
 
+@pytest.fixture(scope="session")
+def diabetes_dataset():
+    """Fixture for diabetes dataset"""
+    return load_diabetes(return_X_y=True, as_frame=True)
+
+
+@pytest.fixture(scope="session")
+def diabetes_discrete_dataset(diabetes_dataset):
+    """Fixture for diabetes dataset with a discrete feature `cat`"""
+    X, y = diabetes_dataset
+    X = X.copy()
+    X["cat"] = np.where(X["bmi"] > 0, "a", "b")
+    return X, y
+
+
+@pytest.fixture(scope="session")
+def friedman_dataset():
+    """Fixture for a Friedman #1 dataset with enough cases that the nodes near
+    the root are shared out between threads, and a discrete feature `c`"""
+    X, y = make_friedman1(3000, n_features=10, noise=1.0, random_state=0)
+    X = pd.DataFrame(X, columns=[f"x{i}" for i in range(X.shape[1])])
+    X["c"] = pd.cut(X.x3, 5, labels=list("abcde")).astype(str)
+    return X, y
+
+
 @pytest.fixture(scope="session")
 def boston_dataset():
     """Fixture for the Boston housing dataset"""
@@ -1,14 +1,24 @@
 """Test cubist.cubist.Cubist configuration"""
 
+import os
+import pickle
 import random
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 
+import numpy as np
+import pandas as pd
 import pytest
+from scipy.sparse import csr_matrix
+from sklearn.datasets import make_friedman1
 from sklearn.utils.validation import check_is_fitted
 
 from cubist import Cubist, CubistError
+from cubist._make_data_string import _make_data_string
 
-from .conftest import no_raise
+from .conftest import no_raise, same_model
 
 
 @pytest.mark.parametrize("expected_output", [True])
@@ -147,6 +157,170 @@ def test_cv(cv, raises, ames_housing_dataset):
         model.fit(*ames_housing_dataset)
 
 
+@pytest.mark.parametrize(
+    "params,raises",
+    [
+        ({"validation_fraction": 0.2, "n_iter_no_change": 2}, no_raise()),
+        ({"validation_fraction": 0.0}, pytest.raises(ValueError)),
+        ({"validation_fraction": 1.0}, pytest.raises(ValueError)),
+        ({"n_iter_no_change": 0}, pytest.raises(ValueError)),
+        ({"n_iter_no_change": 1.5}, pytest.raises(TypeError)),
+    ],
+)
+def test_early_stopping_parameters(params, raises, diabetes_dataset):
+    """Test `validation_fraction` and `n_iter_no_change` parameters"""
+    X, y = diabetes_dataset
+    model = Cubist(n_committees=3, early_stopping=True, **params)
+    with raises:
+        model.fit(X, y)
+        check_is_fitted(model)
+
+
+def test_early_stopping(diabetes_dataset):
+    """Test committees stop early and keep the members built before the one
+    with the least error on the held out cases"""
+    X, y = diabetes_dataset
+    assert Cubist(n_committees=20).fit(X, y).n_committees_used_ == 20
+
+    params = {"n_committees": 20, "early_stopping": True, "random_state": 0}
+    patient = Cubist(n_iter_no_change=20, **params).fit(X, y)
+    model = Cubist(n_iter_no_change=1, **params).fit(X, y)
+    assert 1 <= model.n_committees_used_ <= patient.n_committees_used_ < 20
+
+    # the members are built in the same way whenever they stop
+    k = model.n_committees_used_
+    pd.testing.assert_frame_equal(
+        patient.coeffs_[patient.coeffs_.committee <= k], model.coeffs_
+    )
+    staged = list(patient.staged_predict(X))
+    np.testing.assert_array_equal(staged[k - 1], model.predict(X))
+
+    # another seed holds out other cases
+    other = Cubist(n_iter_no_change=20, **{**params, "random_state": 1}).fit(X, y)
+    assert not same_model(other, patient)
+
+    # a composite model uses all the cases as instances, and each fold of
+    # cross-validation stops separately
+    Cubist(neighbors=3, **params).fit(X, y).predict(X)
+    Cubist(cv=3, **params).fit(X, y)
+
+
+def test_random_state(diabetes_dataset):
+    """Test the seed makes sampling repeatable"""
+    X, y = diabetes_dataset
+    models = [Cubist(sample=0.5, random_state=s).fit(X, y) for s in (0, 0, 1)]
+    assert same_model(models[0], models[1])
+    assert not same_model(models[0], models[2])
+
+
+@pytest.mark.parametrize("params", [{}, {"neighbors": 3}, {"sample": 0.7}])
+def test_warm_start(params, diabetes_dataset):
+    """Test a warm start keeps the fitted committee members and adds the
+    members that a full refit builds after them"""
+    X, y = diabetes_dataset
+    params = {"random_state": 0, **params}
+    model = Cubist(n_committees=3, warm_start=True, **params).fit(X, y)
+    coeffs = model.coeffs_
+    model.set_params(n_committees=6).fit(X, y)
+    assert model.n_committees_used_ == 6
+    pd.testing.assert_frame_equal(
+        model.coeffs_[model.coeffs_.committee <= 3], coeffs, check_dtype=False
+    )
+    assert model.output_.count("Model 6:") == 1
+
+    full = Cubist(n_committees=6, **params).fit(X, y)
+    np.testing.assert_allclose(model.predict(X), full.predict(X), rtol=1e-5)
+
+    with pytest.raises(ValueError):
+        model.set_params(n_committees=5).fit(X, y)
+    with pytest.raises(ValueError):
+        model.set_params(n_committees=7).fit(X.iloc[:, 1:], y)
+    # cross-validation starts over
+    model.set_params(cv=3).fit(X, y)
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 3}])
+def test_fit_n_jobs(params, friedman_dataset):
+    """Test evaluating the attributes in threads builds the same model, with
+    enough cases that the nodes near the root are shared out"""
+    X, y = friedman_dataset
+    serial = Cubist(**params).fit(X, y)
+    threaded = Cubist(n_jobs=4, **params).fit(X, y)
+    assert same_model(threaded, serial)
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 3, "n_jobs": 4}])
+def test_split_finder(params, friedman_dataset):
+    """Test the hist split finder tries every cut of features with no more
+    values than bins, and otherwise builds a model of about the same error"""
+    X, y = friedman_dataset
+    X = X.copy()
+    X.iloc[::9, 1] = np.nan
+
+    rounded = X.round(2)
+    exact = Cubist(**params).fit(rounded, y)
+    hist = Cubist(split_finder="hist", **params).fit(rounded, y)
+    assert same_model(hist, exact)
+
+    exact = Cubist(**params).fit(X, y)
+    hist = Cubist(split_finder="hist", **params).fit(X, y)
+    assert hist.model_ != exact.model_
+    errors = [np.abs(y - model.predict(X)).mean() for model in (exact, hist)]
+    assert errors[1] < 1.1 * errors[0]
+
+    with pytest.raises(ValueError):
+        Cubist(split_finder="approx").fit(X, y)
+
+
+@pytest.mark.parametrize(
+    "params", [{}, {"n_committees": 3, "n_jobs": 4}, {"sample": 0.5, "random_state": 0}]
+)
+def test_split_finder_presort(params, friedman_dataset):
+    """Test sorting the cases once for each tree builds the same model as
+    sorting them at each node"""
+    X, y = friedman_dataset
+    X = X.copy()
+    X.iloc[::9, 1] = np.nan
+    exact = Cubist(**params).fit(X, y)
+    presort = Cubist(split_finder="presort", **params).fit(X, y)
+    assert same_model(presort, exact)
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 3}, {"solver": "lapack"}])
+def test_ill_conditioned_models(params):
+    """Test the linear models stay accurate when the features are nearly
+    collinear or far from zero, as attributes are dropped from them"""
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=2000)
+    X = pd.DataFrame(
+        {
+            "a": a,
+            "a2": 2 * a + 1e-7 * rng.normal(size=2000),
+            "year": 2000 + rng.integers(0, 20, 2000) + 0.01 * rng.normal(size=2000),
+            "big": 1e6 + rng.normal(size=2000),
+            "b": rng.normal(size=2000),
+        }
+    )
+    y = 3 * X.a + 0.5 * X.year + 2 * X.b + 0.1 * rng.normal(size=2000)
+    model = Cubist(**params).fit(X, y)
+    assert np.abs(y - model.predict(X)).mean() < 0.2
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 3, "n_jobs": 4}])
+def test_solver(params, friedman_dataset):
+    """Test solving the linear models with LAPACK builds the same model as
+    solving them by elimination"""
+    X, y = friedman_dataset
+    X = X.copy()
+    X.iloc[::9, 1] = np.nan
+    elimination = Cubist(**params).fit(X, y)
+    lapack = Cubist(solver="lapack", **params).fit(X, y)
+    assert same_model(lapack, elimination)
+
+    with pytest.raises(ValueError):
+        Cubist(solver="qr").fit(X, y)
+
+
 @pytest.mark.parametrize(
     "auto,n,expected,raises,warns",
     [
@@ -227,3 +401,401 @@ def test_feature_importances(ames_housing_dataset):
         "Model",
         "Variable",
     ]
+
+
+@pytest.mark.parametrize("neighbors", [None, 5])
+def test_loaded_model_predictions(neighbors, diabetes_dataset):
+    """Test that the model loaded at fit and after unpickling predicts the same
+    values across repeated calls"""
+    X, y = diabetes_dataset
+    model = Cubist(neighbors=neighbors).fit(X, y)
+    y_hat = model.predict(X)
+    # predicting on a subset must not disturb the loaded model
+    assert np.array_equal(model.predict(X.iloc[:1]), y_hat[:1])
+    assert np.array_equal(model.predict(X), y_hat)
+    unpickled = pickle.loads(pickle.dumps(model))
+    assert "_cubist_model" not in model.__getstate__()
+    assert np.array_equal(unpickled.predict(X), y_hat)
+
+
+def test_predictions_at_split_thresholds(diabetes_dataset):
+    """Test cases at a split threshold satisfy the <= condition, as cases just
+    below it do, and cases just above it don't"""
+    X, y = diabetes_dataset
+    model = Cubist(n_committees=2).fit(X, y)
+    split = model.splits_.iloc[0]
+    cut = float(split["value"])
+    assert split["dir"] == "<="
+
+    def predict_at(value):
+        X_at = X.copy()
+        X_at[split["variable"]] = value
+        return model.predict(X_at)
+
+    # the value is read as a float so "just below" is one float step away
+    at_cut = predict_at(np.float32(cut))
+    below = predict_at(np.nextafter(np.float32(cut), np.float32(-np.inf)))
+    above = predict_at(np.nextafter(np.float32(cut), np.float32(np.inf)))
+    np.testing.assert_allclose(at_cut, below, rtol=1e-5)
+    assert not np.allclose(at_cut, above, rtol=1e-5)
+
+
+def test_pickled_instance_index(diabetes_dataset):
+    """Test the instances and kd-tree of a composite model are pickled in
+    place of the training data and restored, and rebuilt from the data if
+    they can't be restored and it's there"""
+    X, y = diabetes_dataset
+    assert Cubist().fit(X, y).__getstate__()["_instance_index"] is None
+    model = Cubist(neighbors=5).fit(X, y)
+    y_hat = model.predict(X)
+    state = model.__getstate__()
+    assert isinstance(state["_instance_index"], bytes)
+    assert state["_data_columns"] is None
+    assert model._data_columns is not None
+    unpickled = pickle.loads(pickle.dumps(model))
+    assert np.array_equal(unpickled.predict(X), y_hat)
+    # the model is loaded again from the instances once the cache is cleared
+    assert np.array_equal(unpickled.clear_cache().predict(X), y_hat)
+    state["_instance_index"] = state["_instance_index"][:100]
+    truncated = Cubist.__new__(Cubist)
+    with pytest.raises(CubistError):
+        truncated.__setstate__(state)
+    truncated.__setstate__({**state, "_data_columns": model._data_columns})
+    assert np.array_equal(truncated.predict(X), y_hat)
+    # the limits on predictions are restored exactly, not rounded as they are
+    # in the model file
+    model = Cubist(neighbors=5).fit(X, y / 7)
+    X_far = X * 3
+    unpickled = pickle.loads(pickle.dumps(model))
+    assert np.array_equal(unpickled.predict(X_far), model.predict(X_far))
+
+
+def test_pickled_composite_size(friedman_dataset):
+    """Test a composite model's pickle holds its instances once, in their
+    index, rather than also holding the training data"""
+    X, y = friedman_dataset
+    rules = Cubist().fit(X, y)
+    model = Cubist(neighbors=5).fit(X, y)
+    index = model.__getstate__()["_instance_index"]
+    extra = len(pickle.dumps(model)) - len(pickle.dumps(rules))
+    assert extra < 1.1 * len(index)
+    unpickled = pickle.loads(pickle.dumps(model))
+    assert len(pickle.dumps(unpickled)) < 1.01 * len(pickle.dumps(model))
+
+
+def test_pickled_composite_predictions():
+    """Test an unpickled composite model predicts exactly as the fitted one,
+    its neighbor estimates being limited by the same range of the target"""
+    X, y = make_friedman1(2000, noise=1.0, random_state=0)
+    model = Cubist(neighbors=5).fit(X, y)
+    unpickled = pickle.loads(pickle.dumps(model))
+    assert np.array_equal(unpickled.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("params", [{}, {"neighbors": 5}])
+def test_predict_n_jobs(params, diabetes_discrete_dataset):
+    """Test predicting shares of the cases in threads gives the same
+    predictions and errors as predicting them all at once, reusing the
+    threads until the cache is cleared"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist(**params).fit(X, y)
+    X_pred = pd.concat([X] * 10, ignore_index=True)
+    y_hat = model.predict(X_pred)
+    model.set_params(n_jobs=3)
+    assert np.array_equal(model.predict(X_pred), y_hat)
+    pool = model._thread_pool
+    assert np.array_equal(model.predict(X_pred), y_hat)
+    assert model._thread_pool is pool
+    assert getattr(pickle.loads(pickle.dumps(model)), "_thread_pool", None) is None
+    model.clear_cache()
+    assert model._thread_pool is None
+    X_pred.loc[len(X_pred) - 1, "cat"] = "c"
+    with pytest.raises(CubistError):
+        model.predict(X_pred)
+
+
+def test_predict_process_backend(diabetes_discrete_dataset):
+    """Test predicting in worker processes gives the same predictions as in
+    one thread, reusing the workers until the cache is cleared"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist(neighbors=3, n_jobs=2).fit(X, y)
+    X_big = X.sample(4000, replace=True, random_state=0)
+    y_hat = model.predict(X_big)
+    np.testing.assert_array_equal(model.predict(X_big, backend="process"), y_hat)
+    pool = model._process_pool
+    np.testing.assert_array_equal(model.predict(X_big, backend="process"), y_hat)
+    assert model._process_pool is pool
+    with pytest.raises(CubistError):
+        model.predict(X_big.assign(cat="c"), backend="process")
+    # a copy of the model doesn't share the workers
+    copy = pickle.loads(pickle.dumps(model))
+    assert getattr(copy, "_process_pool", None) is None
+    model.clear_cache()
+    assert model._process_pool is None
+    with pytest.raises(ValueError):
+        model.predict(X_big, backend="loky")
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 4}, {"n_rules": 1}])
+def test_predict_numpy_engine(params):
+    """Test the rules evaluated with NumPy give the C library's predictions,
+    including for missing values and categories, and raise the same errors"""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "x0": rng.uniform(size=1000),
+            "x1": rng.uniform(size=1000),
+            "cat": rng.choice(["a", "b c", 'd"e', "f"], 1000),
+        }
+    )
+    y = np.sin(10 * X.x0) + X.cat.map({"a": 0, "b c": 3, 'd"e': -2, "f": 1}) * X.x1
+    model = Cubist(**params).fit(X, y)
+    X.loc[::7, "x0"] = np.nan
+    X.loc[::11, "cat"] = np.nan
+    np.testing.assert_allclose(
+        model.predict(X, engine="numpy"), model.predict(X), rtol=1e-6
+    )
+    X.loc[3, "cat"] = "g"
+    with pytest.raises(CubistError):
+        model.predict(X, engine="numpy")
+    with pytest.raises(ValueError):
+        model.predict(X, engine="python")
+
+
+def test_predict_numpy_engine_composite(diabetes_dataset):
+    """Test composite models can't be predicted with NumPy"""
+    X, y = diabetes_dataset
+    model = Cubist(neighbors=3).fit(X, y)
+    with pytest.raises(ValueError):
+        model.predict(X, engine="numpy")
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 3}, {"neighbors": 3}])
+def test_predict_one(params, diabetes_discrete_dataset):
+    """Test predicting a case at a time from a dict or a list of values gives
+    the predictions and errors of predict"""
+    X, y = diabetes_discrete_dataset
+    X = X.copy()
+    model = Cubist(**params).fit(X, y)
+    X.loc[::5, "cat"] = np.nan
+    X.loc[::3, "bmi"] = np.nan
+    y_hat = model.predict(X.iloc[:50])
+    for i, record in enumerate(X.iloc[:50].to_dict("records")):
+        assert model.predict_one(record) == y_hat[i]
+        assert model.predict_one(list(record.values())) == y_hat[i]
+    with pytest.raises(CubistError):
+        model.predict_one({**record, "cat": "c"})
+    with pytest.raises(ValueError):
+        model.predict_one(list(record.values())[1:])
+    with pytest.raises(ValueError):
+        model.predict_one({"age": 0})
+
+
+def test_predict_numpy_engine_refit(diabetes_dataset):
+    """Test the NumPy engine uses the model from the latest fit"""
+    X, y = diabetes_dataset
+    model = Cubist(n_committees=3).fit(X, y)
+    model.predict(X, engine="numpy")
+    model.fit(X.iloc[:200], y.iloc[:200])
+    np.testing.assert_allclose(
+        model.predict(X, engine="numpy"), model.predict(X), rtol=1e-6
+    )
+
+
+@pytest.mark.parametrize(
+    "params,engine",
+    [({}, "c"), ({"neighbors": 3}, "c"), ({"n_committees": 3}, "numpy")],
+)
+def test_predict_iter(params, engine, diabetes_discrete_dataset):
+    """Test predicting a chunk at a time gives the predictions of predict,
+    whether the cases are one DataFrame, a list of rows or an iterator of
+    chunks"""
+    X, y = diabetes_discrete_dataset
+    X = X.copy()
+    model = Cubist(**params).fit(X, y)
+    X.loc[::5, "cat"] = np.nan
+    X.loc[::3, "bmi"] = np.nan
+    y_hat = model.predict(X, engine=engine)
+    chunks = list(model.predict_iter(X, chunk_size=100, engine=engine))
+    assert [len(c) for c in chunks] == [100, 100, 100, 100, 42]
+    np.testing.assert_array_equal(np.concatenate(chunks), y_hat)
+    chunks = model.predict_iter(iter((X.iloc[:50], X.iloc[50:])), 300, engine)
+    np.testing.assert_array_equal(np.concatenate(list(chunks)), y_hat)
+    numeric = X.drop(columns="cat").fillna(0).to_numpy()
+    model = Cubist(**params).fit(numeric, y)
+    chunks = model.predict_iter(numeric.tolist(), 100, engine)
+    np.testing.assert_array_equal(
+        np.concatenate(list(chunks)), model.predict(numeric, engine=engine)
+    )
+    with pytest.raises(ValueError):
+        next(model.predict_iter(X, chunk_size=0))
+
+
+def test_predict_csv(tmp_path, diabetes_dataset):
+    """Test predicting a CSV file gives the predictions of predict, with its
+    columns in any order and discrete features read as strings"""
+    X, y = diabetes_dataset
+    X = X.copy()
+    X["cat"] = np.where(X["bmi"] > 0, "1", "x")
+    X.loc[:200, "cat"] = "2"
+    model = Cubist().fit(X, y)
+    X.loc[::5, "cat"] = np.nan
+    X.assign(target=y).iloc[:, ::-1].to_csv(tmp_path / "cases.csv", index=False)
+    n_samples = model.predict_csv(
+        tmp_path / "cases.csv", tmp_path / "predictions.csv", chunk_size=100
+    )
+    assert n_samples == X.shape[0]
+    predictions = pd.read_csv(
+        tmp_path / "predictions.csv", float_precision="round_trip"
+    )
+    np.testing.assert_array_equal(predictions["prediction"], model.predict(X))
+
+
+@pytest.mark.parametrize("params", [{"n_committees": 3}, {"neighbors": 3}])
+def test_decision_path(params, diabetes_discrete_dataset):
+    """Test the decision path has the rules that apply to each case, covers
+    as many training cases as each rule and has committee predictions that
+    average to the predictions"""
+    X, y = diabetes_discrete_dataset
+    X = X.copy()
+    model = Cubist(**params).fit(X, y)
+    indicator, committees = model.decision_path(X, return_committee_predictions=True)
+    assert indicator.shape == (X.shape[0], model.coeffs_.shape[0])
+    assert committees.shape == (X.shape[0], model.n_committees_used_)
+
+    # the training cases on each rule's path are those it covers
+    covers = [int(c) for c in re.findall(r'cover="(\d+)"', model.model_)]
+    np.testing.assert_array_equal(indicator.sum(axis=0), [covers])
+
+    if "neighbors" not in params:
+        np.testing.assert_allclose(committees.mean(axis=1), model.predict(X), rtol=1e-6)
+        # the rules are those the NumPy engine finds the cases satisfy
+        X.loc[::5, "cat"] = np.nan
+        predictor = model._numpy_model()
+        case, rule = predictor._satisfied(*predictor._case_values(X))
+        expected = csr_matrix((np.ones(len(case)), (case, rule)), indicator.shape)
+        assert (model.decision_path(X) != expected).nnz == 0
+
+
+@pytest.mark.parametrize("n_samples", [384, 385])
+def test_rule_covers(n_samples, diabetes_dataset):
+    """Test each rule covers the training cases that satisfy its conditions
+    when the cases fill the sets of 64 that rules are formed with and when
+    one is left over"""
+    X, y = diabetes_dataset
+    X, y = X[:n_samples].copy(), y[:n_samples]
+    X["cat"] = pd.cut(X["bp"], 3, labels=["a", "b", "c"]).astype(str)
+    model = Cubist().fit(X, y)
+    covers = [int(c) for c in re.findall(r'cover="(\d+)"', model.model_)]
+    np.testing.assert_array_equal(model.decision_path(X).sum(axis=0), [covers])
+
+
+def test_staged_predict(diabetes_dataset):
+    """Test the predictions after each committee are those of a model fitted
+    with that many committees"""
+    X, y = diabetes_dataset
+    model = Cubist(n_committees=4).fit(X, y)
+    stages = list(model.staged_predict(X))
+    assert len(stages) == model.n_committees_used_
+    for k, y_hat in enumerate(stages, start=1):
+        np.testing.assert_array_equal(
+            y_hat, Cubist(n_committees=k).fit(X, y).predict(X)
+        )
+    with pytest.raises(ValueError):
+        next(Cubist(neighbors=3).fit(X, y).staged_predict(X))
+
+
+def test_clear_cache(diabetes_dataset):
+    """Test the loaded model is released, reloaded and replaced on refit"""
+    X, y = diabetes_dataset
+    # there is nothing to release before fitting
+    Cubist().clear_cache()
+    model = Cubist(neighbors=5).fit(X, y)
+    # the training data is reloaded from compressed columns
+    assert isinstance(model._data_columns, bytes)
+    y_hat = model.predict(X)
+    assert model.clear_cache() is model
+    assert model._cubist_model is None
+    assert np.array_equal(model.predict(X), y_hat)
+    loaded = model._cubist_model
+    assert loaded is not None
+    model.fit(X.iloc[:300], y.iloc[:300])
+    assert model._cubist_model is not loaded
+
+
+@pytest.mark.parametrize(
+    "params", [{}, {"neighbors": 5}, {"n_committees": 3, "neighbors": 3}]
+)
+def test_threaded_fit_predict(params, diabetes_dataset):
+    """Test that fitting and predicting from several threads at once gives the
+    same results as doing so serially"""
+    X, y = diabetes_dataset
+    model = Cubist(**params).fit(X, y)
+    y_hat = model.predict(X)
+
+    def fit_predict(_):
+        return Cubist(**params).fit(X, y).predict(X)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        fitted = list(executor.map(fit_predict, range(8)))
+        # threads sharing one loaded model
+        shared = list(executor.map(lambda _: model.predict(X), range(16)))
+    assert all(np.array_equal(pred, y_hat) for pred in fitted + shared)
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/self/statm"), reason="reads memory from /proc"
+)
+def test_threads_free_engine_state(diabetes_dataset):
+    """Test the engine frees what it keeps for each thread when a call ends,
+    so that predicting from many short-lived threads doesn't grow memory"""
+    X, y = diabetes_dataset
+    model = Cubist().fit(X, y)
+    X = X.iloc[:20]
+
+    def resident_size():
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def predict_in_new_threads(n_calls):
+        for _ in range(n_calls):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: model.predict(X), range(4)))
+
+    predict_in_new_threads(50)
+    before = resident_size()
+    predict_in_new_threads(300)
+    assert resident_size() - before < 4 * 2**20
+
+
+@pytest.mark.parametrize("params", [{}, {"n_committees": 3}, {"sample": 0.5}])
+def test_data_columns_match_text(monkeypatch, params, diabetes_dataset):
+    """Test that passing data as columns builds the same model and predictions
+    as passing it as text"""
+    X, y = diabetes_dataset
+    X = X.copy()
+    rng = np.random.default_rng(0)
+    X["cat"] = rng.choice(["a", "b c", "d.e"], len(X)).astype(object)
+    X.loc[rng.integers(0, len(X), 20), "cat"] = np.nan
+    X.loc[rng.integers(0, len(X), 20), "bmi"] = np.nan
+    columns = Cubist(random_state=0, **params).fit(X, y)
+    y_hat = columns.predict(X)
+    monkeypatch.setattr("cubist.cubist._make_data_columns", lambda *a, **k: None)
+    text = Cubist(random_state=0, **params).fit(X, y)
+    assert same_model(columns, text)
+    assert np.array_equal(y_hat, text.predict(X))
+
+
+def test_data_columns_instances(monkeypatch, diabetes_dataset):
+    """Test that a composite model loads the same instances from columns as
+    from text"""
+    X, y = diabetes_dataset
+    X = X.copy()
+    X["cat"] = np.random.default_rng(0).choice(["a", "b"], len(X)).astype(object)
+    model = Cubist(neighbors=5).fit(X, y)
+    y_hat = model.predict(X)
+    model._data_columns = None
+    model._data_string = zlib.compress(_make_data_string(X.copy(), y).encode())
+    model._cubist_model = model._load_model()
+    monkeypatch.setattr("cubist.cubist._make_data_columns", lambda *a, **k: None)
+    assert np.array_equal(model.predict(X), y_hat)
@@ -5,7 +5,6 @@ import random
 import numpy as np
 import pandas as pd
 import pytest
-from sklearn.datasets import load_diabetes
 from sklearn.model_selection import train_test_split
 from sklearn.utils.validation import check_is_fitted
 
@@ -36,9 +35,9 @@ def test_small_ds_warning():
         check_is_fitted(model)
 
 
-def test_undefined_cases():
+def test_undefined_cases(diabetes_dataset):
     """Catch when undefined cases are raised"""
-    X, y = load_diabetes(return_X_y=True, as_frame=True)
+    X, y = diabetes_dataset
 
     X_train, X_test, y_train, _ = train_test_split(
         X, y, test_size=0.33, random_state=42
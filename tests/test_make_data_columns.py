@@ -0,0 +1,39 @@
+"""Tests for passing input datasets to Cubist as columns of values"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cubist._make_data_columns import _make_data_columns
+
+df = pd.DataFrame(
+    {
+        "a": [1, 2, 3],
+        "b": [0.5, np.nan, 1.5],
+        "c": pd.Series(["x", " y", np.nan], dtype=object),
+    }
+)
+
+
+def test_make_data_columns():
+    """Test the outcome, feature and weight columns and their levels"""
+    data = _make_data_columns(df, pd.Series([1.0, 2.0, 3.0]), w=np.ones(3))
+    assert len(data.columns) == 5
+    assert data.levels == [None, None, None, [b"x", b"y"], None]
+    np.testing.assert_array_equal(data.columns[2], [0.5, np.nan, 1.5])
+    np.testing.assert_array_equal(data.columns[3], [0, 1, -1])
+    assert data.columns[3].dtype == np.intc
+
+
+def test_make_data_columns_predictions():
+    """Test the outcome is unknown when there is none"""
+    data = _make_data_columns(df)
+    assert np.isnan(data.columns[0]).all()
+
+
+def test_make_data_columns_unsupported():
+    """Test data that can only be passed as text and unsupported data"""
+    dates = pd.DataFrame({"d": pd.date_range("2018-01-01", periods=3, freq="h")})
+    assert _make_data_columns(dates) is None
+    with pytest.raises(ValueError):
+        _make_data_columns(pd.DataFrame({"z": [complex(0, i) for i in range(3)]}))
@@ -0,0 +1,38 @@
+"""Tests for converting input datasets to the Cubist data string"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cubist._make_data_string import _make_data_string
+
+
+def test_make_data_string():
+    """Test the outcome, feature and weight columns are formatted as before"""
+    x = pd.DataFrame(
+        {
+            "a": [1.25, np.nan, 1e20],
+            "b": [1, 2, 3],
+            "c": [" x", "a:b", "nan"],
+            "d": [1e-5, -0.0, 123.45678901234567],
+        }
+    )
+    data = _make_data_string(x.copy(), pd.Series([1.5, np.nan, -2.0]), w=np.ones(3))
+    assert data.split("\n") == [
+        "1\\.5,1.25,1,\\ x,0.00001,1",
+        "?,?,2,a\\\\:b,-0,1",
+        "\\-2\\.0,100000000000000000000,3,?,123.456789012346,1",
+    ]
+
+
+def test_make_data_string_predictions():
+    """Test the outcome is unknown when there is none and x isn't modified"""
+    x = pd.DataFrame({"a": [1.0, 2.0], "c": ["u", "v"]})
+    assert _make_data_string(x) == "?,1,u\n?,2,v"
+    assert list(x.columns) == ["a", "c"]
+
+
+def test_make_data_string_complex():
+    """Test complex columns are rejected"""
+    with pytest.raises(ValueError):
+        _make_data_string(pd.DataFrame({"a": [1 + 1j, 2 + 0j]}))
@@ -0,0 +1,98 @@
+"""Test cubist.serving.MicroBatcher"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from cubist import Cubist, CubistError
+from cubist.serving import MicroBatcher
+
+
+async def _predict_all(batcher, rows):
+    async with batcher:
+        return await asyncio.gather(
+            *(batcher.predict(row) for row in rows), return_exceptions=True
+        )
+
+
+@pytest.mark.parametrize(
+    "params,engine",
+    [({}, "c"), ({"n_committees": 3}, "c"), ({"neighbors": 3}, "c"), ({}, "numpy")],
+)
+def test_micro_batcher_predictions(diabetes_discrete_dataset, params, engine):
+    """Test cases scored concurrently get the predictions of predict"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist(**params).fit(X, y)
+    X = X.iloc[:100].copy()
+    X.loc[::5, "cat"] = np.nan
+    X.loc[::3, "bmi"] = np.nan
+    batcher = MicroBatcher(model, max_batch_size=16, engine=engine)
+    y_hat = asyncio.run(_predict_all(batcher, X.to_dict("records")))
+    np.testing.assert_array_equal(y_hat, model.predict(X))
+
+
+def test_micro_batcher_batch_size(diabetes_discrete_dataset, monkeypatch):
+    """Test batches are no larger than max_batch_size"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist().fit(X, y)
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=50)
+    sizes = []
+    predict_rows = batcher._predict_rows
+
+    def _predict_rows(rows):
+        sizes.append(len(rows))
+        return predict_rows(rows)
+
+    monkeypatch.setattr(batcher, "_predict_rows", _predict_rows)
+    rows = X.iloc[:50].to_numpy(dtype=object)
+    asyncio.run(_predict_all(batcher, rows))
+    assert sum(sizes) == 50
+    assert max(sizes) == 8
+
+
+def test_micro_batcher_errors(diabetes_discrete_dataset):
+    """Test only the caller whose case fails gets the error"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist().fit(X, y)
+    rows = X.iloc[:20].to_dict("records")
+    rows[7] = {**rows[7], "cat": "c"}
+    y_hat = asyncio.run(_predict_all(MicroBatcher(model), rows))
+    assert isinstance(y_hat[7], CubistError)
+    expected = model.predict(X.iloc[:20])
+    for i, prediction in enumerate(y_hat):
+        if i != 7:
+            assert prediction == expected[i]
+
+    with pytest.raises(ValueError):
+        asyncio.run(MicroBatcher(model).predict({"age": 0}))
+
+
+def test_micro_batcher_batch_errors(diabetes_discrete_dataset, monkeypatch):
+    """Test an error not caused by a case is given to every caller of the
+    batch without predicting its cases one at a time"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist().fit(X, y)
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=50)
+    calls = []
+
+    def _predict_rows(rows):
+        calls.append(len(rows))
+        raise RuntimeError("executor shut down")
+
+    monkeypatch.setattr(batcher, "_predict_rows", _predict_rows)
+    y_hat = asyncio.run(_predict_all(batcher, X.iloc[:8].to_dict("records")))
+    assert calls == [8]
+    assert all(isinstance(error, RuntimeError) for error in y_hat)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"max_batch_size": 0}, {"max_wait_ms": -1.0}, {"engine": "fortran"}],
+)
+def test_micro_batcher_parameters(diabetes_discrete_dataset, params):
+    """Test invalid batching parameters are rejected"""
+    X, y = diabetes_discrete_dataset
+    model = Cubist().fit(X, y)
+    with pytest.raises(ValueError):
+        MicroBatcher(model, **params)